@@ -0,0 +1,92 @@
+"""Offline load benchmark for the LLM adapter / manager.
+Run (against scripts/fake_llm_server.py):
+    python scripts/fake_llm_server.py --port 8099 --latency-ms 300 --rate-429 0.05 &
+    PYTHONPATH=src python scripts/bench_llm.py --base-url http://127.0.0.1:8099 --concurrency 32 --requests 500
+
+Reports throughput, p50/p95/p99 latency, fallback / error / retry counts from
+METRICS and connection reuse (requests per TCP connection seen by the server).
+The response cache is disabled unless --cache is given, so every call reaches the server.
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    s = sorted(values)
+    return round(s[min(int(q * len(s)), len(s) - 1)], 2)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--base-url", default="http://127.0.0.1:8099")
+    ap.add_argument("--mode", choices=["invoke", "safe_json"], default="safe_json")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--prompt", default="GENERATE_ITINERARY bench")
+    ap.add_argument("--cache", action="store_true", help="keep LLM_CACHE enabled (prompts repeat)")
+    ap.add_argument("--verbose", action="store_true", help="keep per-call JSON logs on stdout")
+    args = ap.parse_args()
+
+    # config is read at import time
+    os.environ["LLM_BASE_URL"] = args.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+    if not args.cache:
+        os.environ["LLM_CACHE_ENABLE"] = "false"
+    import httpx
+    import travel_agent.logger as logger
+    if not args.verbose:
+        logger._emit = lambda payload: None
+    from travel_agent.llm_manager import llm_invoke, llm_safe_json, llm_select_model
+    from travel_agent.llm_adapter import close_http_clients
+    from travel_agent.metrics import METRICS, METRICS_LLM
+
+    try:
+        httpx.post(f"{args.base_url}/stats/reset", timeout=5)
+    except httpx.HTTPError as e:
+        sys.exit(f"fake server not reachable at {args.base_url}: {e}")
+
+    model = llm_select_model(0)
+    prompts = [args.prompt if args.cache else f"{args.prompt} #{i}" for i in range(args.requests)]
+
+    def one(prompt):
+        t0 = time.perf_counter()
+        if args.mode == "invoke":
+            llm_invoke(model, prompt)
+        else:
+            llm_safe_json(prompt)
+        return (time.perf_counter() - t0) * 1000.0
+
+    before = METRICS.snapshot()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(one, prompts))
+    elapsed = time.perf_counter() - t0
+    after = METRICS.snapshot()
+    server = httpx.get(f"{args.base_url}/stats", timeout=5).json()
+    close_http_clients()
+
+    delta = {k: after[k] - before[k] for k in ("llm_calls", "llm_errors", "llm_fallbacks", "llm_retries", "llm_cache_hits")}
+    conns = server.get("connections") or 0
+    report = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed else None,
+        "latency_ms": {"p50": _pct(latencies, 0.50), "p95": _pct(latencies, 0.95), "p99": _pct(latencies, 0.99),
+                       "max": round(max(latencies), 2) if latencies else None},
+        "metrics": delta,
+        "server": {k: server.get(k, 0) for k in ("requests", "status_200", "status_429", "status_500")},
+        "connections": conns,
+        "requests_per_connection": round(server.get("requests", 0) / conns, 2) if conns else None,
+        "models": METRICS_LLM.snapshot(),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Build the memory-mapped flight inventory read by FLIGHT_INVENTORY_DIR.
+Run:
+    PYTHONPATH=src python scripts/build_flight_inventory.py fares.csv --out data/flights
+    PYTHONPATH=src python scripts/build_flight_inventory.py --synthetic 2000000 --out data/flights
+
+CSV columns: origin,destination,depart_time,arrive_time,airline,flight_number,price,stops[,cabin_class]
+(times in ISO format). CSV parsing happens here, once; the service only mmaps the result.
+"""
+from __future__ import annotations
+import argparse, csv, random, sys, time
+from datetime import date, datetime, timedelta
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            yield {
+                "origin": r["origin"], "destination": r["destination"],
+                "depart_time": datetime.fromisoformat(r["depart_time"]), "arrive_time": datetime.fromisoformat(r["arrive_time"]),
+                "airline": r["airline"], "flight_number": r["flight_number"], "price": float(r["price"]),
+                "stops": int(r.get("stops") or 0), "cabin_class": r.get("cabin_class") or "Economy",
+            }
+
+
+def _synthetic_rows(n, seed, start: date, days: int):
+    rnd = random.Random(seed)
+    cities = ["上海", "北京", "广州", "深圳", "杭州", "成都", "西安", "厦门", "昆明", "青岛", "重庆", "南京"]
+    airlines = ["MockAir", "EastJet", "SkyLink", "RedCrane"]
+    for i in range(n):
+        o, d = rnd.sample(cities, 2)
+        dep = datetime.combine(start + timedelta(days=rnd.randrange(days)), datetime.min.time()) + timedelta(minutes=rnd.randrange(6 * 60, 23 * 60, 5))
+        stops = rnd.choices((0, 1, 2), (0.6, 0.3, 0.1))[0]
+        dur = rnd.randint(90, 240) + stops * rnd.randint(60, 180)
+        yield {"origin": o, "destination": d, "depart_time": dep, "arrive_time": dep + timedelta(minutes=dur),
+               "airline": rnd.choice(airlines), "flight_number": f"{rnd.choice('MESR')}{rnd.randrange(100, 9999)}",
+               "price": round(rnd.uniform(300, 3000) * (1 - 0.15 * stops), 0), "stops": stops}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("csv", nargs="?")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--currency", default="CNY")
+    ap.add_argument("--synthetic", type=int, default=0, help="generate N random fares instead of reading a CSV")
+    ap.add_argument("--start", default=date.today().isoformat(), help="first depart date for --synthetic")
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    if not args.csv and not args.synthetic:
+        sys.exit("give a CSV file or --synthetic N")
+    from travel_agent.flight_inventory import build_flight_inventory
+    t0 = time.perf_counter()
+    rows = list(_synthetic_rows(args.synthetic, args.seed, date.fromisoformat(args.start), args.days) if args.synthetic else _csv_rows(args.csv))
+    n = build_flight_inventory(args.out, rows, currency=args.currency)
+    print(f"wrote {n} rows to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Build the grid-indexed hotel inventory read by HOTEL_INVENTORY_DIR.
+Run:
+    PYTHONPATH=src python scripts/build_hotel_inventory.py hotels.csv --out data/hotels
+    PYTHONPATH=src python scripts/build_hotel_inventory.py --synthetic 200000 --out data/hotels
+
+CSV columns: destination,name,lat,lon,price,rating[,address]. City centers default to
+the mean hotel coordinate; pass --centers centers.json ({"杭州": [30.25, 120.16], ...}) to pin them.
+"""
+from __future__ import annotations
+import argparse, csv, json, math, random, sys, time
+
+# synthetic cities: name -> center (lat, lon)
+_CITIES = {"上海": (31.2304, 121.4737), "北京": (39.9042, 116.4074), "杭州": (30.2741, 120.1551),
+           "成都": (30.5728, 104.0668), "厦门": (24.4798, 118.0894), "西安": (34.3416, 108.9398)}
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            yield {"destination": r["destination"], "name": r["name"], "lat": float(r["lat"]), "lon": float(r["lon"]),
+                   "price": float(r["price"]), "rating": float(r["rating"]), "address": r.get("address") or None}
+
+
+def _synthetic_rows(n, seed):
+    rnd = random.Random(seed)
+    cities = list(_CITIES.items())
+    for i in range(n):
+        city, (lat, lon) = rnd.choice(cities)
+        km = rnd.expovariate(1 / 4.0)  # denser near the center
+        bearing = rnd.uniform(0, 6.283185)
+        yield {"destination": city, "name": f"{city}酒店{i}", "address": f"{city}{rnd.randint(1, 30)}区",
+               "lat": lat + km * 0.009 * math.cos(bearing), "lon": lon + km * 0.011 * math.sin(bearing),
+               "price": round(rnd.uniform(150, 1500), 0), "rating": round(rnd.uniform(3.0, 5.0), 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("csv", nargs="?")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--currency", default="CNY")
+    ap.add_argument("--centers", help="JSON file mapping destination to [lat, lon]")
+    ap.add_argument("--cell-km", type=float, default=None)
+    ap.add_argument("--synthetic", type=int, default=0, help="generate N random hotels instead of reading a CSV")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    if not args.csv and not args.synthetic:
+        sys.exit("give a CSV file or --synthetic N")
+    from travel_agent.hotel_inventory import build_hotel_inventory
+    from travel_agent.config import HOTEL_GRID_CELL_KM
+    centers = None
+    if args.centers:
+        with open(args.centers, encoding="utf-8") as f:
+            centers = {k: tuple(v) for k, v in json.load(f).items()}
+    elif args.synthetic:
+        centers = _CITIES
+    t0 = time.perf_counter()
+    rows = list(_synthetic_rows(args.synthetic, args.seed) if args.synthetic else _csv_rows(args.csv))
+    n = build_hotel_inventory(args.out, rows, centers, cell_km=args.cell_km or HOTEL_GRID_CELL_KM, currency=args.currency)
+    print(f"wrote {n} rows to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Local OpenAI-compatible stand-in for offline LLM load tests.
+Run:
+    python scripts/fake_llm_server.py --port 8099 --latency-ms 400 --jitter 0.5 --error-rate 0.02 --rate-429 0.05
+Point the app at it with LLM_BASE_URL=http://127.0.0.1:8099 and any OPENAI_API_KEY.
+
+- latency: log-normal around --latency-ms (sigma = --jitter), optional --slow-rate tail
+- faults: --error-rate returns 500, --rate-429 returns 429 with Retry-After
+- "stream": true answers as SSE deltas
+- GET /stats: request / status counters and distinct TCP connections seen
+"""
+from __future__ import annotations
+import argparse, asyncio, json, random
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="fake-llm")
+CFG = {"latency_ms": 300.0, "jitter": 0.4, "slow_rate": 0.0, "slow_ms": 5000.0,
+       "error_rate": 0.0, "rate_429": 0.0, "retry_after": 0.2, "chunk": 16}
+STATS: Counter = Counter()
+CONNECTIONS: set = set()
+
+
+def _latency_s() -> float:
+    if random.random() < CFG["slow_rate"]:
+        return CFG["slow_ms"] / 1000.0
+    return random.lognormvariate(0.0, CFG["jitter"]) * CFG["latency_ms"] / 1000.0 if CFG["jitter"] else CFG["latency_ms"] / 1000.0
+
+
+def _content(prompt: str) -> str:
+    if "GENERATE_ITINERARY_BATCH" in prompt:
+        try:
+            briefs = json.loads(prompt.splitlines()[-1])
+        except json.JSONDecodeError:
+            briefs = []
+        return json.dumps({"results": [
+            {"id": b.get("id"), "days": [{"day_index": 1, "main_spots": b.get("spots", [])[:3], "meals": ["早餐", "午餐", "晚餐"]}],
+             "summary": f"{b.get('destination')} (fake)"} for b in briefs]}, ensure_ascii=False)
+    if "GENERATE_ITINERARY" in prompt:
+        return json.dumps({"days": [
+            {"day_index": i, "main_spots": ["景点A", "景点B"], "meals": ["早餐", "午餐", "晚餐"], "notes": "fake"} for i in (1, 2)
+        ], "summary": "fake itinerary"}, ensure_ascii=False)
+    return json.dumps({"echo_len": len(prompt), "fake": True})
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    if request.client:
+        CONNECTIONS.add((request.client.host, request.client.port))
+    body = await request.json()
+    STATS["requests"] += 1
+    roll = random.random()
+    if roll < CFG["rate_429"]:
+        STATS["status_429"] += 1
+        return JSONResponse({"error": {"message": "rate limited"}}, status_code=429,
+                            headers={"Retry-After": str(CFG["retry_after"])})
+    await asyncio.sleep(_latency_s())
+    if roll < CFG["rate_429"] + CFG["error_rate"]:
+        STATS["status_500"] += 1
+        return JSONResponse({"error": {"message": "injected failure"}}, status_code=500)
+    prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+    content = _content(prompt)
+    STATS["status_200"] += 1
+    if body.get("stream"):
+        STATS["streams"] += 1
+
+        async def events():
+            n = CFG["chunk"]
+            for i in range(0, len(content), n):
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': content[i:i + n]}}]}, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(0)
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+    return {"id": "fake", "object": "chat.completion", "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]}
+
+
+@app.get("/stats")
+async def stats():
+    return {**STATS, "connections": len(CONNECTIONS), "config": CFG}
+
+
+@app.post("/stats/reset")
+async def stats_reset():
+    STATS.clear()
+    CONNECTIONS.clear()
+    return {"ok": True}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency-ms", type=float, default=CFG["latency_ms"])
+    ap.add_argument("--jitter", type=float, default=CFG["jitter"], help="log-normal sigma (0 = fixed latency)")
+    ap.add_argument("--slow-rate", type=float, default=CFG["slow_rate"])
+    ap.add_argument("--slow-ms", type=float, default=CFG["slow_ms"])
+    ap.add_argument("--error-rate", type=float, default=CFG["error_rate"])
+    ap.add_argument("--rate-429", type=float, default=CFG["rate_429"])
+    ap.add_argument("--retry-after", type=float, default=CFG["retry_after"])
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+    for k in ("latency_ms", "jitter", "slow_rate", "slow_ms", "error_rate", "rate_429", "retry_after"):
+        CFG[k] = getattr(args, k)
+    if args.seed is not None:
+        random.seed(args.seed)
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
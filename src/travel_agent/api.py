@@ -2,12 +2,13 @@
 Ref: §6 REST API 接口详细规格
 """
 from __future__ import annotations
-from fastapi import FastAPI, Depends, HTTPException, Response, Request
+from fastapi import FastAPI, Depends, HTTPException, Response, Request, Header, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from typing import Optional
-from .models import ApiResponse, PlanningResult, ErrorInfo
-from .workflow import workflow_run, continue_workflow, orchestrate_parallel
+from .models import ApiResponse, PlanningResult, ErrorInfo, JobResponse, PlanBatchItem, PlanBatchResponse, HotelSearchResponse
+from .workflow import workflow_run, continue_workflow, orchestrate_parallel, continue_workflow_shared, orchestrate_parallel_shared, stream_workflow, plan_batch, record_plan
 from .graph_workflow import run_graph
 from .intent import intent_parse, intent_generate_questions, intent_apply_answers, intent_find_gaps
 from .logger import log_info, log_error, new_trace_id
@@ -15,7 +16,7 @@ import time
 from .models import TripIntent
 from .config import REDIS_URL
 from . import config as cfg
-import jwt, datetime
+import jwt, datetime, json
 from .session_store import create_session_store
 from .errors import DomainError
 from .metrics import METRICS
@@ -24,8 +25,45 @@ from .error_tracker import ERROR_TRACKER
 from .prompt_audit import PROMPT_AUDIT
 from .cache_util import cache_get, cache_put
 from .rate_limit import rate_limit_allow
+from .llm_adapter import aclose_http_clients
+from .deadline import DEADLINE_HEADER, deadline_scope
+from .prefetch import PREFETCH
+from .replan import replan
+from .ranking import shutdown_rank_pool
+from .hotel import hotel_search
+from .jobs import JOBS, InMemoryJobQueue, wait_job
+from .worker import JobWorkerPool
+from contextlib import asynccontextmanager
+from threading import Lock
 
-app = FastAPI(title="Travel Agent MVP")
+# in-process job workers, started on the first submitted job (0 = external `python -m travel_agent.worker`)
+_JOB_WORKERS: Optional[JobWorkerPool] = None
+_JOB_WORKERS_LOCK = Lock()
+
+def _ensure_job_workers() -> None:
+    global _JOB_WORKERS
+    if _JOB_WORKERS is None and cfg.JOBS_INPROCESS_WORKERS > 0:
+        with _JOB_WORKERS_LOCK:  # concurrent first submits must not each start a pool
+            if _JOB_WORKERS is None:
+                _JOB_WORKERS = JobWorkerPool(JOBS, cfg.JOBS_INPROCESS_WORKERS).start()
+
+def _check_job_setup() -> None:
+    # in-memory jobs are only visible to this process: without local workers nothing would run them
+    if isinstance(JOBS, InMemoryJobQueue) and cfg.JOBS_INPROCESS_WORKERS <= 0:
+        raise RuntimeError("JOBS_INPROCESS_WORKERS=0 requires JOBS_BACKEND=redis with a reachable REDIS_URL "
+                           "(external workers cannot see the in-memory job queue)")
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    _check_job_setup()
+    yield
+    if _JOB_WORKERS is not None:
+        _JOB_WORKERS.stop(timeout=0)
+    shutdown_rank_pool()
+    # release pooled LLM connections on shutdown
+    await aclose_http_clients()
+
+app = FastAPI(title="Travel Agent MVP", lifespan=_lifespan)
 
 # Adaptive session store (Redis if available, else in-memory)
 _STORE = create_session_store(REDIS_URL)
@@ -34,6 +72,14 @@ class PlanRequest(BaseModel):
     session_id: str
     text: str
 
+class PlanBatchRequest(BaseModel):
+    items: list[PlanRequest]
+    stream: Optional[bool] = None  # default: stream when len(items) > PLAN_BATCH_STREAM_THRESHOLD
+
+class ReplanRequest(BaseModel):
+    session_id: str
+    changes: dict  # field -> new value, e.g. {"budget_total": 6000}
+
 class ClarifyAnswer(BaseModel):
     question_id: str
     field: str
@@ -79,7 +125,7 @@ def require_auth(request: Request):
     return True
 
 @app.post("/api/mvp/plan", response_model=ApiResponse)
-def post_plan(req: PlanRequest, _: bool = Depends(require_auth)):
+def post_plan(req: PlanRequest, _: bool = Depends(require_auth), deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER)):
     trace_id = new_trace_id()
     start_ts = time.time()
     log_info("api", "plan_request", session_id=req.session_id, trace_id=trace_id)
@@ -105,7 +151,7 @@ def post_plan(req: PlanRequest, _: bool = Depends(require_auth)):
         if cached:
             METRICS.cache_hit()
             log_info("cache", "hit", session_id=req.session_id, trace_id=trace_id)
-            return ApiResponse(success=True, data=cached)
+            return ApiResponse(success=True, data=record_plan(cached, req.session_id))
         else:
             METRICS.cache_miss()
     if gaps:
@@ -118,20 +164,21 @@ def post_plan(req: PlanRequest, _: bool = Depends(require_auth)):
             "round": 1,
             "max_rounds": 2,
         })
+        PREFETCH.start(intent, req.session_id)
         log_info("clarify", "questions", session_id=req.session_id, trace_id=trace_id, extra={"count": len(questions)})
         return ApiResponse(success=False, mode="clarify", questions=questions, round=1, max_rounds=2)
     # no gaps → run downstream
     try:
-        result = continue_workflow(intent, req.session_id)
+        with deadline_scope(deadline_ms):
+            result = continue_workflow_shared(intent, req.session_id)
         log_info("workflow", "completed", session_id=req.session_id, trace_id=trace_id, extra={"latency_ms": int((time.time()-start_ts)*1000)})
-        cache_put(intent, result)
         return ApiResponse(success=True, data=result)
     except DomainError as de:
         log_error("workflow", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
         return ApiResponse(success=False, error=ErrorInfo(code=de.code, message=de.message, detail=de.detail))
 
 @app.post("/api/mvp/plan_v2", response_model=ApiResponse)
-async def post_plan_v2(req: PlanRequest, _: bool = Depends(require_auth)):
+async def post_plan_v2(req: PlanRequest, _: bool = Depends(require_auth), deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER)):
     """Parallel variant using orchestrate_parallel (flights+hotels)."""
     trace_id = new_trace_id()
     start_ts = time.time()
@@ -157,19 +204,116 @@ async def post_plan_v2(req: PlanRequest, _: bool = Depends(require_auth)):
         METRICS.inc_clarify_session()
         METRICS.add_clarify_questions(len(questions))
         _STORE.create(req.session_id, {"intent": intent, "gaps": gaps, "round": 1, "max_rounds": 2})
+        PREFETCH.start(intent, req.session_id)
         log_info("clarify", "questions", session_id=req.session_id, trace_id=trace_id, extra={"count": len(questions), "variant": "v2"})
         return ApiResponse(success=False, mode="clarify", questions=questions, round=1, max_rounds=2)
     try:
-        result = await orchestrate_parallel(intent, req.session_id)
+        with deadline_scope(deadline_ms):
+            result = await orchestrate_parallel_shared(intent, req.session_id)
         log_info("workflow", "completed_v2", session_id=req.session_id, trace_id=trace_id, extra={"latency_ms": int((time.time()-start_ts)*1000)})
-        cache_put(intent, result)
         return ApiResponse(success=True, data=result)
     except DomainError as de:
         log_error("workflow", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
         return ApiResponse(success=False, error=ErrorInfo(code=de.code, message=de.message, detail=de.detail))
 
+@app.post("/api/mvp/plan_stream")
+def post_plan_stream(req: PlanRequest, _: bool = Depends(require_auth)):
+    """Streaming variant (NDJSON): one `day` event per itinerary day as soon as the LLM
+    emits it, then a final `result` event. Clarify/errors before streaming use ApiResponse.
+    """
+    trace_id = new_trace_id()
+    log_info("api", "plan_stream_request", session_id=req.session_id, trace_id=trace_id)
+    METRICS.inc_plan()
+    if not rate_limit_allow(req.session_id):
+        log_error("rate_limit", "exceeded", session_id=req.session_id, code="RATE_LIMIT_EXCEEDED", trace_id=trace_id)
+        return ApiResponse(success=False, error=ErrorInfo(code="RATE_LIMIT_EXCEEDED", message="Too many requests"))
+    try:
+        intent = intent_parse(req.text, req.session_id)
+    except DomainError as de:
+        log_error("intent_parse", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
+        return ApiResponse(success=False, error=ErrorInfo(code=de.code, message=de.message))
+    gaps = intent_find_gaps(intent)
+    if gaps:
+        questions = intent_generate_questions(gaps)
+        METRICS.inc_clarify_session()
+        METRICS.add_clarify_questions(len(questions))
+        _STORE.create(req.session_id, {"intent": intent, "gaps": gaps, "round": 1, "max_rounds": 2})
+        PREFETCH.start(intent, req.session_id)
+        return ApiResponse(success=False, mode="clarify", questions=questions, round=1, max_rounds=2)
+
+    def events():
+        try:
+            for event, payload in stream_workflow(intent, req.session_id):
+                if event == "result":
+                    cache_put(intent, payload)
+                    payload = record_plan(payload, req.session_id)
+                yield json.dumps({"event": event, "data": json.loads(payload.model_dump_json())}, ensure_ascii=False) + "\n"
+        except DomainError as de:
+            log_error("workflow", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
+            yield json.dumps({"event": "error", "error": {"code": de.code, "message": de.message, "detail": de.detail}}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/mvp/plan_batch", response_model=PlanBatchResponse)
+def post_plan_batch(req: PlanBatchRequest, _: bool = Depends(require_auth)):
+    """Bulk variant of /plan. Identical intents are planned once (grouped by intent_hash),
+    cached ones are served from the result cache; items needing clarification get their
+    questions and a clarify session as in /plan. Each item counts against its session's
+    rate limit like a /plan call. Large batches stream one NDJSON line per
+    item as it completes, then a `summary` line.
+    """
+    trace_id = new_trace_id()
+    if len(req.items) > cfg.PLAN_BATCH_MAX_ITEMS:
+        return PlanBatchResponse(success=False, error=ErrorInfo(code="BATCH_TOO_LARGE", message=f"At most {cfg.PLAN_BATCH_MAX_ITEMS} items per batch"))
+    log_info("api", "plan_batch_request", trace_id=trace_id, extra={"items": len(req.items)})
+    early: list[PlanBatchItem] = []
+    ready: list[tuple[int, TripIntent]] = []
+    for i, item in enumerate(req.items):
+        METRICS.inc_plan()
+        if not rate_limit_allow(item.session_id):  # same per-session budget as /plan
+            log_error("rate_limit", "exceeded", session_id=item.session_id, code="RATE_LIMIT_EXCEEDED", trace_id=trace_id)
+            early.append(PlanBatchItem(index=i, session_id=item.session_id, success=False,
+                                       error=ErrorInfo(code="RATE_LIMIT_EXCEEDED", message="Too many requests")))
+            continue
+        try:
+            intent = intent_parse(item.text, item.session_id)
+        except DomainError as de:
+            early.append(PlanBatchItem(index=i, session_id=item.session_id, success=False, error=ErrorInfo(code=de.code, message=de.message)))
+            continue
+        gaps = intent_find_gaps(intent)
+        if gaps:
+            questions = intent_generate_questions(gaps)
+            METRICS.inc_clarify_session()
+            METRICS.add_clarify_questions(len(questions))
+            _STORE.create(item.session_id, {"intent": intent, "gaps": gaps, "round": 1, "max_rounds": 2})
+            early.append(PlanBatchItem(index=i, session_id=item.session_id, success=False, mode="clarify", questions=questions))
+            continue
+        ready.append((i, intent))
+    stats: dict = {}
+
+    def items():
+        yield from early
+        for j, outcome, cached in plan_batch([it for _, it in ready], stats=stats):
+            idx, intent = ready[j]
+            if isinstance(outcome, DomainError):
+                log_error("workflow", outcome.message, session_id=intent.session_id, code=outcome.code, trace_id=trace_id)
+                yield PlanBatchItem(index=idx, session_id=intent.session_id, success=False,
+                                    error=ErrorInfo(code=outcome.code, message=outcome.message, detail=outcome.detail))
+            else:
+                yield PlanBatchItem(index=idx, session_id=intent.session_id, success=True, data=outcome, cached=cached)
+
+    stream = req.stream if req.stream is not None else len(req.items) > cfg.PLAN_BATCH_STREAM_THRESHOLD
+    if stream:
+        def events():
+            for out in items():
+                yield json.dumps({"event": "item", "data": json.loads(out.model_dump_json())}, ensure_ascii=False) + "\n"
+            yield json.dumps({"event": "summary", "data": {"items": len(req.items), **stats}}, ensure_ascii=False) + "\n"
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+    results = sorted(items(), key=lambda r: r.index)
+    return PlanBatchResponse(success=True, items=results, unique=stats.get("unique", 0), cached=stats.get("cached", 0))
+
 @app.post("/api/mvp/plan/clarify", response_model=ApiResponse)
-def post_clarify(req: ClarifyRequest, _: bool = Depends(require_auth)):
+def post_clarify(req: ClarifyRequest, _: bool = Depends(require_auth), deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER)):
     trace_id = new_trace_id()
     start_ts = time.time()
     sess = _STORE.get(req.session_id)
@@ -185,25 +329,103 @@ def post_clarify(req: ClarifyRequest, _: bool = Depends(require_auth)):
         sess["round"] += 1
         sess["gaps"] = gaps
         _STORE.update(req.session_id, **sess)
+        PREFETCH.start(intent, req.session_id)
         questions = intent_generate_questions(gaps)
         METRICS.inc_clarify_round()
         METRICS.add_clarify_questions(len(questions))
         log_info("clarify", "questions_round", session_id=req.session_id, trace_id=trace_id, extra={"round": sess["round"], "count": len(questions)})
         return ApiResponse(success=False, mode="clarify", questions=questions, round=sess["round"], max_rounds=sess["max_rounds"])
     if "destination" in gaps:
+        PREFETCH.cancel(req.session_id)
         log_error("clarify", "destination_missing", session_id=req.session_id, code="INTENT_DESTINATION_MISSING", trace_id=trace_id)
         return ApiResponse(success=False, error=ErrorInfo(code="INTENT_DESTINATION_MISSING", message="Destination missing"))
     # finalize
     try:
-        result = continue_workflow(intent, req.session_id)
+        with deadline_scope(deadline_ms):
+            result = continue_workflow_shared(intent, req.session_id, seed=PREFETCH.take(req.session_id, intent))
         log_info("workflow", "completed", session_id=req.session_id, trace_id=trace_id, extra={"latency_ms": int((time.time()-start_ts)*1000)})
         _STORE.remove(req.session_id)
-        cache_put(intent, result)
         return ApiResponse(success=True, data=result)
     except DomainError as de:
         log_error("workflow", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
         return ApiResponse(success=False, error=ErrorInfo(code=de.code, message=de.message, detail=de.detail))
 
+@app.post("/api/mvp/jobs", response_model=JobResponse)
+def post_job(req: PlanRequest, _: bool = Depends(require_auth)):
+    """Queue the plan and return a job id right away; poll GET /api/mvp/jobs/{job_id}.
+    Intents with gaps are not queued: the clarify questions come back as in /plan.
+    """
+    trace_id = new_trace_id()
+    log_info("api", "job_request", session_id=req.session_id, trace_id=trace_id)
+    METRICS.inc_plan()
+    if not rate_limit_allow(req.session_id):
+        log_error("rate_limit", "exceeded", session_id=req.session_id, code="RATE_LIMIT_EXCEEDED", trace_id=trace_id)
+        return JobResponse(success=False, error=ErrorInfo(code="RATE_LIMIT_EXCEEDED", message="Too many requests"))
+    try:
+        intent = intent_parse(req.text, req.session_id)
+    except DomainError as de:
+        log_error("intent_parse", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
+        return JobResponse(success=False, error=ErrorInfo(code=de.code, message=de.message))
+    gaps = intent_find_gaps(intent)
+    if gaps:
+        questions = intent_generate_questions(gaps)
+        METRICS.inc_clarify_session()
+        METRICS.add_clarify_questions(len(questions))
+        _STORE.create(req.session_id, {"intent": intent, "gaps": gaps, "round": 1, "max_rounds": 2})
+        PREFETCH.start(intent, req.session_id)
+        return JobResponse(success=False, mode="clarify", questions=questions, round=1, max_rounds=2)
+    _ensure_job_workers()
+    info = JOBS.submit(intent, req.session_id)
+    METRICS.job("queued")
+    log_info("job", "queued", session_id=req.session_id, trace_id=trace_id, extra={"job_id": info.job_id})
+    return JobResponse(success=True, data=info)
+
+@app.get("/api/mvp/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0.0):
+    """Job state; `wait` (seconds, capped by JOBS_WAIT_MAX_SECONDS) long-polls until done/failed.
+    Async so long-pollers wait on the event loop, not in the threadpool serving sync endpoints."""
+    timeout = min(max(wait, 0.0), cfg.JOBS_WAIT_MAX_SECONDS)
+    info = await wait_job(JOBS, job_id, timeout)
+    if info is None:
+        return JobResponse(success=False, error=ErrorInfo(code="JOB_NOT_FOUND", message="Job missing or expired"))
+    return JobResponse(success=info.status != "failed", data=info, error=info.error)
+
+@app.post("/api/mvp/replan", response_model=ApiResponse)
+def post_replan(req: ReplanRequest, _: bool = Depends(require_auth), deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER)):
+    """Change fields of the session's last plan; only stages reading them are recomputed
+    (`stage_timings_ms` lists what ran)."""
+    trace_id = new_trace_id()
+    start_ts = time.time()
+    log_info("api", "replan_request", session_id=req.session_id, trace_id=trace_id, extra={"fields": sorted(req.changes)})
+    if not rate_limit_allow(req.session_id):
+        log_error("rate_limit", "exceeded", session_id=req.session_id, code="RATE_LIMIT_EXCEEDED", trace_id=trace_id)
+        return ApiResponse(success=False, error=ErrorInfo(code="RATE_LIMIT_EXCEEDED", message="Too many requests"))
+    try:
+        with deadline_scope(deadline_ms):
+            result, changed, recomputed = replan(req.session_id, req.changes)
+        log_info("workflow", "completed_replan", session_id=req.session_id, trace_id=trace_id, extra={
+            "changed": changed, "recomputed": recomputed, "latency_ms": int((time.time()-start_ts)*1000)})
+        return ApiResponse(success=True, data=result)
+    except DomainError as de:
+        log_error("replan", de.message, session_id=req.session_id, code=de.code, trace_id=trace_id)
+        return ApiResponse(success=False, error=ErrorInfo(code=de.code, message=de.message, detail=de.detail))
+
+@app.get("/api/mvp/hotels", response_model=HotelSearchResponse)
+def get_hotels(destination: str = Query(..., min_length=1), nights: int = Query(1, ge=1, le=30),
+               lat: Optional[float] = Query(None, ge=-90, le=90), lon: Optional[float] = Query(None, ge=-180, le=180),
+               radius_km: Optional[float] = Query(None, gt=0, le=100), price_min: Optional[float] = Query(None, ge=0),
+               price_max: Optional[float] = Query(None, ge=0), min_rating: Optional[float] = Query(None, ge=0, le=5),
+               limit: int = Query(10, ge=1, le=100), _: bool = Depends(require_auth)):
+    """Hotel lookup by location: within radius_km of (lat, lon) or of the city center, price range, min rating."""
+    intent = TripIntent(session_id="hotel_query", raw_text="", destination=destination, days=nights + 1, nights=nights)
+    near = (lat, lon) if lat is not None and lon is not None else None
+    try:
+        hotels = hotel_search(intent, nights, limit, near=near, radius_km=radius_km,
+                              price_min=price_min, price_max=price_max, min_rating=min_rating)
+    except DomainError as de:
+        return HotelSearchResponse(success=False, error=ErrorInfo(code=de.code, message=de.message, detail=de.detail))
+    return HotelSearchResponse(success=True, data=hotels)
+
 @app.get("/api/mvp/plan/{session_id}", response_model=ApiResponse)
 def get_plan(session_id: str):
     sess = _STORE.get(session_id)
@@ -221,8 +443,10 @@ def health():
 @app.get("/metrics")
 def metrics():
     base = METRICS.snapshot()
-    from .metrics import METRICS_PARALLEL, METRICS_GRAPH
+    from .metrics import METRICS_PARALLEL, METRICS_GRAPH, METRICS_LLM, METRICS_STAGE_CACHE
     base.update({"parallel_runs": METRICS_PARALLEL.snapshot()["parallel_runs"], "graph_runs": METRICS_GRAPH.snapshot()["graph_runs"]})
+    base["llm_models"] = METRICS_LLM.snapshot()
+    base["stage_caches"] = METRICS_STAGE_CACHE.snapshot()
     return base
 
 @app.get("/api/mvp/prom_metrics")
@@ -243,6 +467,13 @@ def llm_audit(limit: int = 50, since_seconds: int | None = None):
     # backward compatibility: both keys
     return {"audit": data, "records": data}
 
+@app.get("/api/mvp/llm_health")
+def llm_health():
+    """Per-model circuit breaker state and health score for the fallback chain."""
+    from .llm_manager import llm_model_chain
+    from .circuit_breaker import LLM_BREAKERS
+    return {"enabled": cfg.LLM_CB_ENABLE, "models": LLM_BREAKERS.snapshot(llm_model_chain())}
+
 @app.get("/routes")
 def list_routes():
     routes = []
@@ -273,7 +504,7 @@ def debug_intent(req: DebugIntentRequest, _: bool = Depends(require_auth)):
     return {"intent": intent.model_dump(), "gaps": gaps}
 
 @app.post("/api/mvp/plan_v3", response_model=ApiResponse)
-def post_plan_v3(req: PlanRequest, _: bool = Depends(require_auth)):
+def post_plan_v3(req: PlanRequest, _: bool = Depends(require_auth), deadline_ms: Optional[int] = Header(default=None, alias=DEADLINE_HEADER)):
     """LangGraph graph orchestration variant. Falls back to parallel if graph unavailable."""
     trace_id = new_trace_id()
     start_ts = time.time()
@@ -293,15 +524,18 @@ def post_plan_v3(req: PlanRequest, _: bool = Depends(require_auth)):
         METRICS.inc_clarify_session()
         METRICS.add_clarify_questions(len(questions))
         _STORE.create(req.session_id, {"intent": intent, "gaps": gaps, "round": 1, "max_rounds": 2})
+        PREFETCH.start(intent, req.session_id)
         return ApiResponse(success=False, mode="clarify", questions=questions, round=1, max_rounds=2)
-    try:
-        from .metrics import METRICS_GRAPH
-        result = run_graph(intent)
-        METRICS_GRAPH.inc()
-        log_info("workflow", "completed_v3_graph", session_id=req.session_id, trace_id=trace_id, extra={"latency_ms": int((time.time()-start_ts)*1000)})
-    except Exception:
-        # fallback to parallel orchestrator
-        log_error("workflow", "graph_unavailable_fallback", session_id=req.session_id, code="GRAPH_FALLBACK", trace_id=trace_id)
-        result = continue_workflow(intent, req.session_id)
+    with deadline_scope(deadline_ms):
+        try:
+            from .metrics import METRICS_GRAPH
+            result = run_graph(intent)
+            METRICS_GRAPH.inc()
+            log_info("workflow", "completed_v3_graph", session_id=req.session_id, trace_id=trace_id, extra={"latency_ms": int((time.time()-start_ts)*1000)})
+        except Exception:
+            # fallback to parallel orchestrator (resumes from the graph's checkpoints)
+            log_error("workflow", "graph_unavailable_fallback", session_id=req.session_id, code="GRAPH_FALLBACK", trace_id=trace_id)
+            result = continue_workflow_shared(intent, req.session_id)
+            return ApiResponse(success=True, data=result)
     cache_put(intent, result)
-    return ApiResponse(success=True, data=result)
+    return ApiResponse(success=True, data=record_plan(result, req.session_id))
@@ -22,6 +22,7 @@ def intent_canonical(intent: TripIntent) -> dict:
         "days": intent.days,
         "origin": intent.origin,
         "travelers": intent.travelers,
+        "budget_total": intent.budget_total,
         "preferences": sorted(intent.preferences),
         "currency": intent.currency,
     }
@@ -42,6 +43,8 @@ def cache_get(intent: TripIntent) -> Optional[PlanningResult]:
         return None
 
 def cache_put(intent: TripIntent, result: PlanningResult) -> None:
+    if any(w.startswith("DEADLINE_") for w in result.warnings):
+        return  # deadline-degraded plans are served once, never cached
     key = intent_hash(intent)
     _CACHE_STORE.create(f"cache:{key}", {"result": json.loads(result.model_dump_json())})
 
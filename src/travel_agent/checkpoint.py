@@ -0,0 +1,184 @@
+"""Per-stage workflow checkpoints.
+Ref: §4 工作流编排 + §7 会话与缓存策略
+
+Every completed stage output is stored under the session with a fingerprint
+of the intent fields it read (Stage.intent_fields) plus its dependencies'
+fingerprints. A later run for the same session (retry, graph -> workflow
+fallback, clarify answer) seeds the scheduler with every stage whose
+fingerprint still matches, so only stages touched by the change re-run.
+
+- InMemoryCheckpointStore: per-session TTL, bounded to max_sessions (LRU by write)
+- RedisCheckpointStore: optional, one hash per session (field = stage), EXPIRE TTL
+"""
+from __future__ import annotations
+import hashlib, json, time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from .config import CHECKPOINT_ENABLE, CHECKPOINT_BACKEND, CHECKPOINT_TTL_SECONDS, REDIS_URL
+from .models import TripIntent, FlightOption, HotelOption, Itinerary, BudgetAllocation, PlanningResult
+from .stage_graph import PLAN_STAGES, Stage
+from .cache_util import intent_hash
+from .logger import log_info
+from .metrics import METRICS
+
+try:  # optional dependency
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover
+    redis = None  # type: ignore
+
+# (de)serialisation of stage outputs; stages without an entry are not checkpointed
+STAGE_TYPES: Dict[str, TypeAdapter] = {
+    "flights": TypeAdapter(List[FlightOption]),
+    "hotels": TypeAdapter(List[HotelOption]),
+    "spots": TypeAdapter(List[str]),
+    "itinerary": TypeAdapter(Itinerary),
+    "budget": TypeAdapter(BudgetAllocation),
+}
+
+
+def stage_fingerprints(intent: TripIntent, stages: Tuple[Stage, ...] = PLAN_STAGES) -> Dict[str, str]:
+    """Fingerprint per stage = hash(intent fields it reads + dependency fingerprints)."""
+    fps: Dict[str, str] = {}
+    pending = list(stages)
+    while pending:
+        st = next(s for s in pending if all(d in fps for d in s.deps))
+        pending.remove(st)
+        fields = {f: getattr(intent, f) for f in st.intent_fields}
+        if isinstance(fields.get("preferences"), list):
+            fields["preferences"] = sorted(fields["preferences"])
+        s = json.dumps({"stage": st.name, "fields": fields, "deps": [fps[d] for d in st.deps]},
+                       sort_keys=True, ensure_ascii=False, default=str)
+        fps[st.name] = hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
+    return fps
+
+
+class InMemoryCheckpointStore:
+    def __init__(self, ttl_seconds: int = 1800, max_sessions: int = 10000):
+        self._lock = Lock()
+        self._ttl = ttl_seconds
+        self._max = max_sessions
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Dict]]]" = OrderedDict()
+
+    def load(self, session_id: str) -> Dict[str, Dict]:
+        with self._lock:
+            item = self._data.get(session_id)
+            if item is None:
+                return {}
+            if item[0] <= time.monotonic():
+                del self._data[session_id]
+                return {}
+            return dict(item[1])
+
+    def save(self, session_id: str, stage: str, entry: Dict) -> None:
+        with self._lock:
+            _, entries = self._data.get(session_id, (0.0, {}))
+            entries = {**entries, stage: entry}
+            self._data[session_id] = (time.monotonic() + self._ttl, entries)
+            self._data.move_to_end(session_id)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)  # least recently written session
+
+    def clear(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._data.clear()
+            else:
+                self._data.pop(session_id, None)
+
+
+class RedisCheckpointStore:
+    def __init__(self, url: str, ttl_seconds: int = 1800, prefix: str = "ckpt:"):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("redis library not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+
+    def load(self, session_id: str) -> Dict[str, Dict]:
+        raw = self.client.hgetall(f"{self.prefix}{session_id}")
+        return {stage: json.loads(v) for stage, v in raw.items()}
+
+    def save(self, session_id: str, stage: str, entry: Dict) -> None:
+        key = f"{self.prefix}{session_id}"
+        pipe = self.client.pipeline()
+        pipe.hset(key, stage, json.dumps(entry, ensure_ascii=False))
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def clear(self, session_id: Optional[str] = None) -> None:  # pragma: no cover (live redis)
+        if session_id is not None:
+            self.client.delete(f"{self.prefix}{session_id}")
+        else:
+            for k in self.client.scan_iter(match=f"{self.prefix}*"):
+                self.client.delete(k)
+
+
+def create_checkpoint_store(backend: str = CHECKPOINT_BACKEND, redis_url: str | None = REDIS_URL):
+    if backend == "redis" and redis_url and redis is not None:
+        try:
+            store = RedisCheckpointStore(redis_url, CHECKPOINT_TTL_SECONDS)
+            store.client.ping()
+            return store
+        except Exception:  # pragma: no cover
+            return InMemoryCheckpointStore(CHECKPOINT_TTL_SECONDS)
+    return InMemoryCheckpointStore(CHECKPOINT_TTL_SECONDS)
+
+CHECKPOINTS = create_checkpoint_store()
+
+
+class PlanCheckpoint:
+    """Binds one workflow run to its session's checkpoints.
+    `seed()` feeds run_stages(seed=...), `save` is its on_done callback.
+    Fingerprints are taken up front, before stages mutate the intent.
+    """
+
+    def __init__(self, intent: TripIntent, session_id: str, store=None, stages: Tuple[Stage, ...] = PLAN_STAGES):
+        self.session_id = session_id
+        self.store = store or CHECKPOINTS
+        self.fingerprints = stage_fingerprints(intent, stages)
+        self.intent_hash = intent_hash(intent)
+
+    def seed(self) -> Dict[str, Any]:
+        if not CHECKPOINT_ENABLE:
+            return {}
+        seeded: Dict[str, Any] = {}
+        for stage, entry in self.store.load(self.session_id).items():
+            if stage not in STAGE_TYPES or entry.get("fp") != self.fingerprints.get(stage):
+                continue
+            seeded[stage] = STAGE_TYPES[stage].validate_python(entry["value"])
+            METRICS.checkpoint_reuse(stage)
+        if seeded:
+            log_info("checkpoint", "resumed", session_id=self.session_id, extra={"stages": sorted(seeded)})
+        return seeded
+
+    def save(self, stage: str, value: Any) -> None:
+        if not CHECKPOINT_ENABLE or stage not in STAGE_TYPES:
+            return
+        self.store.save(self.session_id, stage, {
+            "fp": self.fingerprints[stage],
+            "intent_hash": self.intent_hash,
+            "value": STAGE_TYPES[stage].dump_python(value, mode="json"),
+        })
+
+
+# last plan returned to a session (input of /replan); lives next to the stage checkpoints
+_PLAN_ENTRY = "__plan__"
+
+
+def save_plan(session_id: str, result: PlanningResult, store=None) -> None:
+    if not CHECKPOINT_ENABLE:
+        return
+    (store or CHECKPOINTS).save(session_id, _PLAN_ENTRY, {"value": json.loads(result.model_dump_json())})
+
+
+def load_plan(session_id: str, store=None) -> Optional[PlanningResult]:
+    entry = (store or CHECKPOINTS).load(session_id).get(_PLAN_ENTRY)
+    return PlanningResult.model_validate(entry["value"]) if entry else None
+
+
+__all__ = [
+    "CHECKPOINTS", "InMemoryCheckpointStore", "RedisCheckpointStore", "create_checkpoint_store",
+    "PlanCheckpoint", "STAGE_TYPES", "stage_fingerprints", "save_plan", "load_plan",
+]
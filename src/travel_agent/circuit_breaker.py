@@ -0,0 +1,166 @@
+"""Per-model circuit breaker with health scoring.
+Ref: §3.0 LLM选择与容错策略
+
+States:
+- closed: calls flow; the breaker opens when, over the sliding window
+  (>= min_calls), the error rate or slow-call rate crosses its threshold
+- open: model is skipped until open_seconds elapse
+- half_open: at most half_open_probes calls are let through as probes (the
+  rest are still rejected); the first success closes the breaker, the first
+  failure re-opens it. A probe that never reports back frees its slot after
+  open_seconds so a lost call cannot wedge the breaker half-open.
+
+available() only peeks (used to filter the model chain); acquire() claims the
+slot right before the provider call, and record() / release() hand it back.
+"""
+from __future__ import annotations
+import time
+from collections import deque
+from threading import Lock
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from .config import (
+    LLM_CB_WINDOW_SECONDS, LLM_CB_MIN_CALLS, LLM_CB_ERROR_RATE,
+    LLM_CB_SLOW_MS, LLM_CB_SLOW_RATE, LLM_CB_OPEN_SECONDS, LLM_CB_HALF_OPEN_PROBES,
+)
+from .logger import log_info
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, *, window_seconds: int = LLM_CB_WINDOW_SECONDS, min_calls: int = LLM_CB_MIN_CALLS,
+                 error_rate: float = LLM_CB_ERROR_RATE, slow_ms: int = LLM_CB_SLOW_MS, slow_rate: float = LLM_CB_SLOW_RATE,
+                 open_seconds: int = LLM_CB_OPEN_SECONDS, half_open_probes: int = LLM_CB_HALF_OPEN_PROBES, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._lock = Lock()
+        self._window = window_seconds
+        self._min_calls = min_calls
+        self._error_rate = error_rate
+        self._slow_ms = slow_ms
+        self._slow_rate = slow_rate
+        self._open_seconds = open_seconds
+        self._max_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._calls: Deque[Tuple[float, bool, float]] = deque()  # (ts, ok, latency_ms)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes: Deque[float] = deque()  # start times of in-flight half-open probes
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self._window:
+            self._calls.popleft()
+
+    def _rates(self) -> Tuple[int, float, float]:
+        n = len(self._calls)
+        if not n:
+            return 0, 0.0, 0.0
+        errors = sum(1 for _, ok, _ in self._calls if not ok)
+        slow = sum(1 for _, _, ms in self._calls if ms >= self._slow_ms)
+        return n, errors / n, slow / n
+
+    def _transition(self, state: str, now: float) -> None:
+        if state == self._state:
+            return
+        log_info("llm", "circuit_state", extra={"model": self.name, "from": self._state, "to": state})
+        self._state = state
+        self._probes.clear()
+        if state == OPEN:
+            self._opened_at = now
+        elif state == CLOSED:
+            self._calls.clear()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _admits(self, now: float) -> bool:
+        if self._state == OPEN and now - self._opened_at >= self._open_seconds:
+            self._transition(HALF_OPEN, now)
+        if self._state == HALF_OPEN:
+            while self._probes and now - self._probes[0] >= self._open_seconds:
+                self._probes.popleft()  # probe never reported back
+            return len(self._probes) < self._max_probes
+        return self._state == CLOSED
+
+    def available(self) -> bool:
+        """True when a call may be attempted (open breakers turn half-open after the cool-down); claims nothing."""
+        now = self._clock()
+        with self._lock:
+            return self._admits(now)
+
+    def acquire(self) -> bool:
+        """Admit one call; in half_open this takes a probe slot that record() or release() gives back."""
+        now = self._clock()
+        with self._lock:
+            if not self._admits(now):
+                return False
+            if self._state == HALF_OPEN:
+                self._probes.append(now)
+            return True
+
+    def release(self) -> None:
+        """Give back a probe slot without a verdict (the call ended for reasons unrelated to provider health)."""
+        with self._lock:
+            if self._probes:
+                self._probes.popleft()
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        now = self._clock()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(CLOSED if ok else OPEN, now)
+                return
+            self._calls.append((now, ok, latency_ms))
+            self._prune(now)
+            n, err_rate, slow_rate = self._rates()
+            if self._state == CLOSED and n >= self._min_calls and (err_rate >= self._error_rate or slow_rate >= self._slow_rate):
+                self._transition(OPEN, now)
+
+    def snapshot(self) -> Dict:
+        now = self._clock()
+        with self._lock:
+            self._prune(now)
+            n, err_rate, slow_rate = self._rates()
+            latencies = sorted(ms for _, ok, ms in self._calls if ok)
+            state = self._state
+            retry_in = max(self._open_seconds - (now - self._opened_at), 0.0) if state == OPEN else 0.0
+        health = 0.0 if state == OPEN else round((1 - err_rate) * (1 - 0.5 * slow_rate), 4)
+        return {
+            "state": state,
+            "health": health,
+            "window_calls": n,
+            "error_rate": round(err_rate, 4),
+            "slow_rate": round(slow_rate, 4),
+            "latency_p90_ms": round(latencies[min(int(0.9 * len(latencies)), len(latencies) - 1)], 2) if latencies else None,
+            "retry_in_seconds": round(retry_in, 2),
+        }
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            br = self._breakers.get(model)
+            if br is None:
+                br = CircuitBreaker(model)
+                self._breakers[model] = br
+            return br
+
+    def snapshot(self, models: Optional[List[str]] = None) -> Dict[str, Dict]:
+        names = models if models is not None else sorted(self._breakers)
+        return {m: self.get(m).snapshot() for m in names}
+
+    def reset(self):  # for tests
+        with self._lock:
+            self._breakers.clear()
+
+
+LLM_BREAKERS = BreakerRegistry()
+
+__all__ = ["CircuitBreaker", "BreakerRegistry", "LLM_BREAKERS", "CLOSED", "OPEN", "HALF_OPEN"]
@@ -66,3 +66,241 @@ __all__ += [
     "AUTH_DEMO_USER",
     "AUTH_DEMO_PASSWORD",
 ]
+
+# LLM HTTP connection pool (shared per LLM_BASE_URL)
+LLM_POOL_MAX_CONNECTIONS: int = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "50"))
+LLM_POOL_MAX_KEEPALIVE: int = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+LLM_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30"))
+
+__all__ += [
+    "LLM_POOL_MAX_CONNECTIONS",
+    "LLM_POOL_MAX_KEEPALIVE",
+    "LLM_POOL_KEEPALIVE_EXPIRY",
+]
+
+# LLM response cache (content-addressed by model + prompt + temperature)
+LLM_CACHE_ENABLE: bool = os.getenv("LLM_CACHE_ENABLE", "true").lower() == "true"
+LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "memory")  # memory | redis
+LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+__all__ += [
+    "LLM_CACHE_ENABLE",
+    "LLM_CACHE_BACKEND",
+    "LLM_CACHE_TTL_SECONDS",
+    "LLM_CACHE_MAX_ENTRIES",
+]
+
+# Hedged LLM requests: fire the next model if the primary is slower than its observed percentile
+LLM_HEDGE_ENABLE: bool = os.getenv("LLM_HEDGE_ENABLE", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_DEFAULT_DELAY_MS: int = int(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "3000"))
+LLM_HEDGE_MIN_DELAY_MS: int = int(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "300"))
+LLM_HEDGE_MAX_WORKERS: int = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "32"))
+
+__all__ += [
+    "LLM_HEDGE_ENABLE",
+    "LLM_HEDGE_PERCENTILE",
+    "LLM_HEDGE_MIN_SAMPLES",
+    "LLM_HEDGE_DEFAULT_DELAY_MS",
+    "LLM_HEDGE_MIN_DELAY_MS",
+    "LLM_HEDGE_MAX_WORKERS",
+]
+
+# Per-model circuit breaker (sliding window over recent LLM calls)
+LLM_CB_ENABLE: bool = os.getenv("LLM_CB_ENABLE", "true").lower() == "true"
+LLM_CB_WINDOW_SECONDS: int = int(os.getenv("LLM_CB_WINDOW_SECONDS", "60"))
+LLM_CB_MIN_CALLS: int = int(os.getenv("LLM_CB_MIN_CALLS", "5"))
+LLM_CB_ERROR_RATE: float = float(os.getenv("LLM_CB_ERROR_RATE", "0.5"))
+LLM_CB_SLOW_MS: int = int(os.getenv("LLM_CB_SLOW_MS", "20000"))
+LLM_CB_SLOW_RATE: float = float(os.getenv("LLM_CB_SLOW_RATE", "0.8"))
+LLM_CB_OPEN_SECONDS: int = int(os.getenv("LLM_CB_OPEN_SECONDS", "30"))
+LLM_CB_HALF_OPEN_PROBES: int = int(os.getenv("LLM_CB_HALF_OPEN_PROBES", "1"))  # concurrent probes once the cool-down ends
+
+__all__ += [
+    "LLM_CB_ENABLE",
+    "LLM_CB_WINDOW_SECONDS",
+    "LLM_CB_MIN_CALLS",
+    "LLM_CB_ERROR_RATE",
+    "LLM_CB_SLOW_MS",
+    "LLM_CB_SLOW_RATE",
+    "LLM_CB_OPEN_SECONDS",
+    "LLM_CB_HALF_OPEN_PROBES",
+]
+
+# Outbound LLM concurrency limit / shared rate limit / retry policy (per provider)
+LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_RATE_SHARED: bool = os.getenv("LLM_RATE_SHARED", "false").lower() == "true"
+LLM_RATE_LIMIT_RPS: float = float(os.getenv("LLM_RATE_LIMIT_RPS", "10"))
+LLM_RATE_LIMIT_BURST: int = int(os.getenv("LLM_RATE_LIMIT_BURST", "20"))
+LLM_RETRY_MAX: int = int(os.getenv("LLM_RETRY_MAX", "2"))
+LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_RETRY_STATUS: List[int] = [int(x) for x in os.getenv("LLM_RETRY_STATUS", "429,500,502,503,504").split(",") if x.strip()]
+
+__all__ += [
+    "LLM_MAX_CONCURRENCY",
+    "LLM_QUEUE_TIMEOUT_SECONDS",
+    "LLM_RATE_SHARED",
+    "LLM_RATE_LIMIT_RPS",
+    "LLM_RATE_LIMIT_BURST",
+    "LLM_RETRY_MAX",
+    "LLM_RETRY_BASE_DELAY",
+    "LLM_RETRY_MAX_DELAY",
+    "LLM_RETRY_STATUS",
+]
+
+# Micro-batching of itinerary generation (several intents per LLM request)
+LLM_BATCH_ENABLE: bool = os.getenv("LLM_BATCH_ENABLE", "false").lower() == "true"
+LLM_BATCH_WINDOW_MS: int = int(os.getenv("LLM_BATCH_WINDOW_MS", "20"))
+LLM_BATCH_MAX: int = int(os.getenv("LLM_BATCH_MAX", "8"))
+
+__all__ += [
+    "LLM_BATCH_ENABLE",
+    "LLM_BATCH_WINDOW_MS",
+    "LLM_BATCH_MAX",
+]
+
+# Itinerary prompt size budget (estimated tokens; spots then preferences are trimmed to fit)
+LLM_PROMPT_MAX_TOKENS: int = int(os.getenv("LLM_PROMPT_MAX_TOKENS", "1200"))
+
+__all__ += [
+    "LLM_PROMPT_MAX_TOKENS",
+]
+
+# Workflow stage scheduler (threads shared by sync plans)
+WORKFLOW_STAGE_WORKERS: int = int(os.getenv("WORKFLOW_STAGE_WORKERS", "32"))
+
+__all__ += [
+    "WORKFLOW_STAGE_WORKERS",
+]
+
+# Per-stage workflow checkpoints (resume / reuse on retry, fallback and clarify)
+CHECKPOINT_ENABLE: bool = os.getenv("CHECKPOINT_ENABLE", "true").lower() == "true"
+CHECKPOINT_BACKEND: str = os.getenv("CHECKPOINT_BACKEND", "memory")  # memory | redis
+CHECKPOINT_TTL_SECONDS: int = int(os.getenv("CHECKPOINT_TTL_SECONDS", "1800"))
+
+__all__ += [
+    "CHECKPOINT_ENABLE",
+    "CHECKPOINT_BACKEND",
+    "CHECKPOINT_TTL_SECONDS",
+]
+
+# Request deadline (ms; 0 = none). X-Request-Deadline-Ms overrides per request.
+REQUEST_DEADLINE_MS: int = int(os.getenv("REQUEST_DEADLINE_MS", "0"))
+DEADLINE_MARGIN_MS: int = int(os.getenv("DEADLINE_MARGIN_MS", "300"))
+
+__all__ += [
+    "REQUEST_DEADLINE_MS",
+    "DEADLINE_MARGIN_MS",
+]
+
+# Speculative search prefetch while a clarify session waits for answers
+PREFETCH_ENABLE: bool = os.getenv("PREFETCH_ENABLE", "true").lower() == "true"
+PREFETCH_TTL_SECONDS: int = int(os.getenv("PREFETCH_TTL_SECONDS", "300"))
+PREFETCH_MAX_WORKERS: int = int(os.getenv("PREFETCH_MAX_WORKERS", "8"))
+PREFETCH_LLM: bool = os.getenv("PREFETCH_LLM", "false").lower() == "true"  # also speculate the itinerary LLM call
+
+__all__ += [
+    "PREFETCH_ENABLE",
+    "PREFETCH_TTL_SECONDS",
+    "PREFETCH_MAX_WORKERS",
+    "PREFETCH_LLM",
+]
+
+# Background plan jobs (POST /api/mvp/jobs); redis backend lets `python -m travel_agent.worker` scale separately
+JOBS_BACKEND: str = os.getenv("JOBS_BACKEND", "memory")  # memory | redis
+JOBS_TTL_SECONDS: int = int(os.getenv("JOBS_TTL_SECONDS", "3600"))
+JOBS_INPROCESS_WORKERS: int = int(os.getenv("JOBS_INPROCESS_WORKERS", "4"))  # 0 = API only enqueues (redis backend only)
+JOBS_WAIT_MAX_SECONDS: float = float(os.getenv("JOBS_WAIT_MAX_SECONDS", "30"))
+JOBS_LEASE_SECONDS: float = float(os.getenv("JOBS_LEASE_SECONDS", "600"))  # running longer than this = worker lost, re-queue
+JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+
+__all__ += [
+    "JOBS_BACKEND",
+    "JOBS_TTL_SECONDS",
+    "JOBS_INPROCESS_WORKERS",
+    "JOBS_WAIT_MAX_SECONDS",
+    "JOBS_LEASE_SECONDS",
+    "JOBS_MAX_ATTEMPTS",
+]
+
+# Bulk planning (POST /api/mvp/plan_batch)
+PLAN_BATCH_MAX_ITEMS: int = int(os.getenv("PLAN_BATCH_MAX_ITEMS", "500"))
+PLAN_BATCH_CONCURRENCY: int = int(os.getenv("PLAN_BATCH_CONCURRENCY", "16"))  # unique plans run at once
+PLAN_BATCH_STREAM_THRESHOLD: int = int(os.getenv("PLAN_BATCH_STREAM_THRESHOLD", "50"))  # larger batches stream NDJSON
+
+__all__ += [
+    "PLAN_BATCH_MAX_ITEMS",
+    "PLAN_BATCH_CONCURRENCY",
+    "PLAN_BATCH_STREAM_THRESHOLD",
+]
+
+# Stage sub-result caches (keyed on the inputs each search reads; TTL per data freshness)
+STAGE_CACHE_ENABLE: bool = os.getenv("STAGE_CACHE_ENABLE", "true").lower() == "true"
+STAGE_CACHE_BACKEND: str = os.getenv("STAGE_CACHE_BACKEND", "memory")  # memory | redis
+STAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "5000"))  # per stage
+FLIGHT_CACHE_TTL_SECONDS: int = int(os.getenv("FLIGHT_CACHE_TTL_SECONDS", "300"))  # fares move fast
+HOTEL_CACHE_TTL_SECONDS: int = int(os.getenv("HOTEL_CACHE_TTL_SECONDS", "900"))
+SPOT_CACHE_TTL_SECONDS: int = int(os.getenv("SPOT_CACHE_TTL_SECONDS", "86400"))
+
+__all__ += [
+    "STAGE_CACHE_ENABLE",
+    "STAGE_CACHE_BACKEND",
+    "STAGE_CACHE_MAX_ENTRIES",
+    "FLIGHT_CACHE_TTL_SECONDS",
+    "HOTEL_CACHE_TTL_SECONDS",
+    "SPOT_CACHE_TTL_SECONDS",
+]
+
+# Search ranking offload (process pool; 0 workers = always rank in-process)
+RANK_PROCESS_WORKERS: int = int(os.getenv("RANK_PROCESS_WORKERS", "0"))
+RANK_OFFLOAD_MIN_ITEMS: int = int(os.getenv("RANK_OFFLOAD_MIN_ITEMS", "5000"))  # smaller inputs stay in-process
+
+__all__ += [
+    "RANK_PROCESS_WORKERS",
+    "RANK_OFFLOAD_MIN_ITEMS",
+]
+
+# Ranking weights (score = sum of weight * attribute min-max normalized over the candidates; see ranking.py)
+RANK_FLIGHT_WEIGHTS: List[float] = [float(x) for x in os.getenv("RANK_FLIGHT_WEIGHTS", "0.5,0.3,0.2").split(",")]  # price, duration, stops
+RANK_HOTEL_WEIGHTS: List[float] = [float(x) for x in os.getenv("RANK_HOTEL_WEIGHTS", "0.4,0.6,0.0").split(",")]  # price, rating, distance
+
+__all__ += [
+    "RANK_FLIGHT_WEIGHTS",
+    "RANK_HOTEL_WEIGHTS",
+]
+
+# Flight fare inventory (directory written by scripts/build_flight_inventory.py; empty = mock flights)
+FLIGHT_INVENTORY_DIR: str = os.getenv("FLIGHT_INVENTORY_DIR", "")
+
+__all__ += [
+    "FLIGHT_INVENTORY_DIR",
+]
+
+# Hotel inventory with grid spatial index (directory written by scripts/build_hotel_inventory.py; empty = mock hotels)
+HOTEL_INVENTORY_DIR: str = os.getenv("HOTEL_INVENTORY_DIR", "")
+HOTEL_GRID_CELL_KM: float = float(os.getenv("HOTEL_GRID_CELL_KM", "1.0"))
+HOTEL_SEARCH_RADIUS_KM: float = float(os.getenv("HOTEL_SEARCH_RADIUS_KM", "0"))  # default radius around the center (widened when empty); 0 = whole city
+
+__all__ += [
+    "HOTEL_INVENTORY_DIR",
+    "HOTEL_GRID_CELL_KM",
+    "HOTEL_SEARCH_RADIUS_KM",
+]
+
+# Spot catalog (destination<TAB>JSON lines; empty = bundled src/travel_agent/data/spots.tsv)
+SPOT_CATALOG_PATH: str = os.getenv("SPOT_CATALOG_PATH", "")
+
+__all__ += [
+    "SPOT_CATALOG_PATH",
+]
+
+# Flight search returns the Pareto frontier over (price, duration, stops) instead of the weighted top-k
+FLIGHT_SEARCH_PARETO: bool = os.getenv("FLIGHT_SEARCH_PARETO", "false").lower() == "true"
+
+__all__ += [
+    "FLIGHT_SEARCH_PARETO",
+]
@@ -0,0 +1,94 @@
+"""Request-level deadlines.
+Ref: §4 工作流编排 (SLA)
+
+A Deadline is opened per request (X-Request-Deadline-Ms header, else
+REQUEST_DEADLINE_MS) and kept in a contextvar, so it follows the request into
+stage threads (run_stages copies the context) and asyncio tasks.
+
+- the LLM adapter caps each HTTP attempt at the remaining time and stops retrying
+- the stage scheduler degrades stages that support it once only the answer
+  margin (DEADLINE_MARGIN_MS) is left
+- degradations are collected as warnings and end up in PlanningResult.warnings
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Iterator, List, Optional
+from .config import REQUEST_DEADLINE_MS, DEADLINE_MARGIN_MS
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+
+class Deadline:
+    def __init__(self, budget_ms: float, *, margin_ms: float = DEADLINE_MARGIN_MS, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = Lock()
+        self.expires_at = clock() + budget_ms / 1000.0
+        self.margin_s = margin_ms / 1000.0
+        self.warnings: List[str] = []
+
+    def remaining_s(self) -> float:
+        return max(self.expires_at - self._clock(), 0.0)
+
+    def work_remaining_s(self) -> float:
+        """Time left for stages, keeping the margin needed to assemble the answer."""
+        return max(self.remaining_s() - self.margin_s, 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining_s() <= 0
+
+    def near(self) -> bool:
+        return self.work_remaining_s() <= 0
+
+    def warn(self, code: str) -> None:
+        with self._lock:
+            if code not in self.warnings:
+                self.warnings.append(code)
+
+
+_CURRENT: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def deadline_scope(budget_ms: Optional[float] = None) -> Iterator[Optional[Deadline]]:
+    """Open a deadline for the enclosed work (None / 0 falls back to REQUEST_DEADLINE_MS; no deadline if both unset)."""
+    budget = budget_ms if budget_ms and budget_ms > 0 else REQUEST_DEADLINE_MS
+    if not budget:
+        yield None
+        return
+    dl = Deadline(budget)
+    token = _CURRENT.set(dl)
+    try:
+        yield dl
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def use_deadline(dl: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make an existing deadline current, e.g. on a thread that did not inherit the request context."""
+    token = _CURRENT.set(dl)
+    try:
+        yield dl
+    finally:
+        _CURRENT.reset(token)
+
+
+def earliest_deadline(deadlines) -> Optional[Deadline]:
+    """The deadline that expires first (None when none of them is set)."""
+    return min((d for d in deadlines if d is not None), key=lambda d: d.expires_at, default=None)
+
+
+def deadline_warnings() -> List[str]:
+    dl = current_deadline()
+    return list(dl.warnings) if dl else []
+
+
+__all__ = ["DEADLINE_HEADER", "Deadline", "current_deadline", "deadline_scope", "use_deadline", "earliest_deadline",
+           "deadline_warnings"]
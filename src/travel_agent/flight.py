@@ -1,40 +1,100 @@
-"""Flight search mock implementation.
+"""Flight search (mock, or the memory-mapped fare inventory).
 Ref: §3.2 航班搜索
 """
 from __future__ import annotations
-from typing import List
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from .models import TripIntent, FlightOption
 from .errors import DomainError
+from .stage_cache import FLIGHT_CACHE
+from .ranking import rank_top_k, score_rows, pareto_front, diverse_subset
+from .config import RANK_PROCESS_WORKERS, FLIGHT_SEARCH_PARETO
+from .flight_inventory import flight_inventory, to_datetime
 
 DEFAULT_ORIGIN = "Shanghai"
 
 
-def flight_score(price: float, duration_minutes: int, stops: int) -> float:
-    # Normalize simplistic
-    p_norm = 1 / (price + 1)
-    d_norm = 1 / (duration_minutes + 1)
-    s_norm = 1 / (stops + 1)
-    return 0.5 * p_norm + 0.3 * d_norm + 0.2 * s_norm
-
-
-def flight_search(intent: TripIntent, max_results: int = 5) -> List[FlightOption]:
+def flight_search(intent: TripIntent, max_results: int = 5, *, pareto: Optional[bool] = None) -> List[FlightOption]:
+    """Top flights by weighted score, or with pareto=True (default FLIGHT_SEARCH_PARETO) up to
+    max_results Pareto-optimal flights over (price, duration, stops), spread across the trade-offs."""
     if not intent.destination or not intent.depart_date:
         raise DomainError("FLIGHT_API_FAIL", "Missing destination or depart_date")
     origin = intent.origin or DEFAULT_ORIGIN
-    # mock flights
+    pareto = FLIGHT_SEARCH_PARETO if pareto is None else pareto
+    key = {"origin": origin, "destination": intent.destination, "depart_date": intent.depart_date,
+           "currency": intent.currency, "max_results": max_results, "pareto": pareto}
+    return FLIGHT_CACHE.get_or_compute(key, lambda: _search(intent, origin, max_results, pareto))
+
+
+def _search(intent: TripIntent, origin: str, max_results: int, pareto: bool = False) -> List[FlightOption]:
+    inv = flight_inventory()
+    if inv is not None:
+        start, end = inv.slice(origin, intent.destination, intent.depart_date)
+        if end > start:
+            return _inventory_flights(inv, start, end, intent, origin, max_results, pareto)
+    return _mock_flights(intent, origin, max_results, pareto)  # no inventory, or route/date not covered
+
+
+def _select(cols: Dict[str, Sequence[float]], k: int, groups, pareto: bool) -> Tuple[List[int], List[float]]:
+    if not pareto:
+        return rank_top_k("flight", cols, k, groups)
+    # dominated rows (incl. the pricier copy of the same flight) drop out of the frontier
+    rows = diverse_subset(cols, pareto_front(cols["price"], cols["duration"], cols["stops"]), k)
+    scores = score_rows("flight", cols)  # normalized over all candidates, as in the top-k path
+    scored = sorted(((scores[i], i) for i in rows), key=lambda t: -t[0])
+    return [i for _, i in scored], [sc for sc, _ in scored]
+
+
+def _inventory_flights(inv, start: int, end: int, intent: TripIntent, origin: str, max_results: int,
+                       pareto: bool = False) -> List[FlightOption]:
+    c = inv.columns(start, end)
+    groups = c["flight_no"].astype("int64") * 1440 + c["depart_min"] % 1440  # same flight sold twice
+    idx, scores = _select({"price": c["price"], "duration": c["duration"], "stops": c["stops"]},
+                          max_results, groups, pareto)
+    return [FlightOption(
+        id=f"INV{start + i}", airline=inv.airlines[c["airline"][i]], flight_number=inv.flight_numbers[c["flight_no"][i]],
+        depart_airport=origin, arrive_airport=intent.destination, depart_time=to_datetime(c["depart_min"][i]),
+        arrive_time=to_datetime(c["arrive_min"][i]), duration_minutes=int(c["duration"][i]), price=float(c["price"][i]),
+        currency=inv.currency, cabin_class=inv.cabins[c["cabin"][i]], stops=int(c["stops"][i]), source="inventory", score=score,
+    ) for i, score in zip(idx, scores)]
+
+
+def _mock_rows(intent: TripIntent, n: int) -> List[Tuple[str, datetime, datetime, float, int]]:
     base_time = datetime.combine(intent.depart_date, datetime.min.time())
-    flights: List[FlightOption] = []
-    for i in range(max_results):
+    rows = []
+    for i in range(n):
         depart = base_time + timedelta(hours=8 + i)
         arrive = depart + timedelta(hours=2 + i)
-        price = 3000 + i * 200
-        duration = int((arrive - depart).total_seconds() / 60)
-        stops = 0 if i < 2 else 1
+        rows.append((f"MA{i:03}", depart, arrive, 3000 + i * 200, 0 if i < 2 else 1))
+    return rows
+
+
+def _mock_flights(intent: TripIntent, origin: str, max_results: int, pareto: bool = False) -> List[FlightOption]:
+    rows = _mock_rows(intent, max_results)
+    # rank on plain columns; only the winners become models
+    durations = [int((arrive - depart).total_seconds() / 60) for _, depart, arrive, _, _ in rows]
+    cols = {"price": [r[3] for r in rows], "duration": durations, "stops": [r[4] for r in rows]}
+    group_ids: Dict[Tuple[str, datetime], int] = {}
+    groups = [group_ids.setdefault((r[0], r[1]), len(group_ids)) for r in rows]  # same flight listed twice
+    idx, scores = _select(cols, max_results, groups, pareto)
+    flights: List[FlightOption] = []
+    for i, score in zip(idx, scores):
+        number, depart, arrive, price, stops = rows[i]
         flights.append(FlightOption(
-            id=f"FL{i}", airline="MockAir", flight_number=f"MA{i:03}",
+            id=f"FL{i}", airline="MockAir", flight_number=number,
             depart_airport=origin, arrive_airport=intent.destination, depart_time=depart,
-            arrive_time=arrive, duration_minutes=duration, price=price, currency=intent.currency,
-            cabin_class="Economy", stops=stops, score=flight_score(price, duration, stops)
+            arrive_time=arrive, duration_minutes=durations[i], price=price, currency=intent.currency,
+            cabin_class="Economy", stops=stops, score=score
         ))
     return flights
+
+
+async def flight_search_async(intent: TripIntent, max_results: int = 5, *, pareto: Optional[bool] = None) -> List[FlightOption]:
+    """Async entry used by the asyncio workflow.
+    Mock inventory is computed in-process (no I/O), so no executor hop is needed
+    unless ranking may wait on the process pool.
+    """
+    if RANK_PROCESS_WORKERS:
+        return await asyncio.to_thread(flight_search, intent, max_results, pareto=pareto)
+    return flight_search(intent, max_results, pareto=pareto)
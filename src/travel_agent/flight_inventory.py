@@ -0,0 +1,151 @@
+"""Columnar, memory-mapped flight fare inventory.
+Ref: §3.2 航班搜索
+
+Layout of FLIGHT_INVENTORY_DIR (written by build_flight_inventory /
+scripts/build_flight_inventory.py):
+
+- <column>.npy   one file per column, rows sorted by (route, depart day)
+- index_keys.npy int64, sorted unique route_id * KEY_BASE + day ordinal
+- index_starts.npy int64, row offsets (len(index_keys) + 1)
+- meta.json      string dictionaries (routes "origin|destination", airlines,
+                 flight numbers, cabins), currency and row count
+
+Columns are opened with np.load(mmap_mode="r"): nothing is parsed at startup,
+pages are shared read-only between gunicorn workers through the page cache,
+and a search only touches the rows of its (origin, destination, date) slice.
+"""
+from __future__ import annotations
+import json, os
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from .config import FLIGHT_INVENTORY_DIR
+from .logger import log_info, log_error
+
+try:  # optional dependency
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+KEY_BASE = 10_000_000  # > any date ordinal
+_EPOCH = datetime(1970, 1, 1)
+# column -> dtype; times are naive local minutes since 1970-01-01
+COLUMNS: Dict[str, str] = {
+    "depart_min": "int64",
+    "arrive_min": "int64",
+    "price": "float64",
+    "duration": "int32",
+    "stops": "int8",
+    "airline": "int32",
+    "flight_no": "int32",
+    "cabin": "int16",
+}
+
+
+def _minutes(dt: datetime) -> int:
+    return int((dt - _EPOCH).total_seconds() // 60)
+
+
+def to_datetime(minutes: int) -> datetime:
+    return _EPOCH + timedelta(minutes=int(minutes))
+
+
+class FlightInventory:
+    def __init__(self, path: str):
+        if np is None:  # pragma: no cover
+            raise RuntimeError("numpy not installed")
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.currency: str = meta["currency"]
+        self.rows: int = meta["rows"]
+        self.airlines: List[str] = meta["airlines"]
+        self.flight_numbers: List[str] = meta["flight_numbers"]
+        self.cabins: List[str] = meta["cabins"]
+        self._routes: Dict[str, int] = {r: i for i, r in enumerate(meta["routes"])}
+        self.cols = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+        self._keys = np.load(os.path.join(path, "index_keys.npy"), mmap_mode="r")
+        self._starts = np.load(os.path.join(path, "index_starts.npy"), mmap_mode="r")
+
+    def slice(self, origin: str, destination: str, day: date) -> Tuple[int, int]:
+        """Row range [start, end) for the route and depart day (empty when absent)."""
+        route = self._routes.get(f"{origin}|{destination}")
+        if route is None:
+            return 0, 0
+        key = route * KEY_BASE + day.toordinal()
+        pos = int(np.searchsorted(self._keys, key))
+        if pos >= len(self._keys) or int(self._keys[pos]) != key:
+            return 0, 0
+        return int(self._starts[pos]), int(self._starts[pos + 1])
+
+    def columns(self, start: int, end: int) -> Dict[str, "np.ndarray"]:
+        return {name: col[start:end] for name, col in self.cols.items()}
+
+
+def build_flight_inventory(out_dir: str, rows: Sequence[Dict], currency: str = "CNY") -> int:
+    """Write an inventory from row dicts with origin, destination, depart_time, arrive_time,
+    price, stops, airline, flight_number and optional cabin_class. Returns the row count."""
+    if np is None:  # pragma: no cover
+        raise RuntimeError("numpy not installed")
+    os.makedirs(out_dir, exist_ok=True)
+    dicts: Dict[str, Dict[str, int]] = {"routes": {}, "airlines": {}, "flight_numbers": {}, "cabins": {}}
+    def code(kind: str, value: str) -> int:
+        return dicts[kind].setdefault(value, len(dicts[kind]))
+    n = len(rows)
+    data = {name: np.empty(n, dtype=dt) for name, dt in COLUMNS.items()}
+    keys = np.empty(n, dtype=np.int64)
+    for i, r in enumerate(rows):
+        dep, arr = r["depart_time"], r["arrive_time"]
+        data["depart_min"][i] = _minutes(dep)
+        data["arrive_min"][i] = _minutes(arr)
+        data["price"][i] = r["price"]
+        data["duration"][i] = int((arr - dep).total_seconds() // 60)
+        data["stops"][i] = r.get("stops", 0)
+        data["airline"][i] = code("airlines", r["airline"])
+        data["flight_no"][i] = code("flight_numbers", r["flight_number"])
+        data["cabin"][i] = code("cabins", r.get("cabin_class", "Economy"))
+        keys[i] = code("routes", f"{r['origin']}|{r['destination']}") * KEY_BASE + dep.date().toordinal()
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    for name, arr in data.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr[order])
+    uniq, starts = np.unique(keys, return_index=True)
+    np.save(os.path.join(out_dir, "index_keys.npy"), uniq.astype(np.int64))
+    np.save(os.path.join(out_dir, "index_starts.npy"), np.append(starts, n).astype(np.int64))
+    meta = {kind: list(d) for kind, d in dicts.items()}
+    meta.update(currency=currency, rows=n)
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return n
+
+
+_INVENTORY: Optional[FlightInventory] = None
+_LOADED = False
+_LOCK = Lock()
+
+
+def flight_inventory() -> Optional[FlightInventory]:
+    """Inventory from FLIGHT_INVENTORY_DIR, opened once per process (None when unset or unreadable)."""
+    global _INVENTORY, _LOADED
+    if _LOADED:
+        return _INVENTORY
+    with _LOCK:
+        if not _LOADED:
+            if FLIGHT_INVENTORY_DIR and np is not None:
+                try:
+                    _INVENTORY = FlightInventory(FLIGHT_INVENTORY_DIR)
+                    log_info("flight", "inventory_loaded", extra={"path": FLIGHT_INVENTORY_DIR, "rows": _INVENTORY.rows})
+                except (OSError, ValueError, KeyError) as e:
+                    log_error("flight", str(e), code="FLIGHT_INVENTORY_UNAVAILABLE", extra={"path": FLIGHT_INVENTORY_DIR})
+            _LOADED = True
+    return _INVENTORY
+
+
+def set_flight_inventory(inv: Optional[FlightInventory]) -> None:
+    """Swap the process inventory (tests, or after writing a fresh snapshot)."""
+    global _INVENTORY, _LOADED
+    with _LOCK:
+        _INVENTORY, _LOADED = inv, True
+
+
+__all__ = ["FlightInventory", "build_flight_inventory", "flight_inventory", "set_flight_inventory", "to_datetime"]
@@ -1,79 +1,70 @@
 """LangGraph-based multi-agent orchestration.
 If LangGraph import fails, provide fallback stub.
+
+Nodes and edges are derived from stage_graph.PLAN_STAGES: flights, hotels and
+spots fan out from START, itinerary hangs off spots and budget off flights +
+hotels. LangGraph runs in supersteps, so itinerary and budget both start only
+once the whole first step (including the flight and hotel searches) is done,
+then run side by side. stage_graph.run_stages has no such barrier: there the
+itinerary LLM call starts as soon as spots finishes.
+Each node checkpoints its output; nodes restored from a checkpoint are skipped,
+so a retry or the workflow fallback resumes after the last completed node.
 """
 from __future__ import annotations
+import operator, time
 from typing import Any, Dict
+from typing_extensions import Annotated, TypedDict
 from .models import TripIntent, PlanningResult
-from .flight import flight_search
-from .hotel import hotel_search
-from .spots import spot_fetch_basic
-from .itinerary import itinerary_generate
-from .budget import budget_allocate
-from datetime import datetime
+from .stage_graph import PLAN_STAGES, Stage, planning_result, degrade_stage
+from .deadline import current_deadline
+from .checkpoint import PlanCheckpoint
 from .metrics import METRICS_PARALLEL
 from .logger import log_info
 
 try:
-    from langgraph.graph import Graph
+    from langgraph.graph import StateGraph, START, END
 except Exception:  # pragma: no cover
-    Graph = None  # type: ignore
+    StateGraph = None  # type: ignore
 
 
-def build_graph():
-    if Graph is None:
-        return None
-    g = Graph()
+class PlanState(TypedDict, total=False):
+    intent: TripIntent
+    # node names may not double as state keys, so stage outputs share one merged dict
+    outputs: Annotated[Dict[str, Any], operator.or_]
+    timings: Annotated[Dict[str, float], operator.or_]
+    checkpoint: PlanCheckpoint
 
-    def node_flights(state: Dict[str, Any]):
-        intent: TripIntent = state['intent']
-        flights = flight_search(intent)
-        log_info('graph', 'flights_done', session_id=intent.session_id, extra={'count': len(flights)})
-        state['flights'] = flights
-        return state
 
-    def node_hotels(state: Dict[str, Any]):
+def _node(stage: Stage):
+    def run(state: PlanState):
         intent: TripIntent = state['intent']
-        hotels = hotel_search(intent)
-        log_info('graph', 'hotels_done', session_id=intent.session_id, extra={'count': len(hotels)})
-        state['hotels'] = hotels
-        return state
+        if stage.name in state['outputs']:  # restored from checkpoint
+            return {'timings': {}}
+        inputs = {d: state['outputs'][d] for d in stage.deps}
+        dl = current_deadline()
+        if stage.degrade and dl is not None and dl.near():
+            value, ms = degrade_stage(stage, intent, inputs, intent.session_id, dl)
+            return {'outputs': {stage.name: value}, 'timings': {stage.name: ms}}
+        t0 = time.perf_counter()
+        value = stage.run(intent, inputs)
+        ms = (time.perf_counter() - t0) * 1000.0
+        log_info('graph', f'{stage.name}_done', session_id=intent.session_id, extra={'stage_ms': round(ms, 2)})
+        state['checkpoint'].save(stage.name, value)
+        return {'outputs': {stage.name: value}, 'timings': {stage.name: ms}}
+    return run
 
-    def node_spots(state: Dict[str, Any]):
-        intent: TripIntent = state['intent']
-        spots = spot_fetch_basic(intent.destination, intent.preferences)
-        log_info('graph', 'spots_done', session_id=intent.session_id, extra={'count': len(spots)})
-        state['spots'] = spots
-        return state
-
-    def node_itinerary(state: Dict[str, Any]):
-        intent: TripIntent = state['intent']
-        itinerary = itinerary_generate(intent, state.get('spots', []))
-        log_info('graph', 'itinerary_done', session_id=intent.session_id)
-        state['itinerary'] = itinerary
-        return state
 
-    def node_budget(state: Dict[str, Any]):
-        intent: TripIntent = state['intent']
-        budget = budget_allocate(intent, state.get('flights', []), state.get('hotels', []))
-        log_info('graph', 'budget_done', session_id=intent.session_id)
-        state['budget'] = budget
-        return state
-
-    g.add_node('flights', node_flights)
-    g.add_node('hotels', node_hotels)
-    g.add_node('spots', node_spots)
-    g.add_node('itinerary', node_itinerary)
-    g.add_node('budget', node_budget)
-
-    # edges: start -> flights/hotels; both -> spots -> itinerary -> budget
-    g.set_entry_point('flights')
-    g.add_edge('flights', 'spots')
-    g.add_edge('hotels', 'spots')
-    g.add_edge('spots', 'itinerary')
-    g.add_edge('itinerary', 'budget')
-
-    g.set_finish_point('budget')
-    return g
+def build_graph():
+    if StateGraph is None:
+        return None
+    g = StateGraph(PlanState)
+    for st in PLAN_STAGES:
+        g.add_node(st.name, _node(st))
+    for st in PLAN_STAGES:
+        g.add_edge(list(st.deps) if st.deps else START, st.name)
+    needed = {d for st in PLAN_STAGES for d in st.deps}
+    g.add_edge([st.name for st in PLAN_STAGES if st.name not in needed], END)
+    return g.compile()
 
 _GRAPH = build_graph()
 
@@ -81,19 +72,6 @@ _GRAPH = build_graph()
 def run_graph(intent: TripIntent) -> PlanningResult:
     if _GRAPH is None:
         raise RuntimeError('LangGraph not available')
-    state = {'intent': intent}
-    result_state = _GRAPH.run(state)  # synchronous run
-    flights = result_state['flights']
-    hotels = result_state['hotels']
-    itinerary = result_state['itinerary']
-    budget = result_state['budget']
-    return PlanningResult(
-        session_id=intent.session_id,
-        intent=intent,
-        flights=flights,
-        hotels=hotels,
-        itinerary=itinerary,
-        budget=budget,
-        generated_at=datetime.utcnow(),
-        warnings=[]
-    )
+    ckpt = PlanCheckpoint(intent, intent.session_id)
+    state = _GRAPH.invoke({'intent': intent, 'outputs': ckpt.seed(), 'timings': {}, 'checkpoint': ckpt})
+    return planning_result(intent, intent.session_id, state['outputs'], state['timings'])
@@ -1,30 +1,96 @@
-"""Hotel search mock implementation.
+"""Hotel search (mock, or the spatially indexed inventory).
 Ref: §3.3 酒店搜索
 """
 from __future__ import annotations
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Tuple
 from .models import TripIntent, HotelOption
 from .errors import DomainError
+from .stage_cache import HOTEL_CACHE
+from .ranking import rank_top_k
+from .config import RANK_PROCESS_WORKERS, HOTEL_SEARCH_RADIUS_KM
+from .hotel_inventory import hotel_inventory
 
 
-def hotel_score(price_per_night: float, rating: float) -> float:
-    p_norm = 1 / (price_per_night + 1)
-    r_norm = rating / 5.0
-    return 0.6 * r_norm + 0.4 * p_norm
+_WIDEN = (1, 2, 4)  # default-radius multipliers tried before dropping the radius
 
 
-def hotel_search(intent: TripIntent, nights: Optional[int] = None, max_results: int = 5) -> List[HotelOption]:
+def hotel_search(intent: TripIntent, nights: Optional[int] = None, max_results: int = 5, *,
+                 near: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None,
+                 price_min: Optional[float] = None, price_max: Optional[float] = None,
+                 min_rating: Optional[float] = None) -> List[HotelOption]:
+    """Top hotels for the destination. Location filters: within radius_km of `near` (lat, lon)
+    or of the city center (default HOTEL_SEARCH_RADIUS_KM, widened when it holds no hotel),
+    nightly price range and minimum rating."""
     if not intent.destination or not intent.days:
         raise DomainError("HOTEL_API_FAIL", "Missing destination or days")
     nights = nights or (intent.nights or (intent.days - 1))
+    base = {"near": near, "price_min": price_min, "price_max": price_max, "min_rating": min_rating}
+    if radius_km is not None:  # explicit radius: strict
+        return _cached_search(intent, nights, max_results, {**base, "radius_km": radius_km})
+    # HOTEL_SEARCH_RADIUS_KM is only a preference: widen it (x2, x4, then the whole city) rather
+    # than leave the planning stage without hotels
+    radii = [HOTEL_SEARCH_RADIUS_KM * m for m in _WIDEN] + [None] if HOTEL_SEARCH_RADIUS_KM else [None]
+    for r in radii:
+        hotels = _cached_search(intent, nights, max_results, {**base, "radius_km": r})
+        if hotels:
+            break
+    return hotels
+
+
+def _cached_search(intent: TripIntent, nights: int, max_results: int, filters: dict) -> List[HotelOption]:
+    key = {"destination": intent.destination, "nights": nights, "depart_date": intent.depart_date,
+           "currency": intent.currency, "max_results": max_results, **filters}
+    return HOTEL_CACHE.get_or_compute(key, lambda: _search(intent, nights, max_results, filters))
+
+
+def _search(intent: TripIntent, nights: int, max_results: int, filters: dict) -> List[HotelOption]:
+    inv = hotel_inventory()
+    if inv is not None and inv.covers(intent.destination):
+        return _inventory_hotels(inv, intent, nights, max_results, filters)
+    return _mock_hotels(intent, nights, max_results, filters)
+
+
+def _inventory_hotels(inv, intent: TripIntent, nights: int, max_results: int, filters: dict) -> List[HotelOption]:
+    rows, dist = inv.query(intent.destination, **filters)
+    if not len(rows):
+        return []
+    price, rating = inv.cols["price"][rows], inv.cols["rating"][rows]
+    idx, scores = rank_top_k("hotel", {"price": price, "rating": rating, "distance": dist}, max_results)
+    return [HotelOption(
+        id=f"HINV{rows[i]}", name=inv.names[inv.cols["name"][rows[i]]], location_text=inv.addresses[inv.cols["address"][rows[i]]],
+        price_per_night=float(price[i]), nights=nights, total_price=round(float(price[i]) * nights, 2), currency=inv.currency,
+        rating=round(float(rating[i]), 2), source="inventory", distance_center_km=round(float(dist[i]), 3), score=score,
+    ) for i, score in zip(idx, scores)]
+
+
+def _mock_hotels(intent: TripIntent, nights: int, max_results: int, filters: Optional[dict] = None) -> List[HotelOption]:
+    f = filters or {}
+    cand = [(i, 400 + i * 50, 4.0 - (i * 0.1), 0.5 + i * 0.3) for i in range(max_results)]  # (i, price, rating, km)
+    cand = [c for c in cand
+            if (f.get("radius_km") is None or c[3] <= f["radius_km"])
+            and (f.get("price_min") is None or c[1] >= f["price_min"])
+            and (f.get("price_max") is None or c[1] <= f["price_max"])
+            and (f.get("min_rating") is None or c[2] >= f["min_rating"])]
+    if not cand:
+        return []
+    # rank on plain columns; only the winners become models
+    idx, scores = rank_top_k("hotel", {"price": [c[1] for c in cand], "rating": [c[2] for c in cand],
+                                       "distance": [c[3] for c in cand]}, max_results)
     hotels: List[HotelOption] = []
-    for i in range(max_results):
-        price = 400 + i * 50
-        rating = 4.0 - (i * 0.1)
-        total = price * nights
+    for j, score in zip(idx, scores):
+        i, price, rating, km = cand[j]
         hotels.append(HotelOption(
             id=f"HT{i}", name=f"Hotel{i}", location_text=f"Center {i}", price_per_night=price,
-            nights=nights, total_price=total, currency=intent.currency, rating=rating,
-            distance_center_km=0.5 + i * 0.3, score=hotel_score(price, rating)
+            nights=nights, total_price=price * nights, currency=intent.currency, rating=rating,
+            distance_center_km=km, score=score
         ))
     return hotels
+
+
+async def hotel_search_async(intent: TripIntent, nights: Optional[int] = None, max_results: int = 5, **filters) -> List[HotelOption]:
+    """Async entry used by the asyncio workflow (mock inventory, no I/O; thread hop only
+    when ranking may wait on the process pool)."""
+    if RANK_PROCESS_WORKERS:
+        return await asyncio.to_thread(hotel_search, intent, nights, max_results, **filters)
+    return hotel_search(intent, nights, max_results, **filters)
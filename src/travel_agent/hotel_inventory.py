@@ -0,0 +1,187 @@
+"""Hotel inventory with a per-destination grid spatial index.
+Ref: §3.3 酒店搜索
+
+Layout of HOTEL_INVENTORY_DIR (written by build_hotel_inventory /
+scripts/build_hotel_inventory.py), memory-mapped like the flight inventory:
+
+- <column>.npy     lat, lon, price, rating, name, address; rows sorted by
+                   (destination, grid cell)
+- index_keys.npy   int64, sorted unique destination_id * KEY_BASE + cell key
+- index_starts.npy int64, row offsets (len(index_keys) + 1)
+- meta.json        destinations {name: {id, center}}, cell_km, currency,
+                   name / address string tables
+
+Cells are cell_km squares on a local equirectangular projection around the
+destination center. A radius query visits only the cells overlapping the
+circle: each grid row of cells is one contiguous key range, hence one
+searchsorted call, and exact distances are computed for those rows alone.
+"""
+from __future__ import annotations
+import json, math, os
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from .config import HOTEL_INVENTORY_DIR, HOTEL_GRID_CELL_KM
+from .logger import log_info, log_error
+
+try:  # optional dependency
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+_OFF = 1000  # cell coordinates are shifted by _OFF to stay non-negative (grid spans 2000 cells per axis)
+KEY_BASE = (2 * _OFF) ** 2
+KM_PER_DEG_LAT = 110.574
+COLUMNS: Dict[str, str] = {"lat": "float64", "lon": "float64", "price": "float64", "rating": "float32",
+                           "name": "int32", "address": "int32"}
+
+
+def _xy_km(lat, lon, center: Tuple[float, float]):
+    """Local projection (km east / north of center); works on floats and arrays."""
+    lat0, lon0 = center
+    return (lon - lon0) * 111.320 * math.cos(math.radians(lat0)), (lat - lat0) * KM_PER_DEG_LAT
+
+
+def _cell(v: float, cell_km: float) -> int:
+    return min(max(int(math.floor(v / cell_km)), -_OFF), _OFF - 1) + _OFF
+
+
+class HotelInventory:
+    def __init__(self, path: str):
+        if np is None:  # pragma: no cover
+            raise RuntimeError("numpy not installed")
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.currency: str = meta["currency"]
+        self.rows: int = meta["rows"]
+        self.cell_km: float = meta["cell_km"]
+        self.names: List[str] = meta["names"]
+        self.addresses: List[str] = meta["addresses"]
+        self.destinations: Dict[str, Dict] = meta["destinations"]
+        self.cols = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+        self._keys = np.load(os.path.join(path, "index_keys.npy"), mmap_mode="r")
+        self._starts = np.load(os.path.join(path, "index_starts.npy"), mmap_mode="r")
+
+    def covers(self, destination: str) -> bool:
+        return destination in self.destinations
+
+    def center(self, destination: str) -> Tuple[float, float]:
+        c = self.destinations[destination]["center"]
+        return c[0], c[1]
+
+    def _ranges(self, dest_id: int, x0: float, x1: float, y0: float, y1: float) -> List[Tuple[int, int]]:
+        cx0, cx1 = _cell(x0, self.cell_km), _cell(x1, self.cell_km)
+        out = []
+        for cy in range(_cell(y0, self.cell_km), _cell(y1, self.cell_km) + 1):
+            base = dest_id * KEY_BASE + cy * 2 * _OFF
+            lo = int(np.searchsorted(self._keys, base + cx0, side="left"))
+            hi = int(np.searchsorted(self._keys, base + cx1, side="right"))
+            if hi > lo:
+                out.append((int(self._starts[lo]), int(self._starts[hi])))
+        return out
+
+    def query(self, destination: str, near: Optional[Tuple[float, float]] = None, radius_km: Optional[float] = None,
+              price_min: Optional[float] = None, price_max: Optional[float] = None,
+              min_rating: Optional[float] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Row ids matching the filters and their distance (km) to `near` (default: the destination center).
+        Without radius_km every cell of the destination is visited."""
+        info = self.destinations.get(destination)
+        if info is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        center = self.center(destination)
+        px, py = _xy_km(near[0], near[1], center) if near else (0.0, 0.0)
+        if radius_km is not None:
+            ranges = self._ranges(info["id"], px - radius_km, px + radius_km, py - radius_km, py + radius_km)
+        else:
+            lo = int(np.searchsorted(self._keys, info["id"] * KEY_BASE, side="left"))
+            hi = int(np.searchsorted(self._keys, (info["id"] + 1) * KEY_BASE, side="left"))
+            ranges = [(int(self._starts[lo]), int(self._starts[hi]))] if hi > lo else []
+        if not ranges:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = np.concatenate([np.arange(a, b, dtype=np.int64) for a, b in ranges])
+        x, y = _xy_km(self.cols["lat"][rows], self.cols["lon"][rows], center)
+        dist = np.hypot(x - px, y - py)
+        keep = np.ones(len(rows), dtype=bool)
+        if radius_km is not None:
+            keep &= dist <= radius_km
+        if price_min is not None:
+            keep &= self.cols["price"][rows] >= price_min
+        if price_max is not None:
+            keep &= self.cols["price"][rows] <= price_max
+        if min_rating is not None:
+            keep &= self.cols["rating"][rows] >= min_rating
+        return rows[keep], dist[keep]
+
+
+def build_hotel_inventory(out_dir: str, rows: Sequence[Dict], centers: Optional[Dict[str, Tuple[float, float]]] = None,
+                          cell_km: float = HOTEL_GRID_CELL_KM, currency: str = "CNY") -> int:
+    """Write an inventory from row dicts with destination, name, lat, lon, price (per night), rating and
+    optional address. `centers` defaults to each destination's mean coordinate. Returns the row count."""
+    if np is None:  # pragma: no cover
+        raise RuntimeError("numpy not installed")
+    os.makedirs(out_dir, exist_ok=True)
+    by_dest: Dict[str, List[int]] = {}
+    for i, r in enumerate(rows):
+        by_dest.setdefault(r["destination"], []).append(i)
+    centers = dict(centers or {})
+    for d, idx in by_dest.items():
+        if d not in centers:
+            centers[d] = (sum(rows[i]["lat"] for i in idx) / len(idx), sum(rows[i]["lon"] for i in idx) / len(idx))
+    dest_ids = {d: n for n, d in enumerate(by_dest)}
+    n = len(rows)
+    data = {name: np.empty(n, dtype=dt) for name, dt in COLUMNS.items()}
+    keys = np.empty(n, dtype=np.int64)
+    names: Dict[str, int] = {}
+    addresses: Dict[str, int] = {}
+    for i, r in enumerate(rows):
+        d = r["destination"]
+        x, y = _xy_km(r["lat"], r["lon"], centers[d])
+        keys[i] = dest_ids[d] * KEY_BASE + _cell(y, cell_km) * 2 * _OFF + _cell(x, cell_km)
+        data["lat"][i], data["lon"][i] = r["lat"], r["lon"]
+        data["price"][i], data["rating"][i] = r["price"], r["rating"]
+        data["name"][i] = names.setdefault(r["name"], len(names))
+        data["address"][i] = addresses.setdefault(r.get("address") or d, len(addresses))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    for name, arr in data.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr[order])
+    uniq, starts = np.unique(keys, return_index=True)
+    np.save(os.path.join(out_dir, "index_keys.npy"), uniq.astype(np.int64))
+    np.save(os.path.join(out_dir, "index_starts.npy"), np.append(starts, n).astype(np.int64))
+    meta = {"currency": currency, "rows": n, "cell_km": cell_km, "names": list(names), "addresses": list(addresses),
+            "destinations": {d: {"id": dest_ids[d], "center": list(centers[d])} for d in by_dest}}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return n
+
+
+_INVENTORY: Optional[HotelInventory] = None
+_LOADED = False
+_LOCK = Lock()
+
+
+def hotel_inventory() -> Optional[HotelInventory]:
+    """Inventory from HOTEL_INVENTORY_DIR, opened once per process (None when unset or unreadable)."""
+    global _INVENTORY, _LOADED
+    if _LOADED:
+        return _INVENTORY
+    with _LOCK:
+        if not _LOADED:
+            if HOTEL_INVENTORY_DIR and np is not None:
+                try:
+                    _INVENTORY = HotelInventory(HOTEL_INVENTORY_DIR)
+                    log_info("hotel", "inventory_loaded", extra={"path": HOTEL_INVENTORY_DIR, "rows": _INVENTORY.rows})
+                except (OSError, ValueError, KeyError) as e:
+                    log_error("hotel", str(e), code="HOTEL_INVENTORY_UNAVAILABLE", extra={"path": HOTEL_INVENTORY_DIR})
+            _LOADED = True
+    return _INVENTORY
+
+
+def set_hotel_inventory(inv: Optional[HotelInventory]) -> None:
+    """Swap the process inventory (tests, or after writing a fresh snapshot)."""
+    global _INVENTORY, _LOADED
+    with _LOCK:
+        _INVENTORY, _LOADED = inv, True
+
+
+__all__ = ["HotelInventory", "build_hotel_inventory", "hotel_inventory", "set_hotel_inventory"]
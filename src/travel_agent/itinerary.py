@@ -5,10 +5,30 @@ from __future__ import annotations
 from typing import List
 from .models import TripIntent, Itinerary, DayPlan
 from .errors import DomainError
-from .llm_manager import llm_itinerary_generate
+from .llm_manager import (
+    llm_itinerary_generate, llm_itinerary_generate_async, llm_itinerary_fallback, llm_itinerary_stream, ItineraryStream,
+)
 
 
 def itinerary_generate(intent: TripIntent, spots: List[str]) -> Itinerary:
     if not intent.destination or not intent.days:
         raise DomainError("ITINERARY_GEN_FAIL", "Missing destination/days")
     return llm_itinerary_generate(intent, spots)
+
+
+async def itinerary_generate_async(intent: TripIntent, spots: List[str]) -> Itinerary:
+    if not intent.destination or not intent.days:
+        raise DomainError("ITINERARY_GEN_FAIL", "Missing destination/days")
+    return await llm_itinerary_generate_async(intent, spots)
+
+
+def itinerary_fallback(intent: TripIntent) -> Itinerary:
+    """Placeholder itinerary used when the request deadline leaves no time for the LLM."""
+    return llm_itinerary_fallback(intent)
+
+
+def itinerary_stream(intent: TripIntent, spots: List[str]) -> ItineraryStream:
+    """Streaming variant: iterate for DayPlans, then call .itinerary()."""
+    if not intent.destination or not intent.days:
+        raise DomainError("ITINERARY_GEN_FAIL", "Missing destination/days")
+    return llm_itinerary_stream(intent, spots)
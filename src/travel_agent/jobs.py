@@ -0,0 +1,250 @@
+"""Background plan job queue.
+Ref: §6 REST API 接口详细规格 + §7 会话与缓存策略
+
+POST /api/mvp/jobs enqueues a finalized intent and returns a job id; workers
+(in-process threads or `python -m travel_agent.worker`) claim jobs, run the
+workflow and store the result for GET /api/mvp/jobs/{id} to poll / long-poll.
+
+- InMemoryJobQueue: deque of ids + record dict, single process only
+- RedisJobQueue: optional, list "jobs:queue" + one JSON record per job with
+  EXPIRE TTL, shared by API and worker processes. claim() BLMOVEs the id into
+  "jobs:processing" and finish() removes it, so a job whose worker died is
+  still listed there.
+
+requeue_stale() (run periodically by JobWorkerPool) puts jobs running longer
+than JOBS_LEASE_SECONDS back on the queue, and fails them after
+JOBS_MAX_ATTEMPTS claims.
+"""
+from __future__ import annotations
+import asyncio, json, time, uuid
+from collections import OrderedDict, deque
+from threading import Condition
+from typing import Any, Deque, Dict, Optional, Tuple
+from .config import JOBS_BACKEND, JOBS_TTL_SECONDS, JOBS_LEASE_SECONDS, JOBS_MAX_ATTEMPTS, REDIS_URL
+from .models import TripIntent, JobInfo
+
+try:  # optional dependency
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover
+    redis = None  # type: ignore
+
+TERMINAL = ("done", "failed")
+_ABANDONED = {"code": "JOB_ABANDONED", "message": "Job lost by its worker too many times"}
+
+
+def _new_record(intent: TripIntent, session_id: str) -> Dict[str, Any]:
+    return {
+        "job_id": uuid.uuid4().hex,
+        "status": "queued",
+        "session_id": session_id,
+        "created_at": time.time(),
+        "queued_at": time.time(),
+        "attempts": 0,
+        "intent": json.loads(intent.model_dump_json()),
+    }
+
+
+def job_info(record: Dict[str, Any]) -> JobInfo:
+    return JobInfo.model_validate({k: v for k, v in record.items() if k != "intent"})
+
+
+class InMemoryJobQueue:
+    def __init__(self, ttl_seconds: int = 3600):
+        self._cond = Condition()
+        self._ttl = ttl_seconds
+        self._queue: Deque[str] = deque()
+        self._jobs: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._jobs:
+            job_id, (exp, rec) = next(iter(self._jobs.items()))
+            if exp > now or rec["status"] not in TERMINAL:
+                break
+            del self._jobs[job_id]
+
+    def submit(self, intent: TripIntent, session_id: str) -> JobInfo:
+        rec = _new_record(intent, session_id)
+        with self._cond:
+            now = time.monotonic()
+            self._expire(now)
+            self._jobs[rec["job_id"]] = (now + self._ttl, rec)
+            self._queue.append(rec["job_id"])
+            self._cond.notify_all()
+        return job_info(rec)
+
+    def claim(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next queued job marked running, or None after `timeout` seconds."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue, timeout):
+                return None
+            _, rec = self._jobs[self._queue.popleft()]
+            rec.update(status="running", started_at=time.time(), attempts=rec.get("attempts", 0) + 1)
+            return dict(rec)
+
+    def finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[Dict] = None) -> None:
+        with self._cond:
+            item = self._jobs.get(job_id)
+            if item is None:
+                return
+            item[1].update(status="failed" if error else "done", finished_at=time.time(), result=result, error=error)
+            self._jobs[job_id] = (time.monotonic() + self._ttl, item[1])
+            self._jobs.move_to_end(job_id)
+            self._cond.notify_all()
+
+    def requeue_stale(self, lease_seconds: float = JOBS_LEASE_SECONDS, max_attempts: int = JOBS_MAX_ATTEMPTS) -> int:
+        """Re-queue jobs running for longer than the lease (fail them after max_attempts); returns the count."""
+        now, n = time.time(), 0
+        with self._cond:
+            for job_id, (_, rec) in list(self._jobs.items()):
+                if rec["status"] != "running" or now - rec["started_at"] < lease_seconds:
+                    continue
+                if rec["attempts"] >= max_attempts:
+                    rec.update(status="failed", finished_at=now, error=_ABANDONED)
+                else:
+                    rec.update(status="queued", queued_at=now, started_at=None)
+                    self._queue.appendleft(job_id)
+                n += 1
+            if n:
+                self._cond.notify_all()
+        return n
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        with self._cond:
+            item = self._jobs.get(job_id)
+            return job_info(item[1]) if item else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[JobInfo]:
+        """Block until the job is done/failed or `timeout` elapses; returns its current state."""
+        with self._cond:
+            self._cond.wait_for(lambda: job_id not in self._jobs or self._jobs[job_id][1]["status"] in TERMINAL, timeout)
+            item = self._jobs.get(job_id)
+            return job_info(item[1]) if item else None
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._queue.clear()
+            self._jobs.clear()
+
+
+class RedisJobQueue:
+    def __init__(self, url: str, ttl_seconds: int = 3600, prefix: str = "job:", poll_seconds: float = 0.2):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("redis library not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self.queue_key = "jobs:queue"
+        self.processing_key = "jobs:processing"
+        self.poll = poll_seconds
+
+    def _save(self, rec: Dict[str, Any]) -> None:
+        self.client.set(f"{self.prefix}{rec['job_id']}", json.dumps(rec, ensure_ascii=False), ex=self.ttl)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(f"{self.prefix}{job_id}")
+        return json.loads(raw) if raw else None
+
+    def submit(self, intent: TripIntent, session_id: str) -> JobInfo:
+        rec = _new_record(intent, session_id)
+        self._save(rec)
+        self.client.lpush(self.queue_key, rec["job_id"])
+        return job_info(rec)
+
+    def claim(self, timeout: float) -> Optional[Dict[str, Any]]:
+        # atomically move the id to the processing list: a crash after this leaves it there for requeue_stale
+        job_id = self.client.blmove(self.queue_key, self.processing_key, max(int(timeout), 1), "RIGHT", "LEFT")
+        if not job_id:
+            return None
+        rec = self._load(job_id)
+        if rec is None:  # expired while queued
+            self.client.lrem(self.processing_key, 1, job_id)
+            return None
+        rec.update(status="running", started_at=time.time(), attempts=rec.get("attempts", 0) + 1)
+        self._save(rec)
+        return rec
+
+    def finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[Dict] = None) -> None:
+        rec = self._load(job_id)
+        if rec is not None:
+            rec.update(status="failed" if error else "done", finished_at=time.time(), result=result, error=error)
+            self._save(rec)
+        self.client.lrem(self.processing_key, 1, job_id)
+
+    def requeue_stale(self, lease_seconds: float = JOBS_LEASE_SECONDS, max_attempts: int = JOBS_MAX_ATTEMPTS) -> int:
+        """Re-queue jobs in the processing list whose lease ran out (fail them after max_attempts)."""
+        now, n = time.time(), 0
+        for job_id in self.client.lrange(self.processing_key, 0, -1):
+            rec = self._load(job_id)
+            if rec is not None:
+                # "queued" here means claimed but not yet marked running (or the claimer died right there)
+                since = rec.get("started_at") if rec["status"] == "running" else rec.get("queued_at", rec["created_at"])
+                if rec["status"] not in TERMINAL and now - (since or now) < lease_seconds:
+                    continue
+            if not self.client.lrem(self.processing_key, 1, job_id):
+                continue  # another reaper took it
+            if rec is None or rec["status"] in TERMINAL:
+                continue
+            if rec.get("attempts", 0) >= max_attempts:
+                rec.update(status="failed", finished_at=now, error=_ABANDONED)
+            else:
+                rec.update(status="queued", queued_at=now, started_at=None)
+                self.client.rpush(self.queue_key, job_id)  # claim pops from the right: next in line
+            self._save(rec)
+            n += 1
+        return n
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        rec = self._load(job_id)
+        return job_info(rec) if rec else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[JobInfo]:
+        deadline = time.monotonic() + timeout
+        while True:
+            info = self.get(job_id)
+            if info is None or info.status in TERMINAL or time.monotonic() >= deadline:
+                return info
+            time.sleep(min(self.poll, max(deadline - time.monotonic(), 0.0)))
+
+    def depth(self) -> int:  # pragma: no cover (live redis)
+        return int(self.client.llen(self.queue_key))
+
+    def clear(self) -> None:  # pragma: no cover (live redis)
+        self.client.delete(self.queue_key, self.processing_key)
+        for k in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(k)
+
+
+async def wait_job(queue, job_id: str, timeout: float, poll_seconds: float = 0.05,
+                   max_poll_seconds: float = 0.25) -> Optional[JobInfo]:
+    """Async long-poll for the API: like queue.wait, but sleeps on the event loop instead of
+    holding a worker thread. Redis reads run in a thread; in-memory reads are just a lock."""
+    async def get() -> Optional[JobInfo]:
+        return queue.get(job_id) if isinstance(queue, InMemoryJobQueue) else await asyncio.to_thread(queue.get, job_id)
+    deadline = time.monotonic() + timeout
+    poll = poll_seconds
+    while True:
+        info = await get()
+        left = deadline - time.monotonic()
+        if info is None or info.status in TERMINAL or left <= 0:
+            return info
+        await asyncio.sleep(min(poll, left))
+        poll = min(poll * 2, max_poll_seconds)
+
+
+def create_job_queue(backend: str = JOBS_BACKEND, redis_url: str | None = REDIS_URL):
+    if backend == "redis" and redis_url and redis is not None:
+        try:
+            q = RedisJobQueue(redis_url, JOBS_TTL_SECONDS)
+            q.client.ping()
+            return q
+        except Exception:  # pragma: no cover
+            return InMemoryJobQueue(JOBS_TTL_SECONDS)
+    return InMemoryJobQueue(JOBS_TTL_SECONDS)
+
+JOBS = create_job_queue()
+
+__all__ = ["JOBS", "InMemoryJobQueue", "RedisJobQueue", "create_job_queue", "job_info", "wait_job", "TERMINAL"]
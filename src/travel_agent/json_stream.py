@@ -0,0 +1,78 @@
+"""Incremental JSON parsing for streamed LLM output.
+Ref: §3.5 行程生成 (streaming)
+
+JsonArrayItemParser is fed raw text chunks and returns every element object
+of a top-level array (e.g. "days") as soon as its closing brace arrives,
+without waiting for the rest of the document.
+"""
+from __future__ import annotations
+import json
+from typing import Dict, List, Optional
+
+
+class JsonArrayItemParser:
+    def __init__(self, key: str = "days"):
+        self.key = key
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_buf: List[str] = []
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None  # depth inside the target array
+        self._item: Optional[List[str]] = None  # chars of the element being read
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume chunk; return element objects completed by it."""
+        self._chunks.append(chunk)
+        done: List[Dict] = []
+        for ch in chunk:
+            if self._item is not None:
+                self._item.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._string_buf)
+                else:
+                    self._string_buf.append(ch)
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_buf = []
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == self.key and self._array_depth is None:
+                    self._array_depth = self._depth + 1
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item = ["{"]
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._item is not None and self._depth == self._array_depth:
+                    try:
+                        done.append(json.loads("".join(self._item)))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item = None
+                elif self._array_depth is not None and self._depth < self._array_depth:
+                    self._array_depth = -1  # target array closed; ignore later arrays
+        return done
+
+    def document(self) -> Dict:
+        """Parse the full accumulated text (tolerating ``` fences)."""
+        text = self.text.strip()
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            raise json.JSONDecodeError("no JSON object", text, 0)
+        return json.loads(text[start:end + 1])
+
+
+__all__ = ["JsonArrayItemParser"]
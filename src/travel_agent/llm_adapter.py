@@ -1,16 +1,94 @@
 """Real LLM adapter (OpenAI-compatible / DeepSeek-compatible).
 Ref: §3.0 LLM选择与容错策略
 Falls back to mock if API key missing or request fails.
+
+HTTP clients are pooled per LLM_BASE_URL (keep-alive, lazily created) and
+closed at app shutdown via close_http_clients / aclose_http_clients.
+Each HTTP attempt holds a per-provider LLM_THROTTLE slot; 429/5xx and
+connection errors are retried with jittered exponential backoff or the
+server's Retry-After. Under a request deadline each attempt's timeout is
+capped at the remaining time and retries that cannot fit are skipped.
 """
 from __future__ import annotations
+import asyncio, random, time
 import httpx, json
-from typing import List, Dict
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import List, Dict, Tuple, Any, Iterable, Iterator
+from weakref import WeakKeyDictionary
 from .config import (
     LLM_BASE_URL, OPENAI_API_KEY, DEEPSEEK_API_KEY, LLM_REQUEST_TIMEOUT,
-    LLM_PRIMARY, LLM_FALLBACKS, LLM_ENABLE_HIGH_COST
+    LLM_PRIMARY, LLM_FALLBACKS, LLM_ENABLE_HIGH_COST,
+    LLM_POOL_MAX_CONNECTIONS, LLM_POOL_MAX_KEEPALIVE, LLM_POOL_KEEPALIVE_EXPIRY,
+    LLM_RETRY_MAX, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_RETRY_STATUS,
 )
 from .errors import DomainError
 from .logger import log_info, log_error
+from .llm_throttle import LLM_THROTTLE, provider_for
+from .deadline import current_deadline
+from .metrics import METRICS
+
+DEFAULT_TEMPERATURE = 0.3
+
+_POOL_LOCK = Lock()
+_CLIENTS: Dict[str, httpx.Client] = {}
+# async clients are bound to the event loop that created them: one pool per (loop, base_url),
+# dropped with the loop instead of being replaced (and leaked) when another loop asks
+_ASYNC_CLIENTS: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = WeakKeyDictionary()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_client(base_url: str = LLM_BASE_URL) -> httpx.Client:
+    """Process-wide sync client for base_url (created on first use)."""
+    client = _CLIENTS.get(base_url)
+    if client is None or client.is_closed:
+        with _POOL_LOCK:
+            client = _CLIENTS.get(base_url)
+            if client is None or client.is_closed:
+                client = httpx.Client(timeout=LLM_REQUEST_TIMEOUT, limits=_pool_limits())
+                _CLIENTS[base_url] = client
+                log_info("llm", "http_pool_created", extra={"base_url": base_url, "async": False})
+    return client
+
+
+def get_async_http_client(base_url: str = LLM_BASE_URL) -> httpx.AsyncClient:
+    """Async client for base_url bound to the running loop (each loop keeps its own,
+    since connections cannot be reused across loops)."""
+    loop = asyncio.get_running_loop()
+    with _POOL_LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(base_url)
+        if client is not None and not client.is_closed:
+            return client
+        client = clients[base_url] = httpx.AsyncClient(timeout=LLM_REQUEST_TIMEOUT, limits=_pool_limits())
+    log_info("llm", "http_pool_created", extra={"base_url": base_url, "async": True})
+    return client
+
+
+def close_http_clients() -> None:
+    """Close pooled sync clients (async clients need aclose_http_clients)."""
+    with _POOL_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for c in clients:
+        c.close()
+
+
+async def aclose_http_clients() -> None:
+    """Close async clients owned by the running loop, then the sync ones."""
+    loop = asyncio.get_running_loop()
+    with _POOL_LOCK:
+        owned = list(_ASYNC_CLIENTS.pop(loop, {}).values())
+    for c in owned:
+        await c.aclose()
+    close_http_clients()
 
 
 def _auth_key(model: str) -> str | None:
@@ -20,7 +98,7 @@ def _auth_key(model: str) -> str | None:
     return OPENAI_API_KEY or DEEPSEEK_API_KEY
 
 
-def call_chat_completion(model: str, messages: List[Dict[str, str]], *, temperature: float = 0.3) -> str:
+def _build_request(model: str, messages: List[Dict[str, str]], temperature: float) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
     key = _auth_key(model)
     if not key:
         raise DomainError("LLM_AUTH_MISSING", "No API key available")
@@ -34,18 +112,166 @@ def call_chat_completion(model: str, messages: List[Dict[str, str]], *, temperat
         "messages": messages,
         "temperature": temperature,
     }
+    return url, headers, payload
+
+
+def _read_content(resp) -> str:
+    if resp.status_code >= 400:
+        raise DomainError("LLM_HTTP_ERROR", f"{resp.status_code} {resp.text[:120]}")
     try:
-        with httpx.Client(timeout=LLM_REQUEST_TIMEOUT) as client:
-            resp = client.post(url, json=payload, headers=headers)
-        if resp.status_code >= 400:
-            raise DomainError("LLM_HTTP_ERROR", f"{resp.status_code} {resp.text[:120]}")
         data = resp.json()
-        content = data["choices"][0]["message"]["content"]
-        return content
+        return data["choices"][0]["message"]["content"]
+    except Exception as e:
+        raise DomainError("LLM_NETWORK_FAIL", str(e))
+
+
+def _retry_after_seconds(resp) -> float | None:
+    value = (getattr(resp, "headers", None) or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable(exc: Exception) -> bool:
+    # read timeouts already burned the full budget; connection-level failures are cheap to retry
+    return isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.ReadTimeout)
+
+
+def _backoff(attempt: int, retry_after: float | None) -> float:
+    if retry_after is not None:
+        return min(retry_after, LLM_RETRY_MAX_DELAY)
+    # full jitter
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _deadline_exceeded() -> DomainError:
+    current_deadline().warn("DEADLINE_LLM_FALLBACK")
+    return DomainError("LLM_DEADLINE_EXCEEDED", "request deadline reached")
+
+
+def _deadline_kw() -> Dict[str, float]:
+    """Per-attempt timeout override when a request deadline is active (client default otherwise)."""
+    dl = current_deadline()
+    if dl is None:
+        return {}
+    remaining = dl.remaining_s()
+    if remaining <= 0:
+        raise _deadline_exceeded()
+    return {"timeout": min(LLM_REQUEST_TIMEOUT, remaining)}
+
+
+def _final_error(exc: Exception) -> DomainError:
+    dl = current_deadline()
+    if dl is not None and dl.expired():
+        return _deadline_exceeded()
+    return DomainError("LLM_NETWORK_FAIL", str(exc))
+
+
+def _next_retry(model: str, attempt: int, resp=None, exc: Exception | None = None) -> float | None:
+    """Delay before retrying this attempt, or None when the outcome is final."""
+    if attempt >= LLM_RETRY_MAX:
+        return None
+    if exc is not None:
+        if not _retryable(exc):
+            return None
+        delay = _backoff(attempt, None)
+    elif resp.status_code in LLM_RETRY_STATUS:
+        delay = _backoff(attempt, _retry_after_seconds(resp))
+    else:
+        return None
+    dl = current_deadline()
+    if dl is not None and delay >= dl.remaining_s():
+        return None  # the retry could not finish in time
+    provider = provider_for(model)
+    METRICS.llm_retry(provider)
+    log_info("llm", "retry", extra={"model": model, "attempt": attempt + 1, "delay_s": round(delay, 3),
+                                    "status": getattr(resp, "status_code", None), "error": str(exc) if exc else None})
+    return delay
+
+
+def call_chat_completion(model: str, messages: List[Dict[str, str]], *, temperature: float = DEFAULT_TEMPERATURE) -> str:
+    url, headers, payload = _build_request(model, messages, temperature)
+    provider = provider_for(model)
+    attempt = 0
+    while True:
+        resp, exc = None, None
+        try:
+            with LLM_THROTTLE.slot(provider):
+                resp = get_http_client().post(url, json=payload, headers=headers, **_deadline_kw())
+        except DomainError:
+            raise
+        except Exception as e:
+            exc = e
+        delay = _next_retry(model, attempt, resp, exc)
+        if delay is None:
+            if exc is not None:
+                raise _final_error(exc)
+            return _read_content(resp)
+        time.sleep(delay)  # slot released while backing off
+        attempt += 1
+
+
+async def acall_chat_completion(model: str, messages: List[Dict[str, str]], *, temperature: float = DEFAULT_TEMPERATURE) -> str:
+    """Async variant of call_chat_completion on the pooled AsyncClient."""
+    url, headers, payload = _build_request(model, messages, temperature)
+    provider = provider_for(model)
+    attempt = 0
+    while True:
+        resp, exc = None, None
+        try:
+            async with LLM_THROTTLE.aslot(provider):
+                resp = await get_async_http_client().post(url, json=payload, headers=headers, **_deadline_kw())
+        except DomainError:
+            raise
+        except Exception as e:
+            exc = e
+        delay = _next_retry(model, attempt, resp, exc)
+        if delay is None:
+            if exc is not None:
+                raise _final_error(exc)
+            return _read_content(resp)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _sse_deltas(lines: Iterable[str]) -> Iterator[str]:
+    """Yield content deltas from OpenAI-compatible SSE lines."""
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        except (json.JSONDecodeError, KeyError, IndexError):
+            continue
+        if delta:
+            yield delta
+
+
+def stream_chat_completion(model: str, messages: List[Dict[str, str]], *, temperature: float = DEFAULT_TEMPERATURE) -> Iterator[str]:
+    """Streaming (stream=true) variant of call_chat_completion yielding content deltas."""
+    url, headers, payload = _build_request(model, messages, temperature)
+    payload["stream"] = True
+    try:
+        with LLM_THROTTLE.slot(provider_for(model)), get_http_client().stream("POST", url, json=payload, headers=headers,
+                                                                                    **_deadline_kw()) as resp:
+            if resp.status_code >= 400:
+                resp.read()
+                raise DomainError("LLM_HTTP_ERROR", f"{resp.status_code} {resp.text[:120]}")
+            yield from _sse_deltas(resp.iter_lines())
     except DomainError:
         raise
     except Exception as e:
-        raise DomainError("LLM_NETWORK_FAIL", str(e))
+        raise _final_error(e)
 
 
 def ensure_json(content: str) -> Dict:
@@ -55,7 +281,18 @@ def ensure_json(content: str) -> Dict:
         raise DomainError("LLM_JSON_INVALID", "Invalid JSON from provider")
 
 
-def chat_json(model: str, prompt: str) -> Dict:
+def chat_json(model: str, prompt: str, *, temperature: float = DEFAULT_TEMPERATURE) -> Dict:
+    messages = [{"role": "user", "content": prompt}]
+    content = call_chat_completion(model, messages, temperature=temperature)
+    return ensure_json(content)
+
+
+def chat_stream(model: str, prompt: str, *, temperature: float = DEFAULT_TEMPERATURE) -> Iterator[str]:
+    messages = [{"role": "user", "content": prompt}]
+    return stream_chat_completion(model, messages, temperature=temperature)
+
+
+async def achat_json(model: str, prompt: str, *, temperature: float = DEFAULT_TEMPERATURE) -> Dict:
     messages = [{"role": "user", "content": prompt}]
-    content = call_chat_completion(model, messages)
+    content = await acall_chat_completion(model, messages, temperature=temperature)
     return ensure_json(content)
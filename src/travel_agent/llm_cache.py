@@ -0,0 +1,105 @@
+"""Content-addressed LLM response cache.
+Ref: §3.0 LLM选择与容错策略 + §7 会话与缓存策略
+
+Key = sha256(model, prompt, temperature). Only real provider responses are
+stored (mock/degraded content never enters the cache).
+
+- InMemoryLLMCache: size-bounded LRU with per-entry TTL
+- RedisLLMCache: optional, SETEX with TTL (shared across workers); a Redis
+  error is a miss / dropped write, never a failed LLM call
+"""
+from __future__ import annotations
+import hashlib, json, time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+from .config import LLM_CACHE_BACKEND, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES, REDIS_URL
+from .logger import log_error
+
+try:  # optional dependency
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover
+    redis = None  # type: ignore
+
+
+def llm_cache_key(model: str, prompt: str, temperature: float) -> str:
+    s = json.dumps([model, prompt, round(float(temperature), 3)], ensure_ascii=False)
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+class InMemoryLLMCache:
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600):
+        self._lock = Lock()
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)  # evict least recently used
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisLLMCache:
+    def __init__(self, url: str, ttl_seconds: int = 3600, prefix: str = "llmc:"):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("redis library not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._ttl = ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self.client.get(f"{self.prefix}{key}")
+        except Exception as e:  # redis unavailable: behave as a miss
+            log_error("llm", str(e), code="LLM_CACHE_UNAVAILABLE", session_id="n/a")
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        try:
+            self.client.set(f"{self.prefix}{key}", value, ex=self._ttl)
+        except Exception as e:  # redis unavailable: skip caching
+            log_error("llm", str(e), code="LLM_CACHE_UNAVAILABLE", session_id="n/a")
+
+    def clear(self) -> None:  # pragma: no cover (depends on live redis)
+        for k in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(k)
+
+
+def create_llm_cache(backend: str, redis_url: str | None) -> InMemoryLLMCache | RedisLLMCache:
+    if backend == "redis" and redis_url and redis is not None:
+        try:
+            cache = RedisLLMCache(redis_url, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+            cache.client.ping()
+            return cache
+        except Exception:  # pragma: no cover
+            pass
+    return InMemoryLLMCache(max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+
+
+LLM_CACHE = create_llm_cache(LLM_CACHE_BACKEND, REDIS_URL)
+
+__all__ = ["LLM_CACHE", "llm_cache_key", "InMemoryLLMCache", "RedisLLMCache", "create_llm_cache"]
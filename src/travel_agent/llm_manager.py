@@ -2,14 +2,32 @@
 Ref: §3.0 LLM选择与容错策略
 """
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from threading import Lock, Timer
+import asyncio
+import contextvars
 import json
 from .errors import DomainError
-from .config import LLM_PRIMARY, LLM_FALLBACKS, LLM_MAX_REPAIR, LLM_ENABLE_HIGH_COST
-from .llm_adapter import chat_json
+from .config import (
+    LLM_PRIMARY, LLM_FALLBACKS, LLM_MAX_REPAIR, LLM_ENABLE_HIGH_COST, LLM_CACHE_ENABLE,
+    LLM_HEDGE_ENABLE, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_DEFAULT_DELAY_MS,
+    LLM_HEDGE_MIN_DELAY_MS, LLM_HEDGE_MAX_WORKERS, LLM_CB_ENABLE,
+    LLM_BATCH_ENABLE, LLM_BATCH_WINDOW_MS, LLM_BATCH_MAX,
+)
+from .llm_adapter import chat_json, achat_json, chat_stream, DEFAULT_TEMPERATURE
+from .json_stream import JsonArrayItemParser
+from .llm_cache import LLM_CACHE, llm_cache_key
 from .logger import log_info, log_error
-from .metrics import METRICS
+from .metrics import METRICS, METRICS_LLM
 from .prompt_audit import PROMPT_AUDIT
+from .prompt_builder import ITINERARY_TAG, build_itinerary_prompt, itinerary_brief
+from .singleflight import SingleFlight
+from .circuit_breaker import LLM_BREAKERS
+from .deadline import current_deadline, earliest_deadline, use_deadline
+
+# concurrent identical prompts share one provider call
+LLM_FLIGHT = SingleFlight("llm")
 
 def llm_select_model(index: int = 0) -> str:
     """Select model by index through primary+fallback chain."""
@@ -18,67 +36,520 @@ def llm_select_model(index: int = 0) -> str:
         return chain[index]
     raise DomainError("LLM_FALLBACK_EXHAUSTED", "All models exhausted")
 
-def llm_invoke(model: str, prompt: str, *, json_mode: bool = True, timeout: int = 25) -> str:
+def llm_model_chain() -> List[str]:
+    return [LLM_PRIMARY] + LLM_FALLBACKS
+
+def llm_healthy_chain() -> List[str]:
+    """Primary+fallback chain without models whose circuit breaker is open."""
+    chain = llm_model_chain()
+    if not LLM_CB_ENABLE:
+        return chain
+    return [m for m in chain if LLM_BREAKERS.get(m).available()]
+
+def llm_invoke(model: str, prompt: str, *, json_mode: bool = True, timeout: int = 25, temperature: float = DEFAULT_TEMPERATURE) -> str:
+    """Invoke model; identical in-flight (model, prompt, temperature) calls are coalesced."""
+    raw, _ = LLM_FLIGHT.do(llm_cache_key(model, prompt, temperature),
+                           lambda: _llm_invoke(model, prompt, json_mode=json_mode, temperature=temperature))
+    return raw
+
+def _admit(model: str) -> None:
+    """Claim the breaker for one provider call (a half-open breaker lets a single probe through)."""
+    if LLM_CB_ENABLE and not LLM_BREAKERS.get(model).acquire():
+        raise DomainError("LLM_CIRCUIT_OPEN", "circuit open", detail=model)
+
+def _provider_call(model: str, prompt: str, temperature: float) -> str:
+    """Raw provider call (raises DomainError); records per-model latency, caches success."""
+    _admit(model)
+    start = __import__("time").time()
+    METRICS.llm_call()
+    try:
+        data = chat_json(model, prompt, temperature=temperature)
+    except DomainError as de:
+        _record_provider_failure(model, de, start)
+        raise
+    return _record_provider_success(model, prompt, temperature, data, start)
+
+async def _provider_call_async(model: str, prompt: str, temperature: float) -> str:
+    """_provider_call on the pooled async HTTP client."""
+    _admit(model)
+    start = __import__("time").time()
+    METRICS.llm_call()
+    try:
+        data = await achat_json(model, prompt, temperature=temperature)
+    except DomainError as de:
+        _record_provider_failure(model, de, start)
+        raise
+    except asyncio.CancelledError:  # hedge loser: no verdict on the provider
+        LLM_BREAKERS.get(model).release()
+        raise
+    return _record_provider_success(model, prompt, temperature, data, start)
+
+def _record_provider_failure(model: str, de: DomainError, start: float) -> None:
+    if de.code not in ("LLM_AUTH_MISSING", "LLM_DEADLINE_EXCEEDED"):  # config / our own budget, not provider health
+        LLM_BREAKERS.get(model).record(False, (__import__("time").time() - start) * 1000.0)
+    else:
+        LLM_BREAKERS.get(model).release()
+
+def _record_provider_success(model: str, prompt: str, temperature: float, data: Dict, start: float) -> str:
+    latency_ms = (__import__("time").time() - start) * 1000.0
+    LLM_BREAKERS.get(model).record(True, latency_ms)
+    METRICS_LLM.observe(model, latency_ms)
+    raw = json.dumps(data, ensure_ascii=False)
+    if LLM_CACHE_ENABLE:
+        # only real provider content is cached; mock fallbacks never are
+        LLM_CACHE.put(llm_cache_key(model, prompt, temperature), raw)
+    return raw
+
+def _fallback_content(prompt: str) -> str:
+    if ITINERARY_TAG in prompt:
+        METRICS.llm_fallback()
+        return json.dumps({
+            "days": [{"day_index": 1, "main_spots": ["自由活动"], "meals": ["早餐","午餐","晚餐"], "notes": "占位(降级)"}],
+            "summary": "占位行程 (LLM降级)"
+        }, ensure_ascii=False)
+    return json.dumps({"parsed": True, "fallback": True}, ensure_ascii=False)
+
+def _llm_invoke(model: str, prompt: str, *, json_mode: bool, temperature: float) -> str:
     start = __import__("time").time()
     # Explicit failure trigger for test scenario
     if "FAIL_JSON" in prompt:
         return "NOT VALID JSON"
-    METRICS.llm_call()
     try:
-        # real call attempt
-        if json_mode:
-            # expect provider returns JSON directly
-            data = chat_json(model, prompt)
-            raw = json.dumps(data, ensure_ascii=False)
-        else:
-            data = chat_json(model, prompt)
-            raw = json.dumps(data, ensure_ascii=False)
+        # real call attempt; provider is expected to return JSON directly in both modes
+        raw = _provider_call(model, prompt, temperature)
         log_info("llm", "success", extra={"model": model, "json_mode": json_mode}, session_id="n/a", start_ts=start)
         return raw
     except DomainError as de:
         METRICS.llm_error()
         log_error("llm", de.message, code=de.code, session_id="n/a", extra={"model": model})
         # fallback to mock content
-        if "GENERATE_ITINERARY" in prompt:
-            METRICS.llm_fallback()
-            return json.dumps({
-                "days": [{"day_index": 1, "main_spots": ["自由活动"], "meals": ["早餐","午餐","晚餐"], "notes": "占位(降级)"}],
-                "summary": "占位行程 (LLM降级)"
-            }, ensure_ascii=False)
-        return json.dumps({"parsed": True, "fallback": True}, ensure_ascii=False)
+        return _fallback_content(prompt)
+
+async def llm_invoke_async(model: str, prompt: str, *, json_mode: bool = True, temperature: float = DEFAULT_TEMPERATURE) -> str:
+    """Async llm_invoke; coalesces with other in-flight async calls on the same loop."""
+    raw, _ = await LLM_FLIGHT.do_async(llm_cache_key(model, prompt, temperature),
+                                       lambda: _llm_invoke_async(model, prompt, json_mode=json_mode, temperature=temperature))
+    return raw
+
+async def _llm_invoke_async(model: str, prompt: str, *, json_mode: bool, temperature: float) -> str:
+    start = __import__("time").time()
+    if "FAIL_JSON" in prompt:
+        return "NOT VALID JSON"
+    try:
+        raw = await _provider_call_async(model, prompt, temperature)
+        log_info("llm", "success", extra={"model": model, "json_mode": json_mode, "async": True}, session_id="n/a", start_ts=start)
+        return raw
+    except DomainError as de:
+        METRICS.llm_error()
+        log_error("llm", de.message, code=de.code, session_id="n/a", extra={"model": model})
+        return _fallback_content(prompt)
+
+_HEDGE_POOL: ThreadPoolExecutor | None = None
+
+def _hedge_pool() -> ThreadPoolExecutor:
+    global _HEDGE_POOL
+    if _HEDGE_POOL is None:
+        _HEDGE_POOL = ThreadPoolExecutor(max_workers=LLM_HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+    return _HEDGE_POOL
+
+def _hedge_delay_s(model: str) -> float:
+    observed = METRICS_LLM.percentile(model, LLM_HEDGE_PERCENTILE, min_samples=LLM_HEDGE_MIN_SAMPLES)
+    delay_ms = observed if observed is not None else LLM_HEDGE_DEFAULT_DELAY_MS
+    return max(delay_ms, LLM_HEDGE_MIN_DELAY_MS) / 1000.0
+
+def llm_invoke_hedged(prompt: str, temperature: float = DEFAULT_TEMPERATURE) -> Tuple[str, str]:
+    """Call the primary; if it has not answered within its adaptive delay (observed
+    percentile latency), race the next model and return (model, raw) of the first valid JSON.
+    Running sync calls cannot be interrupted: the loser finishes in the pool and is discarded.
+    """
+    chain = llm_healthy_chain() or llm_model_chain()
+    primary = chain[0]
+    if len(chain) < 2:
+        return primary, llm_invoke(primary, prompt, temperature=temperature)
+    backup = chain[1]
+    if "FAIL_JSON" in prompt:
+        return primary, llm_invoke(primary, prompt, temperature=temperature)
+    pool = _hedge_pool()
+    # pool threads do not inherit the request context: carry the deadline so attempts stay capped by it
+    futures: Dict[Future, str] = {pool.submit(contextvars.copy_context().run, _provider_call, primary, prompt, temperature): primary}
+    done, pending = wait(futures, timeout=_hedge_delay_s(primary))
+    if not done:
+        METRICS_LLM.hedge_fired(primary)
+        log_info("llm", "hedge_fired", extra={"primary": primary, "backup": backup}, session_id="n/a")
+        futures[pool.submit(contextvars.copy_context().run, _provider_call, backup, prompt, temperature)] = backup
+        pending = set(futures)
+    while done or pending:
+        for f in done:
+            try:
+                raw = f.result()
+                json.loads(raw)
+            except (DomainError, ValueError) as e:
+                METRICS.llm_error()
+                log_error("llm", str(e), code=getattr(e, "code", "LLM_JSON_INVALID"), session_id="n/a", extra={"model": futures[f], "hedged": True})
+                continue
+            for p in pending:
+                p.cancel()  # only prevents not-yet-started calls
+            if len(futures) > 1:
+                METRICS_LLM.race_result(futures.values(), futures[f])
+            return futures[f], raw
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    # every raced model failed: degrade exactly like llm_invoke
+    return primary, _fallback_content(prompt)
+
+async def llm_invoke_hedged_async(prompt: str, temperature: float = DEFAULT_TEMPERATURE) -> Tuple[str, str]:
+    """Async llm_invoke_hedged; unlike the threaded variant the losing call is cancelled."""
+    chain = llm_healthy_chain() or llm_model_chain()
+    primary = chain[0]
+    if len(chain) < 2 or "FAIL_JSON" in prompt:
+        return primary, await llm_invoke_async(primary, prompt, temperature=temperature)
+    backup = chain[1]
+    tasks: Dict[asyncio.Task, str] = {asyncio.ensure_future(_provider_call_async(primary, prompt, temperature)): primary}
+    done, pending = await asyncio.wait(tasks, timeout=_hedge_delay_s(primary))
+    if not done:
+        METRICS_LLM.hedge_fired(primary)
+        log_info("llm", "hedge_fired", extra={"primary": primary, "backup": backup, "async": True}, session_id="n/a")
+        tasks[asyncio.ensure_future(_provider_call_async(backup, prompt, temperature))] = backup
+        pending = set(tasks)
+    try:
+        while done or pending:
+            for t in done:
+                try:
+                    raw = t.result()
+                    json.loads(raw)
+                except (DomainError, ValueError) as e:
+                    METRICS.llm_error()
+                    log_error("llm", str(e), code=getattr(e, "code", "LLM_JSON_INVALID"), session_id="n/a", extra={"model": tasks[t], "hedged": True})
+                    continue
+                if len(tasks) > 1:
+                    METRICS_LLM.race_result(tasks.values(), tasks[t])
+                return tasks[t], raw
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+    return primary, _fallback_content(prompt)
+
+def _prompt_tag(prompt: str) -> str:
+    return "itinerary" if ITINERARY_TAG in prompt else "generic"
+
+def _cache_lookup(model: str, prompt: str) -> str | None:
+    raw = LLM_CACHE.get(llm_cache_key(model, prompt, DEFAULT_TEMPERATURE)) if LLM_CACHE_ENABLE else None
+    if raw is not None:
+        METRICS.llm_cache_hit()
+        log_info("llm", "cache_hit", extra={"model": model}, session_id="n/a")
+    elif LLM_CACHE_ENABLE:
+        METRICS.llm_cache_miss()
+    return raw
+
+def _circuit_open_fallback(prompt: str, attempt: int) -> Dict:
+    # every breaker open: degrade immediately instead of waiting on known-bad providers
+    log_error("llm", "all_circuits_open", code="LLM_CIRCUIT_OPEN", session_id="n/a")
+    raw = _fallback_content(prompt)
+    PROMPT_AUDIT.record(model="circuit_open", prompt_tag=_prompt_tag(prompt), prompt=prompt,
+                        response=raw, json_valid=True, repair_attempts=attempt, fallback_used=True, error_code="LLM_CIRCUIT_OPEN")
+    return json.loads(raw)
+
+def _parse_attempt(model: str, prompt: str, raw: str, attempt: int, cache_hit: bool) -> Dict | None:
+    """Parsed JSON (audited), or None when a repair attempt should follow; raises when repairs are exhausted."""
+    try:
+        parsed = json.loads(raw)
+        PROMPT_AUDIT.record(model=model, prompt_tag=_prompt_tag(prompt), prompt=prompt,
+                            response=raw, json_valid=True, repair_attempts=attempt, fallback_used=(attempt > 0), error_code=None,
+                            cache_hit=cache_hit)
+        return parsed
+    except json.JSONDecodeError:
+        if attempt >= LLM_MAX_REPAIR:
+            PROMPT_AUDIT.record(model=model, prompt_tag=_prompt_tag(prompt), prompt=prompt,
+                                response=raw, json_valid=False, repair_attempts=attempt, fallback_used=True, error_code="LLM_JSON_INVALID",
+                                cache_hit=cache_hit)
+            raise DomainError("LLM_JSON_INVALID", "JSON repair failed")
+        METRICS.llm_fallback()
+        return None
 
 def llm_safe_json(prompt: str) -> Dict:
     """Attempt JSON parse with single repair cycle.
     Ref: §3.0 容错机制
     """
-    last_raw = ""
-    last_model = ""
+    healthy = llm_healthy_chain()
     for attempt in range(LLM_MAX_REPAIR + 1):
-        model = llm_select_model(attempt)
-        last_model = model
-        raw = llm_invoke(model, prompt, json_mode=True)
-        last_raw = raw
-        try:
-            parsed = json.loads(raw)
-            PROMPT_AUDIT.record(model=model, prompt_tag="itinerary" if "GENERATE_ITINERARY" in prompt else "generic", prompt=prompt,
-                                response=raw, json_valid=True, repair_attempts=attempt, fallback_used=(attempt > 0), error_code=None)
+        if LLM_CB_ENABLE and not healthy:
+            return _circuit_open_fallback(prompt, attempt)
+        model = healthy[min(attempt, len(healthy) - 1)] if LLM_CB_ENABLE else llm_select_model(attempt)
+        raw = _cache_lookup(model, prompt)
+        cache_hit = raw is not None
+        if not cache_hit:
+            if attempt == 0 and LLM_HEDGE_ENABLE:
+                model, raw = LLM_FLIGHT.do("hedge:" + llm_cache_key(model, prompt, DEFAULT_TEMPERATURE),
+                                           lambda: llm_invoke_hedged(prompt))[0]
+            else:
+                raw = llm_invoke(model, prompt, json_mode=True)
+        parsed = _parse_attempt(model, prompt, raw, attempt, cache_hit)
+        if parsed is not None:
+            return parsed
+        prompt += "\n请只输出有效 JSON"  # modify prompt and retry
+    raise DomainError("LLM_JSON_INVALID", "Unexpected path")
+
+async def llm_safe_json_async(prompt: str) -> Dict:
+    """Async llm_safe_json: same repair / breaker / cache / hedge semantics, never blocks the loop."""
+    healthy = llm_healthy_chain()
+    for attempt in range(LLM_MAX_REPAIR + 1):
+        if LLM_CB_ENABLE and not healthy:
+            return _circuit_open_fallback(prompt, attempt)
+        model = healthy[min(attempt, len(healthy) - 1)] if LLM_CB_ENABLE else llm_select_model(attempt)
+        raw = _cache_lookup(model, prompt)
+        cache_hit = raw is not None
+        if not cache_hit:
+            if attempt == 0 and LLM_HEDGE_ENABLE:
+                (model, raw), _ = await LLM_FLIGHT.do_async("hedge:" + llm_cache_key(model, prompt, DEFAULT_TEMPERATURE),
+                                                            lambda: llm_invoke_hedged_async(prompt))
+            else:
+                raw = await llm_invoke_async(model, prompt, json_mode=True)
+        parsed = _parse_attempt(model, prompt, raw, attempt, cache_hit)
+        if parsed is not None:
             return parsed
-        except json.JSONDecodeError:
-            if attempt >= LLM_MAX_REPAIR:
-                PROMPT_AUDIT.record(model=model, prompt_tag="itinerary" if "GENERATE_ITINERARY" in prompt else "generic", prompt=prompt,
-                                    response=raw, json_valid=False, repair_attempts=attempt, fallback_used=True, error_code="LLM_JSON_INVALID")
-                raise DomainError("LLM_JSON_INVALID", "JSON repair failed")
-            METRICS.llm_fallback()
-            prompt += "\n请只输出有效 JSON"  # modify prompt and retry
-    PROMPT_AUDIT.record(model=last_model, prompt_tag="itinerary" if "GENERATE_ITINERARY" in prompt else "generic", prompt=prompt,
-                        response=last_raw, json_valid=False, repair_attempts=LLM_MAX_REPAIR, fallback_used=True, error_code="LLM_JSON_INVALID")
+        prompt += "\n请只输出有效 JSON"
     raise DomainError("LLM_JSON_INVALID", "Unexpected path")
 
+def _day_plan(intent, d: Dict):
+    from .models import DayPlan
+    return DayPlan(day_index=d["day_index"], date=intent.depart_date, main_spots=d["main_spots"], meals=d["meals"], notes=d.get("notes"))
+
 def llm_itinerary_generate(intent, spots: List[str]):
     """Generate itinerary using mock LLM response.
     Ref: §3.5 行程生成 NOTE + §3.0 fallback
+    With LLM_BATCH_ENABLE the request joins the current micro-batch.
     """
-    payload = llm_safe_json("GENERATE_ITINERARY")
-    from .models import DayPlan, Itinerary
-    day_plans = [DayPlan(day_index=d["day_index"], date=intent.depart_date, main_spots=d["main_spots"], meals=d["meals"], notes=d.get("notes")) for d in payload["days"]]
+    if LLM_BATCH_ENABLE:
+        return ITINERARY_BATCHER.submit(intent, spots).result()
+    return _itinerary_single(intent, spots)
+
+def _itinerary_single(intent, spots: List[str]):
+    payload = llm_safe_json(build_itinerary_prompt(intent, spots).text)
+    from .models import Itinerary
+    day_plans = [_day_plan(intent, d) for d in payload["days"]]
     return Itinerary(days=day_plans, summary=payload["summary"])
+
+def llm_itinerary_fallback(intent):
+    """Degraded itinerary (the same placeholder as a failed LLM call) without any provider call."""
+    from .models import Itinerary
+    payload = json.loads(_fallback_content(ITINERARY_TAG))
+    return Itinerary(days=[_day_plan(intent, d) for d in payload["days"]], summary=payload["summary"])
+
+async def llm_itinerary_generate_async(intent, spots: List[str]):
+    """Async llm_itinerary_generate (micro-batches are awaited without blocking the loop)."""
+    if LLM_BATCH_ENABLE:
+        return await ITINERARY_BATCHER.asubmit(intent, spots)
+    payload = await llm_safe_json_async(build_itinerary_prompt(intent, spots).text)
+    from .models import Itinerary
+    return Itinerary(days=[_day_plan(intent, d) for d in payload["days"]], summary=payload["summary"])
+
+def _batch_prompt(items: List[Tuple]) -> str:
+    briefs = [itinerary_brief(f"r{i}", intent, spots) for i, (intent, spots) in enumerate(items)]
+    return (
+        f"{ITINERARY_TAG}_BATCH\n"
+        "为下列每个请求分别生成行程，只输出JSON："
+        '{"results":[{"id":"<请求id>","days":[{"day_index":1,"main_spots":[],"meals":[],"notes":""}],"summary":""}]}\n'
+        + json.dumps(briefs, ensure_ascii=False, sort_keys=True)
+    )
+
+def _generate_batch(items: List[Tuple]) -> List:
+    """One LLM request for several (intent, spots); items missing or malformed in the
+    response fall back to single calls. Returns Itinerary or the DomainError per item.
+    """
+    from .models import Itinerary
+    if len(items) == 1:
+        try:
+            return [_itinerary_single(*items[0])]
+        except DomainError as de:
+            return [de]
+    METRICS.llm_batch(len(items))
+    out: List = [None] * len(items)
+    try:
+        payload = llm_safe_json(_batch_prompt(items))
+        results = payload.get("results") if isinstance(payload, dict) else None
+        by_id = {str(r.get("id")): r for r in (results or []) if isinstance(r, dict)}
+        for i, (intent, _spots) in enumerate(items):
+            r = by_id.get(f"r{i}")
+            if r is None:
+                continue
+            try:
+                out[i] = Itinerary(days=[_day_plan(intent, d) for d in r["days"]], summary=r["summary"])
+            except (KeyError, TypeError, ValueError):
+                pass
+    except DomainError as de:
+        log_error("llm", de.message, code=de.code, session_id="n/a", extra={"batch_size": len(items)})
+    missing = [i for i, it in enumerate(out) if it is None]
+    if missing:
+        METRICS.llm_batch_fallback()
+        log_info("llm", "batch_split", extra={"size": len(items), "missing": len(missing)}, session_id="n/a")
+        for i in missing:
+            try:
+                out[i] = _itinerary_single(*items[i])
+            except DomainError as de:
+                out[i] = de
+    return out
+
+class ItineraryBatcher:
+    """Collects itinerary requests for a short window (or until max_batch) and
+    sends them as one batched LLM request. Callers block on their Future. The
+    flush runs under the earliest deadline of the queued requests (the timer
+    thread has no request context of its own).
+    """
+
+    def __init__(self, window_ms: int = LLM_BATCH_WINDOW_MS, max_batch: int = LLM_BATCH_MAX):
+        self._lock = Lock()
+        self._window = window_ms / 1000.0
+        self._max = max(max_batch, 1)
+        self._pending: List[Tuple] = []
+        self._timer: Timer | None = None
+
+    def submit(self, intent, spots: List[str]) -> Future:
+        fut, batch = self._enqueue(intent, spots)
+        if batch:
+            self._run(batch)
+        return fut
+
+    async def asubmit(self, intent, spots: List[str]):
+        """submit() for coroutines: a full batch is flushed on a worker thread, not on the loop."""
+        fut, batch = self._enqueue(intent, spots)
+        if batch:
+            await asyncio.to_thread(self._run, batch)
+        return await asyncio.wrap_future(fut)
+
+    def _enqueue(self, intent, spots: List[str]) -> Tuple[Future, List[Tuple] | None]:
+        fut: Future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((intent, spots, fut, current_deadline()))
+            if len(self._pending) >= self._max:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = Timer(self._window, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        return fut, batch
+
+    def _take(self) -> List[Tuple]:
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch: List[Tuple]) -> None:
+        try:
+            with use_deadline(earliest_deadline(dl for *_, dl in batch)):
+                results = _generate_batch([(intent, spots) for intent, spots, _, _ in batch])
+        except BaseException as e:
+            for _, _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+        for (_, _, fut, _), res in zip(batch, results):
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+ITINERARY_BATCHER = ItineraryBatcher()
+
+def llm_itinerary_generate_many(items: List[Tuple]) -> List:
+    """Batch planner / pre-warm entry: itineraries for many (intent, spots) pairs,
+    packed LLM_BATCH_MAX per request without waiting for the batching window.
+    """
+    out: List = []
+    for i in range(0, len(items), max(LLM_BATCH_MAX, 1)):
+        out.extend(_generate_batch(items[i:i + LLM_BATCH_MAX]))
+    for res in out:
+        if isinstance(res, DomainError):
+            raise res
+    return out
+
+class ItineraryStream:
+    """Iterator of DayPlan yielded as soon as each streamed day object closes.
+    Ref: §3.5 行程生成 (streaming)
+
+    Cached responses replay immediately. Provider/stream errors fall back to
+    llm_safe_json for the days not yet yielded. After iteration, `summary`
+    and `itinerary()` describe the whole plan.
+    """
+
+    def __init__(self, intent, spots: List[str]):
+        self.intent = intent
+        self.spots = spots
+        self.summary = ""
+        self.days: List = []
+
+    def __iter__(self) -> Iterator:
+        for d in self._day_dicts():
+            plan = _day_plan(self.intent, d)
+            self.days.append(plan)
+            yield plan
+
+    def itinerary(self):
+        from .models import Itinerary
+        return Itinerary(days=self.days, summary=self.summary)
+
+    def _day_dicts(self) -> Iterator[Dict]:
+        prompt = build_itinerary_prompt(self.intent, self.spots).text
+        model = (llm_healthy_chain() or llm_model_chain())[0]
+        key = llm_cache_key(model, prompt, DEFAULT_TEMPERATURE)
+        cached = LLM_CACHE.get(key) if LLM_CACHE_ENABLE else None
+        if cached is not None:
+            METRICS.llm_cache_hit()
+            doc = json.loads(cached)
+            self.summary = doc.get("summary", "")
+            yield from doc["days"]
+            return
+        if LLM_CACHE_ENABLE:
+            METRICS.llm_cache_miss()
+        start = __import__("time").time()
+        METRICS.llm_call()
+        parser = JsonArrayItemParser("days")
+        emitted = set()
+        try:
+            _admit(model)
+            for delta in chat_stream(model, prompt):
+                for d in parser.feed(delta):
+                    _day_plan(self.intent, d)  # validate before handing out
+                    emitted.add(d["day_index"])
+                    yield d
+            doc = parser.document()
+            LLM_BREAKERS.get(model).record(True, (__import__("time").time() - start) * 1000.0)
+            self.summary = doc.get("summary", "")
+            raw = json.dumps(doc, ensure_ascii=False)
+            if LLM_CACHE_ENABLE:
+                LLM_CACHE.put(key, raw)
+            PROMPT_AUDIT.record(model=model, prompt_tag="itinerary", prompt=prompt, response=raw, json_valid=True,
+                                repair_attempts=0, fallback_used=False, error_code=None)
+            log_info("llm", "stream_success", extra={"model": model, "days": len(emitted)}, session_id="n/a", start_ts=start)
+            return
+        except DomainError as de:
+            METRICS.llm_error()
+            if de.code not in ("LLM_AUTH_MISSING", "LLM_DEADLINE_EXCEEDED", "LLM_CIRCUIT_OPEN"):
+                LLM_BREAKERS.get(model).record(False, (__import__("time").time() - start) * 1000.0)
+            elif de.code != "LLM_CIRCUIT_OPEN":
+                LLM_BREAKERS.get(model).release()
+            log_error("llm", de.message, code=de.code, session_id="n/a", extra={"model": model, "stream": True})
+        except (ValueError, KeyError, TypeError) as e:
+            METRICS.llm_error()
+            LLM_BREAKERS.get(model).record(False, (__import__("time").time() - start) * 1000.0)
+            log_error("llm", str(e), code="LLM_JSON_INVALID", session_id="n/a", extra={"model": model, "stream": True})
+        payload = llm_safe_json(prompt)
+        self.summary = payload["summary"]
+        for d in payload["days"]:
+            if d["day_index"] not in emitted:
+                yield d
+
+def llm_itinerary_stream(intent, spots: List[str]) -> ItineraryStream:
+    return ItineraryStream(intent, spots)
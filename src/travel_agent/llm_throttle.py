@@ -0,0 +1,165 @@
+"""Per-provider outbound LLM throttling.
+Ref: §3.0 LLM选择与容错策略
+
+- local concurrency cap per provider: one semaphore shared by the sync and
+  async paths, so mixing them (or running several event loops) cannot exceed
+  LLM_MAX_CONCURRENCY; async callers wait for it on a worker thread
+- optional Redis token bucket shared by all workers (LLM_RATE_SHARED)
+Waiting longer than LLM_QUEUE_TIMEOUT_SECONDS for a slot raises LLM_OVERLOADED.
+"""
+from __future__ import annotations
+import asyncio, time
+from contextlib import contextmanager, asynccontextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Dict
+from .config import (
+    LLM_MAX_CONCURRENCY, LLM_QUEUE_TIMEOUT_SECONDS, LLM_RATE_SHARED,
+    LLM_RATE_LIMIT_RPS, LLM_RATE_LIMIT_BURST, REDIS_URL,
+)
+from .errors import DomainError
+
+try:  # optional dependency
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover
+    redis = None  # type: ignore
+
+# Returns seconds to wait before a token is available (0 = token taken).
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+def provider_for(model: str) -> str:
+    if model.startswith("deepseek"):
+        return "deepseek"
+    if model.startswith("claude"):
+        return "anthropic"
+    return "openai"
+
+
+class RedisTokenBucket:
+    def __init__(self, url: str, rate: float, burst: int, prefix: str = "llmrate:"):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("redis library not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._script = self.client.register_script(_TOKEN_BUCKET_LUA)
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+
+    def wait_seconds(self, provider: str) -> float:
+        return float(self._script(keys=[f"{self.prefix}{provider}"], args=[self.rate, self.burst, time.time()]))
+
+
+def _create_bucket() -> RedisTokenBucket | None:
+    if not (LLM_RATE_SHARED and REDIS_URL and redis is not None):
+        return None
+    try:
+        bucket = RedisTokenBucket(REDIS_URL, LLM_RATE_LIMIT_RPS, LLM_RATE_LIMIT_BURST)
+        bucket.client.ping()
+        return bucket
+    except Exception:  # pragma: no cover
+        return None
+
+
+class ProviderThrottle:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+                 bucket: RedisTokenBucket | None = None):
+        self._lock = Lock()
+        self._max = max_concurrency
+        self._timeout = queue_timeout
+        self._bucket = bucket
+        self._sems: Dict[str, BoundedSemaphore] = {}
+        self._active: Dict[str, int] = {}
+
+    def _sem(self, provider: str) -> BoundedSemaphore:
+        with self._lock:
+            sem = self._sems.get(provider)
+            if sem is None:
+                sem = BoundedSemaphore(self._max)
+                self._sems[provider] = sem
+            return sem
+
+    async def _aacquire(self, sem: BoundedSemaphore) -> bool:
+        if sem.acquire(blocking=False):
+            return True
+        fut = asyncio.get_running_loop().run_in_executor(None, sem.acquire, True, self._timeout)
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # the waiting thread may still win the slot: hand it straight back
+            def give_back(f) -> None:
+                if not f.cancelled() and f.exception() is None and f.result():
+                    sem.release()
+            fut.add_done_callback(give_back)
+            raise
+
+    def _token_wait(self, provider: str, deadline: float) -> float:
+        """Seconds to sleep for a shared-rate token; raises when past the queue deadline."""
+        if self._bucket is None:
+            return 0.0
+        try:
+            wait = self._bucket.wait_seconds(provider)
+        except Exception:  # redis unavailable: local cap still applies
+            return 0.0
+        if wait > 0 and time.monotonic() + wait > deadline:
+            raise DomainError("LLM_OVERLOADED", f"{provider} rate limit queue timeout")
+        return wait
+
+    def _track(self, provider: str, delta: int) -> None:
+        with self._lock:
+            self._active[provider] = self._active.get(provider, 0) + delta
+
+    @contextmanager
+    def slot(self, provider: str):
+        deadline = time.monotonic() + self._timeout
+        sem = self._sem(provider)
+        if not sem.acquire(timeout=self._timeout):
+            raise DomainError("LLM_OVERLOADED", f"{provider} concurrency limit reached")
+        try:
+            while (wait := self._token_wait(provider, deadline)) > 0:
+                time.sleep(wait)
+            self._track(provider, 1)
+            try:
+                yield
+            finally:
+                self._track(provider, -1)
+        finally:
+            sem.release()
+
+    @asynccontextmanager
+    async def aslot(self, provider: str):
+        deadline = time.monotonic() + self._timeout
+        sem = self._sem(provider)
+        if not await self._aacquire(sem):
+            raise DomainError("LLM_OVERLOADED", f"{provider} concurrency limit reached")
+        try:
+            while (wait := await asyncio.to_thread(self._token_wait, provider, deadline)) > 0:
+                await asyncio.sleep(wait)
+            self._track(provider, 1)
+            try:
+                yield
+            finally:
+                self._track(provider, -1)
+        finally:
+            sem.release()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {p: {"active": n, "limit": self._max, "shared_rate": self._bucket is not None} for p, n in self._active.items()}
+
+
+LLM_THROTTLE = ProviderThrottle(bucket=_create_bucket())
+
+__all__ = ["LLM_THROTTLE", "ProviderThrottle", "RedisTokenBucket", "provider_for"]
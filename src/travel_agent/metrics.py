@@ -2,7 +2,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from threading import Lock
-from typing import Dict
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
 
 @dataclass
 class _MetricsState:
@@ -18,15 +19,36 @@ class _MetricsState:
     llm_fallbacks: int = 0
     cache_hits: int = 0
     cache_misses: int = 0
+    llm_cache_hits: int = 0
+    llm_cache_misses: int = 0
+    singleflight_shared: int = 0
+    llm_retries: int = 0
+    llm_batches: int = 0
+    llm_batch_items: int = 0
+    llm_batch_fallbacks: int = 0
+    checkpoint_reuses: int = 0
+    prefetch_started: int = 0
+    prefetch_used: int = 0
+    prefetch_discarded: int = 0
+    prefetch_late: int = 0
+    jobs_queued: int = 0
+    jobs_done: int = 0
+    jobs_failed: int = 0
+    jobs_requeued: int = 0
 
 try:
     from .metrics_prom import (
         PLAN_REQUESTS, CLARIFY_SESSIONS, CLARIFY_ROUNDS, CLARIFY_QUESTIONS,
         WORKFLOWS_COMPLETED, WORKFLOW_LATENCY, LLM_CALLS, LLM_ERRORS, LLM_FALLBACKS,
-        RESULT_CACHE_HITS, RESULT_CACHE_MISSES
+        RESULT_CACHE_HITS, RESULT_CACHE_MISSES, LLM_CACHE_HITS, LLM_CACHE_MISSES,
+        SINGLEFLIGHT_SHARED, LLM_HEDGES, LLM_HEDGE_WINS, LLM_RETRIES,
+        LLM_BATCHES, LLM_BATCH_FALLBACKS, CHECKPOINT_REUSES, PREFETCHES, JOBS_TOTAL,
+        STAGE_CACHE_HITS, STAGE_CACHE_MISSES
     )
 except Exception:  # pragma: no cover
     PLAN_REQUESTS = CLARIFY_SESSIONS = CLARIFY_ROUNDS = CLARIFY_QUESTIONS = WORKFLOWS_COMPLETED = WORKFLOW_LATENCY = LLM_CALLS = LLM_ERRORS = LLM_FALLBACKS = RESULT_CACHE_HITS = RESULT_CACHE_MISSES = None
+    LLM_CACHE_HITS = LLM_CACHE_MISSES = SINGLEFLIGHT_SHARED = LLM_HEDGES = LLM_HEDGE_WINS = LLM_RETRIES = LLM_BATCHES = LLM_BATCH_FALLBACKS = CHECKPOINT_REUSES = PREFETCHES = JOBS_TOTAL = None
+    STAGE_CACHE_HITS = STAGE_CACHE_MISSES = None
 
 class Metrics:
     def __init__(self):
@@ -97,6 +119,63 @@ class Metrics:
         if RESULT_CACHE_MISSES:
             RESULT_CACHE_MISSES.inc()
 
+    def llm_cache_hit(self):
+        with self._lock:
+            self._s.llm_cache_hits += 1
+        if LLM_CACHE_HITS:
+            LLM_CACHE_HITS.inc()
+
+    def llm_cache_miss(self):
+        with self._lock:
+            self._s.llm_cache_misses += 1
+        if LLM_CACHE_MISSES:
+            LLM_CACHE_MISSES.inc()
+
+    def singleflight_shared(self, scope: str):
+        with self._lock:
+            self._s.singleflight_shared += 1
+        if SINGLEFLIGHT_SHARED:
+            SINGLEFLIGHT_SHARED.labels(scope=scope).inc()
+
+    def llm_retry(self, provider: str):
+        with self._lock:
+            self._s.llm_retries += 1
+        if LLM_RETRIES:
+            LLM_RETRIES.labels(provider=provider).inc()
+
+    def llm_batch(self, size: int):
+        with self._lock:
+            self._s.llm_batches += 1
+            self._s.llm_batch_items += size
+        if LLM_BATCHES:
+            LLM_BATCHES.inc()
+
+    def llm_batch_fallback(self):
+        with self._lock:
+            self._s.llm_batch_fallbacks += 1
+        if LLM_BATCH_FALLBACKS:
+            LLM_BATCH_FALLBACKS.inc()
+
+    def checkpoint_reuse(self, stage: str):
+        with self._lock:
+            self._s.checkpoint_reuses += 1
+        if CHECKPOINT_REUSES:
+            CHECKPOINT_REUSES.labels(stage=stage).inc()
+
+    def prefetch(self, outcome: str):
+        """outcome: started | used | discarded | late"""
+        with self._lock:
+            setattr(self._s, f"prefetch_{outcome}", getattr(self._s, f"prefetch_{outcome}") + 1)
+        if PREFETCHES:
+            PREFETCHES.labels(outcome=outcome).inc()
+
+    def job(self, outcome: str, n: int = 1):
+        """outcome: queued | done | failed | requeued"""
+        with self._lock:
+            setattr(self._s, f"jobs_{outcome}", getattr(self._s, f"jobs_{outcome}") + n)
+        if JOBS_TOTAL:
+            JOBS_TOTAL.labels(outcome=outcome).inc(n)
+
     def snapshot(self) -> Dict:
         with self._lock:
             avg_latency = (self._s.workflow_latency_total_ms / self._s.workflow_latency_count) if self._s.workflow_latency_count else 0.0
@@ -112,6 +191,22 @@ class Metrics:
                 "llm_fallbacks": self._s.llm_fallbacks,
                 "cache_hits": self._s.cache_hits,
                 "cache_misses": self._s.cache_misses,
+                "llm_cache_hits": self._s.llm_cache_hits,
+                "llm_cache_misses": self._s.llm_cache_misses,
+                "singleflight_shared": self._s.singleflight_shared,
+                "llm_retries": self._s.llm_retries,
+                "llm_batches": self._s.llm_batches,
+                "llm_batch_items": self._s.llm_batch_items,
+                "llm_batch_fallbacks": self._s.llm_batch_fallbacks,
+                "checkpoint_reuses": self._s.checkpoint_reuses,
+                "prefetch_started": self._s.prefetch_started,
+                "prefetch_used": self._s.prefetch_used,
+                "prefetch_discarded": self._s.prefetch_discarded,
+                "prefetch_late": self._s.prefetch_late,
+                "jobs_queued": self._s.jobs_queued,
+                "jobs_done": self._s.jobs_done,
+                "jobs_failed": self._s.jobs_failed,
+                "jobs_requeued": self._s.jobs_requeued,
             }
 
     def reset(self):  # for tests
@@ -146,4 +241,106 @@ class _GraphMetrics:
 
 METRICS_GRAPH = _GraphMetrics()
 
-__all__ = ["METRICS", "METRICS_PARALLEL", "METRICS_GRAPH"]
\ No newline at end of file
+class _LLMModelMetrics:
+    """Per-model latency window and hedging counters (Ref: §3.0 LLM选择与容错策略)."""
+    def __init__(self, window: int = 200):
+        self._lock = Lock()
+        self._window = window
+        self._latency: Dict[str, Deque[float]] = {}
+        self._calls: Dict[str, int] = {}
+        self._hedged: Dict[str, int] = {}
+        self._races: Dict[str, int] = {}
+        self._wins: Dict[str, int] = {}
+
+    def observe(self, model: str, ms: float):
+        with self._lock:
+            self._latency.setdefault(model, deque(maxlen=self._window)).append(ms)
+            self._calls[model] = self._calls.get(model, 0) + 1
+
+    def percentile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latency.get(model, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def hedge_fired(self, primary: str):
+        with self._lock:
+            self._hedged[primary] = self._hedged.get(primary, 0) + 1
+        if LLM_HEDGES:
+            LLM_HEDGES.labels(model=primary).inc()
+
+    def race_result(self, models: Iterable[str], winner: str):
+        with self._lock:
+            for m in models:
+                self._races[m] = self._races.get(m, 0) + 1
+            self._wins[winner] = self._wins.get(winner, 0) + 1
+        if LLM_HEDGE_WINS:
+            LLM_HEDGE_WINS.labels(model=winner).inc()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            models = set(self._calls) | set(self._races)
+            out = {}
+            for m in sorted(models):
+                calls = self._calls.get(m, 0)
+                races = self._races.get(m, 0)
+                out[m] = {
+                    "calls": calls,
+                    "hedges": self._hedged.get(m, 0),
+                    "hedge_rate": round(self._hedged.get(m, 0) / calls, 4) if calls else 0.0,
+                    "races": races,
+                    "wins": self._wins.get(m, 0),
+                    "win_rate": round(self._wins.get(m, 0) / races, 4) if races else 0.0,
+                }
+        for m in out:
+            p50, p90 = self.percentile(m, 0.5), self.percentile(m, 0.9)
+            out[m]["latency_p50_ms"] = round(p50, 2) if p50 is not None else None
+            out[m]["latency_p90_ms"] = round(p90, 2) if p90 is not None else None
+        return out
+
+    def reset(self):  # for tests
+        with self._lock:
+            self._latency.clear()
+            self._calls.clear()
+            self._hedged.clear()
+            self._races.clear()
+            self._wins.clear()
+
+METRICS_LLM = _LLMModelMetrics()
+
+class _StageCacheMetrics:
+    """Per-stage sub-result cache hits / misses (flights, hotels, spots)."""
+    def __init__(self):
+        self._lock = Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def hit(self, stage: str):
+        with self._lock:
+            self._hits[stage] = self._hits.get(stage, 0) + 1
+        if STAGE_CACHE_HITS:
+            STAGE_CACHE_HITS.labels(stage=stage).inc()
+
+    def miss(self, stage: str):
+        with self._lock:
+            self._misses[stage] = self._misses.get(stage, 0) + 1
+        if STAGE_CACHE_MISSES:
+            STAGE_CACHE_MISSES.labels(stage=stage).inc()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for st in sorted(set(self._hits) | set(self._misses)):
+                hits, misses = self._hits.get(st, 0), self._misses.get(st, 0)
+                out[st] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 4)}
+            return out
+
+    def reset(self):  # for tests
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+METRICS_STAGE_CACHE = _StageCacheMetrics()
+
+__all__ = ["METRICS", "METRICS_PARALLEL", "METRICS_GRAPH", "METRICS_LLM", "METRICS_STAGE_CACHE"]
\ No newline at end of file
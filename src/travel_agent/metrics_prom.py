@@ -15,11 +15,28 @@ LLM_ERRORS = Counter("llm_errors_total", "LLM errors")
 LLM_FALLBACKS = Counter("llm_fallbacks_total", "LLM fallbacks invoked")
 RESULT_CACHE_HITS = Counter("result_cache_hits_total", "Result cache hits")
 RESULT_CACHE_MISSES = Counter("result_cache_misses_total", "Result cache misses")
+LLM_CACHE_HITS = Counter("llm_cache_hits_total", "LLM response cache hits")
+LLM_CACHE_MISSES = Counter("llm_cache_misses_total", "LLM response cache misses")
+LLM_HEDGES = Counter("llm_hedges_total", "Hedge requests fired because the primary was slow", ["model"])
+LLM_HEDGE_WINS = Counter("llm_hedge_wins_total", "Hedged races won per model", ["model"])
+LLM_RETRIES = Counter("llm_retries_total", "LLM HTTP retries (429/5xx/network)", ["provider"])
+LLM_BATCHES = Counter("llm_batches_total", "Batched multi-intent itinerary requests")
+LLM_BATCH_FALLBACKS = Counter("llm_batch_fallbacks_total", "Batches split back into single calls")
+CHECKPOINT_REUSES = Counter("checkpoint_reuses_total", "Workflow stages served from a checkpoint", ["stage"])
+PREFETCHES = Counter("prefetches_total", "Speculative clarify-time stage prefetches", ["outcome"])
+JOBS_TOTAL = Counter("plan_jobs_total", "Background plan jobs by outcome", ["outcome"])
+STAGE_CACHE_HITS = Counter("stage_cache_hits_total", "Stage sub-result cache hits", ["stage"])
+STAGE_CACHE_MISSES = Counter("stage_cache_misses_total", "Stage sub-result cache misses", ["stage"])
+SINGLEFLIGHT_SHARED = Counter("singleflight_shared_total", "Calls served by an in-flight leader", ["scope"])
 
 def export_prometheus() -> tuple[bytes, str]:
     return generate_latest(), CONTENT_TYPE_LATEST
 
 __all__ = [
     "PLAN_REQUESTS","CLARIFY_SESSIONS","CLARIFY_ROUNDS","CLARIFY_QUESTIONS",
-    "WORKFLOWS_COMPLETED","WORKFLOW_LATENCY","LLM_CALLS","LLM_ERRORS","LLM_FALLBACKS","RESULT_CACHE_HITS","RESULT_CACHE_MISSES","export_prometheus"
+    "WORKFLOWS_COMPLETED","WORKFLOW_LATENCY","LLM_CALLS","LLM_ERRORS","LLM_FALLBACKS","RESULT_CACHE_HITS","RESULT_CACHE_MISSES",
+    "LLM_CACHE_HITS","LLM_CACHE_MISSES","SINGLEFLIGHT_SHARED",
+    "LLM_HEDGES","LLM_HEDGE_WINS","LLM_RETRIES",
+    "LLM_BATCHES","LLM_BATCH_FALLBACKS","CHECKPOINT_REUSES","PREFETCHES","JOBS_TOTAL",
+    "STAGE_CACHE_HITS","STAGE_CACHE_MISSES","export_prometheus"
 ]
\ No newline at end of file
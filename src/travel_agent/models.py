@@ -3,7 +3,7 @@ Ref: §2 数据模型与统一类型规范 + schema_version in PlanningResult
 """
 from __future__ import annotations
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import date, datetime, timedelta
 
 class TripIntent(BaseModel):
@@ -44,7 +44,7 @@ class FlightOption(BaseModel):
     currency: str
     cabin_class: str
     stops: int
-    source: Literal['mock'] = 'mock'
+    source: Literal['mock', 'inventory'] = 'mock'
     score: float
 
 class HotelOption(BaseModel):
@@ -56,7 +56,7 @@ class HotelOption(BaseModel):
     total_price: float
     currency: str
     rating: float
-    source: Literal['mock'] = 'mock'
+    source: Literal['mock', 'inventory'] = 'mock'
     distance_center_km: Optional[float] = None
     score: float
 
@@ -93,12 +93,24 @@ class PlanningResult(BaseModel):
     generated_at: datetime
     warnings: List[str] = []
     realtime_supported: bool = False  # placeholder
+    stage_timings_ms: Dict[str, float] = {}
 
 class ErrorInfo(BaseModel):
     code: str
     message: str
     detail: Optional[str] = None
 
+class JobInfo(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    session_id: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0  # claims so far; >1 means a worker lost the job and it was re-queued
+    result: Optional[PlanningResult] = None
+    error: Optional[ErrorInfo] = None
+
 class ApiResponse(BaseModel):
     success: bool
     data: Optional[PlanningResult] = None
@@ -107,3 +119,34 @@ class ApiResponse(BaseModel):
     questions: Optional[List[dict]] = None
     round: Optional[int] = None
     max_rounds: Optional[int] = None
+
+class JobResponse(BaseModel):
+    success: bool
+    data: Optional[JobInfo] = None
+    error: Optional[ErrorInfo] = None
+    mode: Optional[str] = None  # clarify: the job was not queued, answer via /plan/clarify
+    questions: Optional[List[dict]] = None
+    round: Optional[int] = None
+    max_rounds: Optional[int] = None
+
+class PlanBatchItem(BaseModel):
+    index: int
+    session_id: str
+    success: bool
+    data: Optional[PlanningResult] = None
+    error: Optional[ErrorInfo] = None
+    mode: Optional[str] = None
+    questions: Optional[List[dict]] = None
+    cached: bool = False
+
+class PlanBatchResponse(BaseModel):
+    success: bool
+    items: List[PlanBatchItem] = []
+    unique: int = 0  # distinct intents among plannable items
+    cached: int = 0  # of those, served from the result cache
+    error: Optional[ErrorInfo] = None
+
+class HotelSearchResponse(BaseModel):
+    success: bool
+    data: List[HotelOption] = []
+    error: Optional[ErrorInfo] = None
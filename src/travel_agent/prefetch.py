@@ -0,0 +1,150 @@
+"""Speculative stage prefetch during the clarify loop.
+Ref: §3.1 澄清流程 + §4 工作流编排
+
+When a clarify session is created, the searches (flights, hotels, spots)
+whose intent inputs are already complete are started in the background. The
+itinerary LLM stage is the most expensive one and is wasted whenever the
+session is abandoned, so it is only prefetched with PREFETCH_LLM=true; a
+stage with deps is prefetched only when its deps are too and chains on their
+futures. post_clarify takes the results whose
+fingerprints still match the final intent and seeds the scheduler with them;
+prefetches invalidated by the answers are cancelled (a call already running
+finishes and is discarded). Unclaimed entries expire after PREFETCH_TTL_SECONDS.
+take() waits for in-flight prefetches only within the request deadline's work
+budget; a prefetch still running then is a miss ("late") and the scheduler
+runs or degrades that stage itself.
+"""
+from __future__ import annotations
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+from .config import PREFETCH_ENABLE, PREFETCH_TTL_SECONDS, PREFETCH_MAX_WORKERS, PREFETCH_LLM
+from .models import TripIntent
+from .stage_graph import PLAN_STAGES, Stage
+from .checkpoint import stage_fingerprints
+from .deadline import current_deadline
+from .errors import DomainError
+from .logger import log_info, log_error
+from .metrics import METRICS
+
+SEARCH_STAGES = ("flights", "hotels", "spots")
+LLM_STAGES = ("itinerary",)
+
+
+def _inputs_complete(stage: Stage, intent: TripIntent) -> bool:
+    return all(getattr(intent, f) is not None for f in stage.intent_fields)
+
+
+def _run_after(stage: Stage, intent: TripIntent, deps: Dict[str, Future]):
+    return stage.run(intent, {name: fut.result() for name, fut in deps.items()})
+
+
+class Prefetcher:
+    def __init__(self, ttl_seconds: int = PREFETCH_TTL_SECONDS, max_workers: int = PREFETCH_MAX_WORKERS,
+                 llm: bool = PREFETCH_LLM):
+        self._lock = Lock()
+        self._ttl = ttl_seconds
+        self._max_workers = max_workers
+        self._stages = SEARCH_STAGES + (LLM_STAGES if llm else ())
+        self._pool: ThreadPoolExecutor | None = None
+        # session -> (expires_at, {stage: (fingerprint, future)})
+        self._sessions: Dict[str, Tuple[float, Dict[str, Tuple[str, Future]]]] = {}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="prefetch")
+        return self._pool
+
+    def _expire(self, now: float) -> None:
+        for sid in [s for s, (exp, _) in self._sessions.items() if exp <= now]:
+            _, entries = self._sessions.pop(sid)
+            self._discard(sid, entries.values(), "expired")
+
+    def _discard(self, session_id: str, entries, reason: str) -> None:
+        for _, fut in entries:
+            fut.cancel()
+            METRICS.prefetch("discarded")
+        log_info("prefetch", reason, session_id=session_id)
+
+    def start(self, intent: TripIntent, session_id: str) -> List[str]:
+        """Launch prefetchable stages not already in flight for this intent; returns their names."""
+        if not PREFETCH_ENABLE:
+            return []
+        snapshot = intent.model_copy(deep=True)  # clarify answers mutate the session intent
+        fps = stage_fingerprints(snapshot)
+        launched: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            _, entries = self._sessions.get(session_id, (0.0, {}))
+            for st in PLAN_STAGES:  # topological order: deps are decided first
+                if st.name not in self._stages or not _inputs_complete(st, snapshot) or any(d not in entries for d in st.deps):
+                    continue
+                current = entries.get(st.name)
+                if current is not None and current[0] == fps[st.name]:
+                    continue
+                if current is not None:
+                    current[1].cancel()
+                    METRICS.prefetch("discarded")
+                deps = {d: entries[d][1] for d in st.deps}
+                entries[st.name] = (fps[st.name], self._executor().submit(_run_after, st, snapshot, deps))
+                METRICS.prefetch("started")
+                launched.append(st.name)
+            self._sessions[session_id] = (now + self._ttl, entries)
+        if launched:
+            log_info("prefetch", "started", session_id=session_id, extra={"stages": launched})
+        return launched
+
+    def take(self, session_id: str, intent: TripIntent) -> Dict[str, Any]:
+        """Claim the session's prefetched outputs still valid for `intent` (waits for in-flight
+        ones, at most until the current request deadline's work budget runs out)."""
+        with self._lock:
+            exp, entries = self._sessions.pop(session_id, (0.0, {}))
+        if not entries:
+            return {}
+        if exp <= time.monotonic():
+            self._discard(session_id, entries.values(), "expired")
+            return {}
+        fps = stage_fingerprints(intent)
+        stale = [e for name, e in entries.items() if e[0] != fps.get(name)]
+        if stale:
+            self._discard(session_id, stale, "invalidated")
+        seed: Dict[str, Any] = {}
+        dl = current_deadline()
+        late: List[str] = []
+        for name, (fp, fut) in entries.items():
+            if fp != fps.get(name):
+                continue
+            try:
+                seed[name] = fut.result(dl.work_remaining_s() if dl is not None else None)
+                METRICS.prefetch("used")
+            except FutureTimeout:
+                fut.cancel()  # a call already running finishes and is dropped
+                late.append(name)
+                METRICS.prefetch("late")
+            except CancelledError:
+                METRICS.prefetch("discarded")
+            except DomainError as de:
+                METRICS.prefetch("discarded")
+                log_error("prefetch", de.message, session_id=session_id, code=de.code, extra={"stage": name})
+        if late:
+            log_info("prefetch", "late", session_id=session_id, extra={"stages": late})
+        if seed:
+            log_info("prefetch", "consumed", session_id=session_id, extra={"stages": sorted(seed)})
+        return seed
+
+    def cancel(self, session_id: str) -> None:
+        with self._lock:
+            _, entries = self._sessions.pop(session_id, (0.0, {}))
+        if entries:
+            self._discard(session_id, entries.values(), "cancelled")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+PREFETCH = Prefetcher()
+
+__all__ = ["PREFETCH", "Prefetcher"]
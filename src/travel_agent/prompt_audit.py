@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import Optional, List, Dict
 from threading import Lock
 from datetime import datetime
+from .prompt_builder import estimate_tokens
 
 @dataclass
 class AuditRecord:
@@ -18,6 +19,8 @@ class AuditRecord:
     repair_attempts: int
     fallback_used: bool
     error_code: Optional[str]
+    cache_hit: bool = False
+    prompt_tokens: int = 0
 
 class PromptAudit:
     def __init__(self, capacity: int = 300):
@@ -26,8 +29,9 @@ class PromptAudit:
         self._records: List[AuditRecord] = []
 
     def record(self, *, model: str, prompt_tag: str, prompt: str, response: str,
-               json_valid: bool, repair_attempts: int, fallback_used: bool, error_code: Optional[str]):
-        rec = AuditRecord(datetime.utcnow(), model, prompt_tag, len(prompt), len(response), json_valid, repair_attempts, fallback_used, error_code)
+               json_valid: bool, repair_attempts: int, fallback_used: bool, error_code: Optional[str], cache_hit: bool = False):
+        rec = AuditRecord(datetime.utcnow(), model, prompt_tag, len(prompt), len(response), json_valid, repair_attempts, fallback_used, error_code, cache_hit,
+                          estimate_tokens(prompt))
         with self._lock:
             self._records.append(rec)
             if len(self._records) > self._cap:
@@ -46,11 +50,13 @@ class PromptAudit:
                 "model": r.model,
                 "prompt_tag": r.prompt_tag,
                 "prompt_len": r.prompt_len,
+                "prompt_tokens": r.prompt_tokens,
                 "response_len": r.response_len,
                 "json_valid": r.json_valid,
                 "repair_attempts": r.repair_attempts,
                 "fallback_used": r.fallback_used,
                 "error_code": r.error_code,
+                "cache_hit": r.cache_hit,
             }
             for r in items
         ]
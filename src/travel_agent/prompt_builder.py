@@ -0,0 +1,90 @@
+"""Itinerary prompt rendering with token accounting.
+Ref: §3.5 行程生成
+
+The intent and candidate spots are rendered into a compact template. When the
+estimated token count exceeds LLM_PROMPT_MAX_TOKENS the lowest-ranked spots
+are dropped first, then preferences. Tokens are estimated locally: one per
+CJK character, one per ~4 other characters.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from .config import LLM_PROMPT_MAX_TOKENS
+from .logger import log_info
+
+ITINERARY_TAG = "GENERATE_ITINERARY"
+_OUTPUT_SCHEMA = '{"days":[{"day_index":1,"main_spots":[],"meals":[],"notes":""}],"summary":""}'
+
+
+def _is_cjk(ch: str) -> bool:
+    return "\u3000" <= ch <= "\u9fff" or "\uf900" <= ch <= "\ufaff" or "\uff00" <= ch <= "\uffef"
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = sum(1 for ch in text if _is_cjk(ch))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    tokens: int
+    spots: List[str]
+    preferences: List[str]
+    trimmed: bool
+
+
+def _render(intent, spots: List[str], prefs: List[str]) -> str:
+    lines = [
+        ITINERARY_TAG,
+        f"目的地:{intent.destination} 出发:{intent.depart_date or '-'} 天数:{intent.days or '-'} 人数:{intent.travelers}",
+    ]
+    if prefs:
+        lines.append("偏好:" + ",".join(prefs))
+    if spots:
+        lines.append("景点:" + ",".join(spots))
+    lines.append("只输出JSON:" + _OUTPUT_SCHEMA)
+    return "\n".join(lines)
+
+
+def fit_inputs(intent, spots: List[str], max_tokens: int) -> Tuple[str, List[str], List[str]]:
+    """Render, dropping tail spots then preferences until the estimate fits max_tokens."""
+    spots = list(dict.fromkeys(spots))  # ranked order, de-duplicated
+    prefs = sorted(set(intent.preferences))
+    text = _render(intent, spots, prefs)
+    while estimate_tokens(text) > max_tokens and (spots or prefs):
+        if spots:
+            spots.pop()
+        else:
+            prefs.pop()
+        text = _render(intent, spots, prefs)
+    return text, spots, prefs
+
+
+def build_itinerary_prompt(intent, spots: List[str], max_tokens: int = LLM_PROMPT_MAX_TOKENS) -> BuiltPrompt:
+    text, kept_spots, kept_prefs = fit_inputs(intent, spots, max_tokens)
+    tokens = estimate_tokens(text)
+    trimmed = len(kept_spots) < len(set(spots)) or len(kept_prefs) < len(set(intent.preferences))
+    if trimmed:
+        log_info("llm", "prompt_trimmed", session_id=intent.session_id, extra={
+            "tokens": tokens, "max_tokens": max_tokens,
+            "spots_kept": len(kept_spots), "preferences_kept": len(kept_prefs),
+        })
+    return BuiltPrompt(text=text, tokens=tokens, spots=kept_spots, preferences=kept_prefs, trimmed=trimmed)
+
+
+def itinerary_brief(request_id: str, intent, spots: List[str], max_tokens: int = LLM_PROMPT_MAX_TOKENS) -> Dict:
+    """Compact per-request entry for batched prompts, trimmed like build_itinerary_prompt."""
+    _, kept_spots, kept_prefs = fit_inputs(intent, spots, max_tokens)
+    return {
+        "id": request_id,
+        "destination": intent.destination,
+        "depart_date": intent.depart_date.isoformat() if intent.depart_date else None,
+        "days": intent.days,
+        "travelers": intent.travelers,
+        "preferences": kept_prefs,
+        "spots": kept_spots,
+    }
+
+
+__all__ = ["ITINERARY_TAG", "BuiltPrompt", "build_itinerary_prompt", "estimate_tokens", "fit_inputs", "itinerary_brief"]
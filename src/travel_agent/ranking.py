@@ -0,0 +1,275 @@
+"""Option scoring and top-k ranking for flight / hotel search.
+Ref: §3.2 航班搜索 + §3.3 酒店搜索
+
+Searches hand over plain columns (price, duration, ...) instead of Pydantic
+objects; ranking returns the indices and scores of the top k rows, with at
+most one row per dedup group, and only those rows become models.
+
+Scores are weighted sums of attributes min-max normalized over the candidate
+set onto [NORM_FLOOR, 1], 1 being the best candidate (weights from config):
+- flight: cheap, short and few stops are better
+- hotel:  cheap, highly rated and close to the center are better
+A column with a single distinct value gives every row 1; the floor keeps every
+ranked option's score positive. Weights therefore trade attributes off
+directly: "1,0,0" ranks flights by price alone.
+
+With NumPy the whole column set is scored at once and the top k picked with
+argpartition, so cost grows linearly with candidates and only k rows are
+sorted; without it a pure-Python fallback gives the same ranking.
+
+Inputs of at least RANK_OFFLOAD_MIN_ITEMS rows are ranked in a process pool
+(RANK_PROCESS_WORKERS > 0) so scoring large inventories does not hold this
+process's GIL. Columns cross the boundary as packed array bytes and the
+result comes back the same way. This module only imports config, so spawned
+workers start fast.
+
+pareto_front() is the multi-objective alternative for flights: the rows no
+other row beats on price, duration and stops at once, found with one sort by
+price and a sweep that keeps a Fenwick tree (prefix minimum of duration over
+stop counts), i.e. O(n log n) instead of comparing every pair.
+diverse_subset() caps the frontier at k rows spread across it.
+"""
+from __future__ import annotations
+import heapq, multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from .config import RANK_PROCESS_WORKERS, RANK_OFFLOAD_MIN_ITEMS, RANK_FLIGHT_WEIGHTS, RANK_HOTEL_WEIGHTS
+
+try:  # optional dependency
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# kind -> columns in weight order; "rating" is the only higher-is-better attribute
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "flight": ("price", "duration", "stops"),
+    "hotel": ("price", "rating", "distance"),
+}
+HIGHER_IS_BETTER = frozenset({"rating"})
+NORM_FLOOR = 0.05  # normalized value of the worst candidate on a column
+WEIGHTS: Dict[str, List[float]] = {"flight": RANK_FLIGHT_WEIGHTS, "hotel": RANK_HOTEL_WEIGHTS}
+
+
+def _check_weights(kind: str, weights: Sequence[float]) -> None:
+    names = COLUMNS[kind]
+    if len(weights) != len(names) or any(w < 0 for w in weights):
+        raise ValueError(f"RANK_{kind.upper()}_WEIGHTS needs {len(names)} non-negative weights "
+                         f"({', '.join(names)}), got {list(weights)}")
+
+
+for _kind, _weights in WEIGHTS.items():
+    _check_weights(_kind, _weights)
+
+
+def _columns(kind: str, cols: Dict[str, Sequence[float]]) -> List[Tuple[str, Sequence[float], float]]:
+    # attributes with weight 0 (or not supplied) are skipped
+    return [(name, cols[name], w) for name, w in zip(COLUMNS[kind], WEIGHTS[kind]) if w and name in cols]
+
+
+def _scores_np(kind: str, cols: Dict[str, Sequence[float]], n: int):
+    scores = np.zeros(n, dtype=np.float64)
+    for name, col, w in _columns(kind, cols):
+        v = np.asarray(col, dtype=np.float64)
+        lo, hi = float(v.min()), float(v.max())
+        if hi == lo:
+            scores += w
+        else:
+            good = ((v - lo) if name in HIGHER_IS_BETTER else (hi - v)) / (hi - lo)
+            scores += w * (NORM_FLOOR + (1.0 - NORM_FLOOR) * good)
+    return scores
+
+
+def _scores_py(kind: str, cols: Dict[str, Sequence[float]], n: int) -> List[float]:
+    scores = [0.0] * n
+    for name, col, w in _columns(kind, cols):
+        lo, hi = min(col), max(col)
+        for i in range(n):
+            if hi == lo:
+                scores[i] += w
+            else:
+                good = ((col[i] - lo) if name in HIGHER_IS_BETTER else (hi - col[i])) / (hi - lo)
+                scores[i] += w * (NORM_FLOOR + (1.0 - NORM_FLOOR) * good)
+    return scores
+
+
+def score_rows(kind: str, cols: Dict[str, Sequence[float]]) -> List[float]:
+    """Score of every row, normalized over these rows (higher is better)."""
+    n = len(next(iter(cols.values()), ()))
+    if not n:
+        return []
+    return _scores_np(kind, cols, n).tolist() if np is not None else _scores_py(kind, cols, n)
+
+
+def _top_k_np(kind: str, cols: Dict[str, Sequence[float]], k: int, groups) -> Tuple[List[int], List[float]]:
+    n = len(next(iter(cols.values())))
+    scores = _scores_np(kind, cols, n)
+    if groups is not None:
+        # best row per group: order by (score desc, index asc), keep each group's first
+        order = np.lexsort((np.arange(n), -scores))
+        _, first = np.unique(np.asarray(groups)[order], return_index=True)
+        cand = order[first]
+    elif k < n:
+        cand = np.argpartition(-scores, k - 1)[:k]
+    else:
+        cand = np.arange(n)
+    cand = cand[np.lexsort((cand, -scores[cand]))][:k]
+    return cand.tolist(), scores[cand].tolist()
+
+
+def _top_k_py(kind: str, cols: Dict[str, Sequence[float]], k: int, groups) -> Tuple[List[int], List[float]]:
+    n = len(next(iter(cols.values())))
+    scores = _scores_py(kind, cols, n)
+    if groups is None and k < n:
+        order = heapq.nlargest(k, range(n), key=scores.__getitem__)
+    else:
+        order = sorted(range(n), key=scores.__getitem__, reverse=True)  # stable: ties keep input order
+    picked: List[int] = []
+    seen = set()
+    for i in order:
+        if groups is not None:
+            if groups[i] in seen:
+                continue
+            seen.add(groups[i])
+        picked.append(i)
+        if len(picked) == k:
+            break
+    return picked, [scores[i] for i in picked]
+
+
+def _top_k(kind: str, cols: Dict[str, Sequence[float]], k: int, groups) -> Tuple[List[int], List[float]]:
+    if k <= 0 or not cols or not len(next(iter(cols.values()))):
+        return [], []
+    return (_top_k_np if np is not None else _top_k_py)(kind, cols, k, groups)
+
+
+class _MinFenwick:
+    """Prefix minimum over positions 0..size-1 with point updates that only lower values."""
+
+    def __init__(self, size: int):
+        self.tree = [float("inf")] * (size + 1)
+
+    def update(self, pos: int, value: float) -> None:
+        i = pos + 1
+        while i < len(self.tree):
+            if value < self.tree[i]:
+                self.tree[i] = value
+            i += i & -i
+
+    def query(self, pos: int) -> float:
+        i, best = pos + 1, float("inf")
+        while i > 0:
+            best = min(best, self.tree[i])
+            i -= i & -i
+        return best
+
+
+def _as_list(col: Sequence[float]) -> List[float]:
+    return col.tolist() if np is not None and isinstance(col, np.ndarray) else list(col)
+
+
+def pareto_front(price: Sequence[float], duration: Sequence[float], stops: Sequence[float]) -> List[int]:
+    """Indices of the non-dominated rows (lower is better on all three), cheapest first.
+    Exact duplicates keep their first row only."""
+    p, d, s = _as_list(price), _as_list(duration), _as_list(stops)
+    rank = {v: r for r, v in enumerate(sorted(set(s)))}
+    tree = _MinFenwick(len(rank))
+    front: List[int] = []
+    # every row seen before i is no worse on price (ties broken by duration, then stops),
+    # so i is dominated iff one of them also has stops <= s[i] and duration <= d[i]
+    for i in sorted(range(len(p)), key=lambda i: (p[i], d[i], s[i], i)):
+        r = rank[s[i]]
+        if tree.query(r) <= d[i]:
+            continue
+        front.append(i)
+        tree.update(r, d[i])
+    return front
+
+
+def diverse_subset(cols: Dict[str, Sequence[float]], rows: List[int], k: int) -> List[int]:
+    """At most k of `rows` spread across their range: the best row of each column first,
+    then farthest-point picks on min-max normalized columns. Keeps the order of `rows`."""
+    if len(rows) <= k:
+        return list(rows)
+    vals = {name: _as_list(col) for name, col in cols.items()}
+    pos = {i: n for n, i in enumerate(rows)}
+    norm: Dict[int, List[float]] = {i: [] for i in rows}
+    for col in vals.values():
+        lo, hi = min(col[i] for i in rows), max(col[i] for i in rows)
+        for i in rows:
+            norm[i].append((col[i] - lo) / (hi - lo) if hi > lo else 0.0)
+    picked: List[int] = []
+    for col in vals.values():
+        best = min(rows, key=lambda i: (col[i], pos[i]))
+        if best not in picked and len(picked) < k:
+            picked.append(best)
+    gap = {i: min(sum((a - b) ** 2 for a, b in zip(norm[i], norm[j])) for j in picked) for i in rows if i not in picked}
+    while len(picked) < k and gap:
+        far = max(gap, key=lambda i: (gap[i], -pos[i]))
+        picked.append(far)
+        del gap[far]
+        for i in gap:
+            gap[i] = min(gap[i], sum((a - b) ** 2 for a, b in zip(norm[i], norm[far])))
+    chosen = set(picked)
+    return [i for i in rows if i in chosen]
+
+
+def _rank_worker(kind: str, blobs: Dict[str, bytes], groups: Optional[bytes], k: int,
+                 weights: List[float]) -> Tuple[bytes, bytes]:
+    """Process-pool entry: packed float64 columns / int64 groups in, packed indices + scores out."""
+    WEIGHTS[kind] = weights  # the parent's weights win over the worker's own config
+    if np is not None:
+        cols = {name: np.frombuffer(b, dtype=np.float64) for name, b in blobs.items()}
+        grp = np.frombuffer(groups, dtype=np.int64) if groups is not None else None
+    else:  # pragma: no cover
+        cols = {name: array("d", b) for name, b in blobs.items()}
+        grp = array("q", groups) if groups is not None else None
+    idx, scores = _top_k(kind, cols, k, grp)
+    return array("q", idx).tobytes(), array("d", scores).tobytes()
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = Lock()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: forking a process that runs threads (stage pool, HTTP clients) is unsafe
+            _POOL = ProcessPoolExecutor(max_workers=RANK_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def shutdown_rank_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+def offloaded(n: int) -> bool:
+    return RANK_PROCESS_WORKERS > 0 and n >= RANK_OFFLOAD_MIN_ITEMS
+
+
+def _pack(values: Sequence, typecode: str) -> bytes:
+    if np is not None and isinstance(values, np.ndarray):
+        return values.astype(np.float64 if typecode == "d" else np.int64, copy=False).tobytes()
+    return array(typecode, values).tobytes()
+
+
+def rank_top_k(kind: str, cols: Dict[str, Sequence[float]], k: int,
+               groups: Optional[Sequence[int]] = None) -> Tuple[List[int], List[float]]:
+    """Indices and scores of the best k rows (best first); `groups` keeps one row per group id."""
+    n = len(next(iter(cols.values()), ()))
+    if not offloaded(n):
+        return _top_k(kind, cols, k, groups)
+    blobs = {name: _pack(cols[name], "d") for name in COLUMNS[kind] if name in cols}
+    packed_groups = _pack(groups, "q") if groups is not None else None
+    idx, scores = _pool().submit(_rank_worker, kind, blobs, packed_groups, k, list(WEIGHTS[kind])).result()
+    return list(array("q", idx)), list(array("d", scores))
+
+
+__all__ = ["rank_top_k", "score_rows", "pareto_front", "diverse_subset", "offloaded", "shutdown_rank_pool", "COLUMNS", "WEIGHTS"]
@@ -0,0 +1,77 @@
+"""Incremental re-planning.
+Ref: §3.8 工作流执行入口 + §4 工作流编排
+
+POST /api/mvp/replan applies field changes to the last plan returned to the
+session, diffs the two intents and recomputes only the stages that read a
+changed field (Stage.intent_fields) plus their dependents. Every other stage
+output is taken from the previous plan, so a budget tweak re-runs
+budget_allocate alone, without an LLM round trip.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+from pydantic import ValidationError
+from .models import TripIntent, PlanningResult
+from .stage_graph import PLAN_STAGES, Stage
+from .checkpoint import load_plan, save_plan
+from .cache_util import cache_put
+from .workflow import continue_workflow
+from .errors import DomainError
+from .logger import log_info
+
+REPLAN_FIELDS = ("origin", "destination", "depart_date", "days", "budget_total", "travelers", "preferences", "currency")
+# stage outputs carried on PlanningResult (spots only live in checkpoints)
+_RESULT_STAGES = ("flights", "hotels", "itinerary", "budget")
+
+
+def apply_changes(prev: TripIntent, changes: Dict[str, Any]) -> TripIntent:
+    unknown = sorted(set(changes) - set(REPLAN_FIELDS))
+    if unknown:
+        raise DomainError("REPLAN_FIELD_INVALID", "Fields cannot be changed by replan", detail=",".join(unknown))
+    data = prev.model_dump()
+    data.update(changes)
+    if "depart_date" in changes or "days" in changes:
+        data["return_date"] = None  # re-derived by finalize_dates
+        data["nights"] = None
+    try:
+        intent = TripIntent.model_validate(data)
+    except ValidationError as e:
+        raise DomainError("REPLAN_INVALID", "Invalid replan changes", detail=str(e.errors()[0].get("msg")))
+    intent.finalize_dates()
+    return intent
+
+
+def intent_diff(old: TripIntent, new: TripIntent) -> List[str]:
+    fields = set(f for st in PLAN_STAGES for f in st.intent_fields)
+    return sorted(f for f in fields if getattr(old, f) != getattr(new, f))
+
+
+def affected_stages(changed: List[str], stages: Tuple[Stage, ...] = PLAN_STAGES) -> List[str]:
+    """Stages reading a changed field, plus everything downstream of them."""
+    hit = {st.name for st in stages if set(st.intent_fields) & set(changed)}
+    grew = True
+    while grew:
+        more = {st.name for st in stages if st.name not in hit and set(st.deps) & hit}
+        hit |= more
+        grew = bool(more)
+    return [st.name for st in stages if st.name in hit]
+
+
+def replan(session_id: str, changes: Dict[str, Any]) -> Tuple[PlanningResult, List[str], List[str]]:
+    """Returns (result, changed fields, recomputed stages)."""
+    prev = load_plan(session_id)
+    if prev is None:
+        raise DomainError("REPLAN_NO_PREVIOUS", "No previous plan for this session")
+    intent = apply_changes(prev.intent, changes)
+    changed = intent_diff(prev.intent, intent)
+    affected = affected_stages(changed)
+    degraded = {w for w in prev.warnings if w.startswith("DEADLINE_")}
+    seed = {name: getattr(prev, name) for name in _RESULT_STAGES
+            if name not in affected and f"DEADLINE_{name.upper()}_DEGRADED" not in degraded}
+    log_info("replan", "diff", session_id=session_id, extra={"changed": changed, "recompute": affected})
+    result = continue_workflow(intent, session_id, seed=seed)
+    cache_put(intent, result)
+    save_plan(session_id, result)
+    return result, changed, affected
+
+
+__all__ = ["replan", "apply_changes", "intent_diff", "affected_stages", "REPLAN_FIELDS"]
@@ -0,0 +1,79 @@
+"""In-flight call de-duplication (single-flight).
+Ref: §7 会话与缓存策略
+
+Concurrent callers with the same key share one execution: the first caller
+(leader) runs the work, followers wait for its result or exception.
+`do` serves threaded (sync endpoint) callers, `do_async` asyncio callers.
+A follower's `timeout` bounds its own wait only (TimeoutError); the leader
+keeps running for everyone else.
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from .metrics import METRICS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._lock = Lock()
+        self._calls: Dict[str, Future] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None) -> Tuple[T, bool]:
+        """Run fn once per concurrent key; returns (result, shared). Followers wait at most `timeout` s."""
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+        if not leader:
+            METRICS.singleflight_shared(self.scope)
+            return fut.result(timeout), True
+        try:
+            result = fn()
+            fut.set_result(result)
+            return result, False
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> Tuple[T, bool]:
+        """Async counterpart of do; followers await the leader's future."""
+        loop = asyncio.get_running_loop()
+        fut = self._async_calls.get(key)
+        if fut is not None and fut.get_loop() is loop and not fut.done():
+            METRICS.singleflight_shared(self.scope)
+            # shield: a cancelled follower must not cancel the shared result
+            return await asyncio.wait_for(asyncio.shield(fut), timeout), True
+        fut = loop.create_future()
+        self._async_calls[key] = fut
+        try:
+            result = await fn()
+            fut.set_result(result)
+            return result, False
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            if self._async_calls.get(key) is fut:
+                del self._async_calls[key]
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._calls) + sum(1 for f in self._async_calls.values() if not f.done())
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,150 @@
+"""Spot catalog with a per-destination inverted category index.
+Ref: §3.4 景点基础推荐
+
+Dataset (SPOT_CATALOG_PATH, default data/spots.tsv next to this module): one
+line per destination, "<destination>\\t<json>", the JSON holding the city
+center and compact spot rows [name, categories, popularity 0-100, lat, lon].
+An "@aliases" line maps preference words (海边, 小吃, ...) to categories.
+
+Opening the catalog only splits lines at the first tab; a destination's JSON
+is parsed and its category -> spot index built on first lookup. top() scores
+spots by matched categories first, popularity second, and pads with the most
+popular remaining spots so the itinerary prompt always gets `limit` names.
+"""
+from __future__ import annotations
+import heapq, json, os
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from .config import SPOT_CATALOG_PATH
+from .logger import log_info, log_error
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "data", "spots.tsv")
+MATCH_WEIGHT = 1.0  # one matched category outranks any popularity gap (popularity is scaled to 0..1)
+
+
+@dataclass(frozen=True)
+class Spot:
+    name: str
+    categories: Tuple[str, ...]
+    popularity: int
+    lat: float
+    lon: float
+
+
+@dataclass
+class _DestinationIndex:
+    center: Tuple[float, float]
+    spots: List[Spot]
+    by_category: Dict[str, List[int]]
+    by_popularity: List[int]
+
+
+class SpotCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self.aliases: Dict[str, List[str]] = {}
+        self._raw: Dict[str, str] = {}
+        self._index: Dict[str, _DestinationIndex] = {}
+        self._lock = Lock()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                key, _, payload = line.rstrip("\n").partition("\t")
+                if key == "@aliases":
+                    self.aliases = json.loads(payload)
+                else:
+                    self._raw[key] = payload
+
+    def _key(self, destination: str) -> Optional[str]:
+        if destination in self._raw:
+            return destination
+        short = destination.rstrip("市")
+        return short if short in self._raw else None
+
+    def covers(self, destination: str) -> bool:
+        return self._key(destination) is not None
+
+    def destinations(self) -> List[str]:
+        return list(self._raw)
+
+    def index(self, destination: str) -> Optional[_DestinationIndex]:
+        key = self._key(destination)
+        if key is None:
+            return None
+        idx = self._index.get(key)
+        if idx is None:
+            with self._lock:
+                idx = self._index.get(key)
+                if idx is None:
+                    idx = self._index[key] = self._build(json.loads(self._raw[key]))
+        return idx
+
+    @staticmethod
+    def _build(data: Dict) -> _DestinationIndex:
+        spots = [Spot(name, tuple(cats), int(pop), float(lat), float(lon)) for name, cats, pop, lat, lon in data["spots"]]
+        by_category: Dict[str, List[int]] = {}
+        for i, s in enumerate(spots):
+            for c in s.categories:
+                by_category.setdefault(c, []).append(i)
+        by_popularity = sorted(range(len(spots)), key=lambda i: -spots[i].popularity)  # stable: ties keep file order
+        return _DestinationIndex(tuple(data["center"]), spots, by_category, by_popularity)
+
+    def resolve(self, preferences: Sequence[str]) -> List[str]:
+        """Catalog categories for the preference words (unknown words pass through unchanged)."""
+        out: List[str] = []
+        for p in preferences:
+            for c in self.aliases.get(p, [p]):
+                if c not in out:
+                    out.append(c)
+        return out
+
+    def top(self, destination: str, categories: Optional[Sequence[str]] = None, limit: int = 10) -> Optional[List[Spot]]:
+        """Best `limit` spots for the preferences (None when the destination is not in the catalog)."""
+        idx = self.index(destination)
+        if idx is None:
+            return None
+        if limit <= 0:
+            return []
+        hits: Dict[int, int] = {}
+        for c in self.resolve(categories or []):
+            for i in idx.by_category.get(c, ()):
+                hits[i] = hits.get(i, 0) + 1
+        spots = idx.spots
+        picked = heapq.nsmallest(limit, hits, key=lambda i: (-(MATCH_WEIGHT * hits[i] + spots[i].popularity / 100.0), i))
+        if len(picked) < limit:
+            picked += [i for i in idx.by_popularity if i not in hits][:limit - len(picked)]
+        return [spots[i] for i in picked]
+
+
+_CATALOG: Optional[SpotCatalog] = None
+_LOADED = False
+_LOCK = Lock()
+
+
+def spot_catalog() -> Optional[SpotCatalog]:
+    """Catalog from SPOT_CATALOG_PATH (or the bundled dataset), opened once per process; None when unreadable."""
+    global _CATALOG, _LOADED
+    if _LOADED:
+        return _CATALOG
+    with _LOCK:
+        if not _LOADED:
+            path = SPOT_CATALOG_PATH or DEFAULT_CATALOG_PATH
+            try:
+                _CATALOG = SpotCatalog(path)
+                log_info("spots", "catalog_loaded", extra={"path": path, "destinations": len(_CATALOG.destinations())})
+            except (OSError, ValueError) as e:
+                log_error("spots", str(e), code="SPOT_CATALOG_UNAVAILABLE", extra={"path": path})
+            _LOADED = True
+    return _CATALOG
+
+
+def set_spot_catalog(catalog: Optional[SpotCatalog]) -> None:
+    """Swap the process catalog (tests, or after editing the dataset)."""
+    global _CATALOG, _LOADED
+    with _LOCK:
+        _CATALOG, _LOADED = catalog, True
+
+
+__all__ = ["Spot", "SpotCatalog", "spot_catalog", "set_spot_catalog", "DEFAULT_CATALOG_PATH"]
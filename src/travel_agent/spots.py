@@ -1,8 +1,10 @@
-"""Basic spot fetch.
+"""Basic spot fetch (bundled spot catalog, or generic placeholders).
 Ref: §3.4 景点基础推荐
 """
 from typing import List, Optional
 from .errors import DomainError
+from .stage_cache import SPOT_CACHE
+from .spot_catalog import spot_catalog
 
 DEFAULT_SPOTS = ["博物馆", "中央公园", "美食街", "历史广场", "河畔步道"]
 
@@ -10,6 +12,20 @@ DEFAULT_SPOTS = ["博物馆", "中央公园", "美食街", "历史广场", "河
 def spot_fetch_basic(destination: str, categories: Optional[List[str]] = None, limit: int = 10) -> List[str]:
     if not destination:
         raise DomainError("SPOT_FETCH_FAIL", "Destination missing")
+    cats = sorted(categories or [])  # order-insensitive, so equal category sets share one entry
+    key = {"destination": destination, "categories": cats, "limit": limit}
+    return SPOT_CACHE.get_or_compute(key, lambda: _catalog_spots(destination, cats, limit))
+
+
+def _catalog_spots(destination: str, categories: List[str], limit: int) -> List[str]:
+    catalog = spot_catalog()
+    spots = catalog.top(destination, categories, limit) if catalog is not None else None
+    if spots is None:  # destination not in the catalog
+        return _basic_spots(categories, limit)
+    return [s.name for s in spots]
+
+
+def _basic_spots(categories: Optional[List[str]], limit: int) -> List[str]:
     spots = DEFAULT_SPOTS.copy()
     if categories:
         # naive category influence: append category labels
@@ -0,0 +1,78 @@
+"""Stage sub-result caches for supplier searches.
+Ref: §3.2-3.4 搜索 + §7 会话与缓存策略
+
+The plan result cache is keyed on the whole intent, so plans that differ only
+in budget or preferences still repeat every search. Each cache here is keyed
+on just the inputs its search reads and has its own TTL:
+
+- flights: origin, destination, depart_date, currency   (FLIGHT_CACHE_TTL_SECONDS)
+- hotels:  destination, nights, depart_date, currency   (HOTEL_CACHE_TTL_SECONDS)
+- spots:   destination, categories                      (SPOT_CACHE_TTL_SECONDS)
+
+Values are stored as JSON (same LRU+TTL / Redis stores as the LLM cache), so
+every hit returns fresh model objects.
+"""
+from __future__ import annotations
+import hashlib, json
+from typing import Any, Callable, Dict, List, TypeVar
+from pydantic import TypeAdapter
+from .config import (
+    STAGE_CACHE_ENABLE, STAGE_CACHE_BACKEND, STAGE_CACHE_MAX_ENTRIES,
+    FLIGHT_CACHE_TTL_SECONDS, HOTEL_CACHE_TTL_SECONDS, SPOT_CACHE_TTL_SECONDS, REDIS_URL,
+)
+from .models import FlightOption, HotelOption
+from .llm_cache import InMemoryLLMCache, RedisLLMCache, redis
+from .metrics import METRICS_STAGE_CACHE
+
+T = TypeVar("T")
+
+
+def _create_store(stage: str, ttl_seconds: int):
+    if STAGE_CACHE_BACKEND == "redis" and REDIS_URL and redis is not None:
+        try:
+            store = RedisLLMCache(REDIS_URL, ttl_seconds=ttl_seconds, prefix=f"stc:{stage}:")
+            store.client.ping()
+            return store
+        except Exception:  # pragma: no cover
+            pass
+    return InMemoryLLMCache(max_entries=STAGE_CACHE_MAX_ENTRIES, ttl_seconds=ttl_seconds)
+
+
+class StageCache:
+    def __init__(self, stage: str, adapter: TypeAdapter, ttl_seconds: int, store=None):
+        self.stage = stage
+        self.adapter = adapter
+        self.store = store or _create_store(stage, ttl_seconds)
+
+    def key(self, fields: Dict[str, Any]) -> str:
+        s = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, fields: Dict[str, Any], compute: Callable[[], T]) -> T:
+        if not STAGE_CACHE_ENABLE:
+            return compute()
+        k = self.key(fields)
+        try:
+            raw = self.store.get(k)
+        except Exception:  # redis unavailable: behave as a miss
+            raw = None
+        if raw is not None:
+            METRICS_STAGE_CACHE.hit(self.stage)
+            return self.adapter.validate_json(raw)
+        METRICS_STAGE_CACHE.miss(self.stage)
+        value = compute()
+        try:
+            self.store.put(k, self.adapter.dump_json(value).decode("utf-8"))
+        except Exception:  # pragma: no cover
+            pass
+        return value
+
+    def clear(self) -> None:
+        self.store.clear()
+
+
+FLIGHT_CACHE = StageCache("flights", TypeAdapter(List[FlightOption]), FLIGHT_CACHE_TTL_SECONDS)
+HOTEL_CACHE = StageCache("hotels", TypeAdapter(List[HotelOption]), HOTEL_CACHE_TTL_SECONDS)
+SPOT_CACHE = StageCache("spots", TypeAdapter(List[str]), SPOT_CACHE_TTL_SECONDS)
+
+__all__ = ["StageCache", "FLIGHT_CACHE", "HOTEL_CACHE", "SPOT_CACHE"]
@@ -0,0 +1,227 @@
+"""Dependency-driven stage scheduler for the planning workflow.
+Ref: §4 工作流编排
+
+Each Stage names the stages whose outputs it consumes. The executor starts a
+stage as soon as all of its dependencies are done, so flights, hotels and
+spots run concurrently and budget overlaps with the itinerary LLM call:
+critical path = max(searches) + itinerary.
+
+`intent_fields` lists the TripIntent fields a stage reads; checkpoints use it
+to decide which stage outputs are still valid for a changed intent.
+Under a request deadline, stages with a `degrade` function that cannot finish
+in time resolve to its degraded output and add a DEADLINE_* warning.
+"""
+from __future__ import annotations
+import asyncio, contextvars, time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from .config import WORKFLOW_STAGE_WORKERS
+from .models import TripIntent, PlanningResult
+from .flight import flight_search, flight_search_async
+from .hotel import hotel_search, hotel_search_async
+from .spots import spot_fetch_basic
+from .itinerary import itinerary_generate, itinerary_generate_async, itinerary_fallback
+from .budget import budget_allocate
+from .logger import log_info, log_error
+from .deadline import Deadline, current_deadline, deadline_warnings
+
+StageFn = Callable[[TripIntent, Dict[str, Any]], Any]
+OnDone = Callable[[str, Any], None]
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    deps: Tuple[str, ...]
+    run: StageFn
+    arun: Optional[Callable[[TripIntent, Dict[str, Any]], Awaitable[Any]]] = None  # None: run inline on the loop
+    intent_fields: Tuple[str, ...] = ()
+    degrade: Optional[StageFn] = None  # cheap substitute used when the request deadline is near
+
+
+PLAN_STAGES: Tuple[Stage, ...] = (
+    Stage("flights", (), lambda intent, _: flight_search(intent), lambda intent, _: flight_search_async(intent),
+          intent_fields=("origin", "destination", "depart_date", "currency")),
+    Stage("hotels", (), lambda intent, _: hotel_search(intent), lambda intent, _: hotel_search_async(intent),
+          intent_fields=("destination", "depart_date", "days", "nights", "currency")),
+    Stage("spots", (), lambda intent, _: spot_fetch_basic(intent.destination, intent.preferences),
+          intent_fields=("destination", "preferences")),
+    Stage("itinerary", ("spots",), lambda intent, d: itinerary_generate(intent, d["spots"]),
+          lambda intent, d: itinerary_generate_async(intent, d["spots"]),
+          intent_fields=("destination", "depart_date", "days", "travelers", "preferences"),
+          degrade=lambda intent, _: itinerary_fallback(intent)),
+    Stage("budget", ("flights", "hotels"), lambda intent, d: budget_allocate(intent, d["flights"], d["hotels"]),
+          intent_fields=("budget_total", "days", "travelers", "currency")),
+)
+
+_STAGE_POOL: ThreadPoolExecutor | None = None
+
+
+def _stage_pool() -> ThreadPoolExecutor:
+    global _STAGE_POOL
+    if _STAGE_POOL is None:
+        _STAGE_POOL = ThreadPoolExecutor(max_workers=WORKFLOW_STAGE_WORKERS, thread_name_prefix="stage")
+    return _STAGE_POOL
+
+
+def _ready(stages: Iterable[Stage], done: Dict[str, Any], started: set) -> List[Stage]:
+    return [s for s in stages if s.name not in started and all(d in done for d in s.deps)]
+
+
+def _timed(fn: StageFn, intent: TripIntent, inputs: Dict[str, Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    value = fn(intent, inputs)
+    return value, (time.perf_counter() - t0) * 1000.0
+
+
+async def _atimed(stage: Stage, intent: TripIntent, inputs: Dict[str, Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    value = await stage.arun(intent, inputs) if stage.arun else stage.run(intent, inputs)
+    return value, (time.perf_counter() - t0) * 1000.0
+
+
+def _log_stage(stage: Stage, session_id: str, ms: float) -> None:
+    log_info(stage.name, "stage_done", session_id=session_id, extra={"stage_ms": round(ms, 2)})
+
+
+def _seeded(stages: Tuple[Stage, ...], seed: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    names = {s.name for s in stages}
+    return {k: v for k, v in (seed or {}).items() if k in names}
+
+
+def degrade_stage(stage: Stage, intent: TripIntent, inputs: Dict[str, Any], session_id: str, dl: Deadline) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    value = stage.degrade(intent, inputs)
+    dl.warn(f"DEADLINE_{stage.name.upper()}_DEGRADED")
+    log_error(stage.name, "stage_degraded", session_id=session_id, code="DEADLINE_NEAR",
+              extra={"remaining_ms": int(dl.remaining_s() * 1000)})
+    return value, (time.perf_counter() - t0) * 1000.0
+
+
+def _wait_timeout(dl: Optional[Deadline], running: Iterable[Stage]) -> Optional[float]:
+    # only wake up at the deadline when something can still be degraded
+    return dl.work_remaining_s() if dl is not None and any(st.degrade for st in running) else None
+
+
+def run_stages(intent: TripIntent, session_id: str, stages: Tuple[Stage, ...] = PLAN_STAGES, *,
+               seed: Optional[Dict[str, Any]] = None, on_done: Optional[OnDone] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run stages on the shared thread pool; returns (outputs, timings_ms).
+    Stages present in `seed` (e.g. checkpoints) are not re-run; `on_done(name, value)`
+    is called for each stage that completes normally. The first stage error cancels
+    stages not yet started and is re-raised.
+    """
+    outputs: Dict[str, Any] = _seeded(stages, seed)
+    timings: Dict[str, float] = {}
+    started: set = set(outputs)
+    running: Dict[Future, Stage] = {}
+    inputs_of: Dict[Future, Dict[str, Any]] = {}
+    pool = _stage_pool()
+    dl = current_deadline()
+
+    def submit_ready() -> None:
+        ready = _ready(stages, outputs, started)
+        while ready:
+            for st in ready:
+                started.add(st.name)
+                inputs = {d: outputs[d] for d in st.deps}
+                if st.degrade and dl is not None and dl.near():
+                    outputs[st.name], timings[st.name] = degrade_stage(st, intent, inputs, session_id, dl)
+                    continue
+                # each stage runs in a copy of the caller's context (deadline, trace ids)
+                f = pool.submit(contextvars.copy_context().run, _timed, st.run, intent, inputs)
+                running[f] = st
+                inputs_of[f] = inputs
+            ready = _ready(stages, outputs, started)
+
+    submit_ready()
+    while running:
+        done, _ = wait(running, timeout=_wait_timeout(dl, running.values()), return_when=FIRST_COMPLETED)
+        if not done:
+            for f in [f for f, st in running.items() if st.degrade]:
+                st = running.pop(f)
+                f.cancel()  # an already-started call finishes in the pool and is discarded
+                outputs[st.name], timings[st.name] = degrade_stage(st, intent, inputs_of.pop(f), session_id, dl)
+        for f in done:
+            st = running.pop(f)
+            inputs_of.pop(f, None)
+            try:
+                outputs[st.name], timings[st.name] = f.result()
+            except BaseException:
+                for other in running:
+                    other.cancel()
+                raise
+            _log_stage(st, session_id, timings[st.name])
+            if on_done:
+                on_done(st.name, outputs[st.name])
+        submit_ready()
+    return outputs, timings
+
+
+async def arun_stages(intent: TripIntent, session_id: str, stages: Tuple[Stage, ...] = PLAN_STAGES, *,
+                      seed: Optional[Dict[str, Any]] = None, on_done: Optional[OnDone] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """asyncio counterpart of run_stages; stages without `arun` execute inline."""
+    outputs: Dict[str, Any] = _seeded(stages, seed)
+    timings: Dict[str, float] = {}
+    started: set = set(outputs)
+    running: Dict[asyncio.Task, Stage] = {}
+    inputs_of: Dict[asyncio.Task, Dict[str, Any]] = {}
+    dl = current_deadline()
+
+    def submit_ready() -> None:
+        ready = _ready(stages, outputs, started)
+        while ready:
+            for st in ready:
+                started.add(st.name)
+                inputs = {d: outputs[d] for d in st.deps}
+                if st.degrade and dl is not None and dl.near():
+                    outputs[st.name], timings[st.name] = degrade_stage(st, intent, inputs, session_id, dl)
+                    continue
+                t = asyncio.ensure_future(_atimed(st, intent, inputs))
+                running[t] = st
+                inputs_of[t] = inputs
+            ready = _ready(stages, outputs, started)
+
+    submit_ready()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, timeout=_wait_timeout(dl, running.values()),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                for t in [t for t, st in running.items() if st.degrade]:
+                    st = running.pop(t)
+                    t.cancel()
+                    outputs[st.name], timings[st.name] = degrade_stage(st, intent, inputs_of.pop(t), session_id, dl)
+            for t in done:
+                st = running.pop(t)
+                inputs_of.pop(t, None)
+                outputs[st.name], timings[st.name] = t.result()
+                _log_stage(st, session_id, timings[st.name])
+                if on_done:
+                    on_done(st.name, outputs[st.name])
+            submit_ready()
+    finally:
+        for t in running:
+            t.cancel()
+    return outputs, timings
+
+
+def planning_result(intent: TripIntent, session_id: str, outputs: Dict[str, Any], timings: Dict[str, float]) -> PlanningResult:
+    if intent.budget_total is None:
+        # budget_allocate fills in its estimate; keep that when budget came from a checkpoint
+        intent.budget_total = outputs["budget"].total
+    return PlanningResult(
+        session_id=session_id,
+        intent=intent,
+        flights=outputs["flights"],
+        hotels=outputs["hotels"],
+        itinerary=outputs["itinerary"],
+        budget=outputs["budget"],
+        generated_at=datetime.utcnow(),
+        warnings=deadline_warnings(),
+        stage_timings_ms={k: round(v, 2) for k, v in timings.items()},
+    )
+
+
+__all__ = ["Stage", "PLAN_STAGES", "run_stages", "arun_stages", "degrade_stage", "planning_result"]
@@ -0,0 +1,118 @@
+"""Plan job worker.
+Ref: §4 工作流编排
+
+Claims jobs from the job queue and runs continue_workflow_shared on them, so
+planning capacity scales independently of the API processes:
+
+    JOBS_BACKEND=redis REDIS_URL=redis://... python -m travel_agent.worker --concurrency 8
+
+With the in-memory backend the API runs JOBS_INPROCESS_WORKERS of these
+threads itself. Each pool also runs a reaper thread that re-queues jobs whose
+worker died mid-run (see jobs.requeue_stale).
+"""
+from __future__ import annotations
+import argparse, json, sys, time
+from threading import Event, Thread
+from typing import Dict, List, Optional
+from .config import JOBS_INPROCESS_WORKERS, JOBS_LEASE_SECONDS
+from .models import TripIntent
+from .workflow import continue_workflow_shared
+from .errors import DomainError
+from .logger import log_info, log_error
+from .metrics import METRICS
+from .jobs import JOBS, InMemoryJobQueue
+
+
+def run_job(queue, rec: Dict) -> None:
+    job_id, session_id = rec["job_id"], rec["session_id"]
+    start_ts = time.time()
+    try:
+        intent = TripIntent.model_validate(rec["intent"])
+        result = continue_workflow_shared(intent, session_id)
+    except DomainError as de:
+        log_error("job", de.message, session_id=session_id, code=de.code, extra={"job_id": job_id})
+        queue.finish(job_id, error={"code": de.code, "message": de.message, "detail": de.detail})
+        METRICS.job("failed")
+        return
+    except Exception as e:  # noqa: BLE001 - a broken job must not kill the worker
+        log_error("job", str(e), session_id=session_id, code="JOB_FAILED", extra={"job_id": job_id})
+        queue.finish(job_id, error={"code": "JOB_FAILED", "message": str(e)})
+        METRICS.job("failed")
+        return
+    queue.finish(job_id, result=json.loads(result.model_dump_json()))
+    METRICS.job("done")
+    log_info("job", "completed", session_id=session_id, extra={"job_id": job_id, "latency_ms": int((time.time() - start_ts) * 1000)})
+
+
+class JobWorkerPool:
+    def __init__(self, queue=None, concurrency: int = JOBS_INPROCESS_WORKERS, poll_seconds: float = 1.0,
+                 reap_seconds: Optional[float] = None):
+        self.queue = queue or JOBS
+        self.concurrency = concurrency
+        self.poll = poll_seconds
+        self.reap = reap_seconds if reap_seconds is not None else min(max(JOBS_LEASE_SECONDS / 4, 1.0), 60.0)
+        self._stop = Event()
+        self._threads: List[Thread] = []
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                rec = self.queue.claim(self.poll)
+                if rec is not None:
+                    run_job(self.queue, rec)
+            except Exception as e:  # noqa: BLE001 - redis hiccup: back off; an unfinished job is re-queued by the reaper
+                log_error("job", str(e), code="JOB_CLAIM_FAIL")
+                self._stop.wait(self.poll)
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(self.reap):
+            try:
+                n = self.queue.requeue_stale()
+            except Exception as e:  # noqa: BLE001 - redis hiccup: try again next round
+                log_error("job", str(e), code="JOB_REAP_FAIL")
+                continue
+            if n:
+                METRICS.job("requeued", n)
+                log_info("job", "requeued_stale", extra={"count": n})
+
+    def start(self) -> "JobWorkerPool":
+        if not self._threads:
+            self._threads = [Thread(target=self._loop, name=f"job-worker-{i}", daemon=True) for i in range(self.concurrency)]
+            self._threads.append(Thread(target=self._reap_loop, name="job-reaper", daemon=True))
+            for t in self._threads:
+                t.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run plan job workers")
+    ap.add_argument("--concurrency", type=int, default=max(JOBS_INPROCESS_WORKERS, 1))
+    args = ap.parse_args()
+    if isinstance(JOBS, InMemoryJobQueue):
+        # a private in-memory queue never receives jobs from the API processes
+        log_error("job", "standalone worker needs JOBS_BACKEND=redis with a reachable REDIS_URL", code="JOB_BACKEND_UNAVAILABLE")
+        sys.exit(1)
+    pool = JobWorkerPool(concurrency=args.concurrency).start()
+    log_info("job", "worker_started", extra={"concurrency": args.concurrency, "backend": type(pool.queue).__name__})
+    try:
+        while pool.running:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop(timeout=5.0)
+
+
+__all__ = ["JobWorkerPool", "run_job", "main"]
+
+if __name__ == "__main__":
+    main()
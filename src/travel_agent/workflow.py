@@ -2,92 +2,214 @@
 Ref: §3.8 工作流执行入口 + §4 工作流编排
 """
 from __future__ import annotations
-from typing import List, Tuple
-import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Iterator, Any, Dict, Optional, Union
 from datetime import datetime
+from .config import PLAN_BATCH_CONCURRENCY
 from .models import TripIntent, PlanningResult
 from .intent import intent_clarify_loop, intent_parse
 from .flight import flight_search
 from .hotel import hotel_search
 from .spots import spot_fetch_basic
-from .itinerary import itinerary_generate
+from .itinerary import itinerary_stream
 from .budget import budget_allocate
 from .errors import DomainError
 from .logger import log_info, log_error
 from .metrics import METRICS
+from .cache_util import intent_hash, cache_get, cache_put
+from .singleflight import SingleFlight
+from .stage_graph import run_stages, arun_stages, planning_result
+from .checkpoint import PlanCheckpoint, save_plan
+from .deadline import current_deadline
 
+# concurrent plans for the same intent share one workflow run
+WORKFLOW_FLIGHT = SingleFlight("workflow")
 
-def continue_workflow(intent: TripIntent, session_id: str) -> PlanningResult:
+
+def continue_workflow(intent: TripIntent, session_id: str, seed: Optional[Dict[str, Any]] = None) -> PlanningResult:
     """Execute downstream steps assuming intent finalized.
-    Ref: §3.8
+    Ref: §3.8 — stages run as soon as their inputs are ready (see stage_graph);
+    stages checkpointed for this session with unchanged inputs are reused.
+    `seed` supplies stage outputs computed elsewhere (clarify-time prefetch).
     """
     start_ts = __import__("time").time()
-    flights = flight_search(intent)
-    log_info("flights", "retrieved", session_id=session_id, extra={"count": len(flights)})
-    hotels = hotel_search(intent)
-    log_info("hotels", "retrieved", session_id=session_id, extra={"count": len(hotels)})
-    spots = spot_fetch_basic(intent.destination, intent.preferences)
-    log_info("spots", "retrieved", session_id=session_id, extra={"count": len(spots)})
-    itinerary = itinerary_generate(intent, spots)
-    log_info("itinerary", "generated", session_id=session_id)
-    budget = budget_allocate(intent, flights, hotels)
-    log_info("budget", "allocated", session_id=session_id)
-    latency_ms = (__import__("time").time() - start_ts) * 1000.0
-    METRICS.record_workflow_latency(latency_ms)
-    return PlanningResult(
-        session_id=session_id,
-        intent=intent,
-        flights=flights,
-        hotels=hotels,
-        itinerary=itinerary,
-        budget=budget,
-        generated_at=datetime.utcnow(),
-        warnings=[]
-    )
+    ckpt = PlanCheckpoint(intent, session_id)
+    seeded = {**ckpt.seed(), **(seed or {})}
+    for name, value in (seed or {}).items():
+        ckpt.save(name, value)
+    outputs, timings = run_stages(intent, session_id, seed=seeded, on_done=ckpt.save)
+    METRICS.record_workflow_latency((__import__("time").time() - start_ts) * 1000.0)
+    return planning_result(intent, session_id, outputs, timings)
 
 
-async def _parallel_flights_hotels(intent: TripIntent) -> Tuple[List[dict], List[dict]]:
-    loop = asyncio.get_running_loop()
-    flights_task = loop.run_in_executor(None, flight_search, intent)
-    hotels_task = loop.run_in_executor(None, hotel_search, intent)
-    flights, hotels = await asyncio.gather(flights_task, hotels_task)
-    return flights, hotels
+async def continue_workflow_async(intent: TripIntent, session_id: str) -> PlanningResult:
+    """asyncio-native continue_workflow: stages are tasks and the itinerary
+    LLM call goes through the async HTTP client, so the event loop is never
+    blocked. Spots and budget are in-memory computations run inline.
+    """
+    start_ts = __import__("time").time()
+    ckpt = PlanCheckpoint(intent, session_id)
+    outputs, timings = await arun_stages(intent, session_id, seed=ckpt.seed(), on_done=ckpt.save)
+    METRICS.record_workflow_latency((__import__("time").time() - start_ts) * 1000.0)
+    return planning_result(intent, session_id, outputs, timings)
 
 
 async def orchestrate_parallel(intent: TripIntent, session_id: str) -> PlanningResult:
-    """Parallel variant: flights + hotels concurrently then remaining sequential steps.
+    """Parallel variant: every stage starts as soon as its inputs are ready, all on the loop.
     Used by /plan_v2 endpoint.
     """
-    start_ts = __import__('time').time()
-    flights, hotels = await _parallel_flights_hotels(intent)
-    log_info("flights", "retrieved", session_id=session_id, extra={"count": len(flights), "mode": "parallel"})
-    log_info("hotels", "retrieved", session_id=session_id, extra={"count": len(hotels), "mode": "parallel"})
-    spots = spot_fetch_basic(intent.destination, intent.preferences)
-    log_info("spots", "retrieved", session_id=session_id, extra={"count": len(spots)})
-    itinerary = itinerary_generate(intent, spots)
-    log_info("itinerary", "generated", session_id=session_id)
-    budget = budget_allocate(intent, flights, hotels)
-    log_info("budget", "allocated", session_id=session_id)
-    latency_ms = (__import__('time').time() - start_ts) * 1000.0
-    METRICS.record_workflow_latency(latency_ms)
+    result = await continue_workflow_async(intent, session_id)
     # custom metric increment for parallel variant
     try:
         from .metrics import METRICS_PARALLEL  # may not exist yet
         METRICS_PARALLEL.inc_parallel()
     except Exception:
         pass
-    return PlanningResult(
+    return result
+
+
+def stream_workflow(intent: TripIntent, session_id: str) -> Iterator[Tuple[str, Any]]:
+    """Streaming variant of continue_workflow.
+    Yields ("day", DayPlan) as each itinerary day is generated, then ("result", PlanningResult).
+    """
+    start_ts = __import__("time").time()
+    flights = flight_search(intent)
+    hotels = hotel_search(intent)
+    spots = spot_fetch_basic(intent.destination, intent.preferences)
+    log_info("search", "retrieved", session_id=session_id, extra={"flights": len(flights), "hotels": len(hotels), "spots": len(spots), "mode": "stream"})
+    stream = itinerary_stream(intent, spots)
+    for day in stream:
+        log_info("itinerary", "day_generated", session_id=session_id, extra={"day_index": day.day_index}, start_ts=start_ts)
+        yield "day", day
+    budget = budget_allocate(intent, flights, hotels)
+    METRICS.record_workflow_latency((__import__("time").time() - start_ts) * 1000.0)
+    yield "result", PlanningResult(
         session_id=session_id,
         intent=intent,
         flights=flights,
         hotels=hotels,
-        itinerary=itinerary,
+        itinerary=stream.itinerary(),
         budget=budget,
         generated_at=datetime.utcnow(),
         warnings=[]
     )
 
 
+def _rebind(result: PlanningResult, session_id: str) -> PlanningResult:
+    # follower receives the leader's plan under its own session id
+    return result.model_copy(update={
+        "session_id": session_id,
+        "intent": result.intent.model_copy(update={"session_id": session_id}),
+    })
+
+
+def record_plan(result: PlanningResult, session_id: str) -> PlanningResult:
+    """The result as returned to `session_id` (rebound if it was planned for another session),
+    saved as that session's last plan for /replan. Every path returning a plan goes through here."""
+    out = _rebind(result, session_id) if result.session_id != session_id else result
+    save_plan(session_id, out)
+    return out
+
+
+def _follower_wait() -> Optional[float]:
+    # a follower waits for the leader only while it could still plan (or degrade) on its own
+    dl = current_deadline()
+    return dl.work_remaining_s() if dl is not None else None
+
+
+def _degraded(result: PlanningResult) -> bool:
+    return any(w.startswith("DEADLINE_") for w in result.warnings)
+
+
+def continue_workflow_shared(intent: TripIntent, session_id: str, seed: Optional[Dict[str, Any]] = None) -> PlanningResult:
+    """continue_workflow with in-flight de-duplication by intent_hash.
+    The leader re-checks and fills the result cache before followers are released.
+    A follower runs its own plan under its own deadline when the leader outlasts that
+    deadline or hands back a deadline-degraded plan.
+    """
+    def run() -> PlanningResult:
+        cached = cache_get(intent)
+        if cached:
+            return cached
+        result = continue_workflow(intent, session_id, seed=seed) if seed else continue_workflow(intent, session_id)
+        cache_put(intent, result)
+        return result
+    try:
+        result, shared = WORKFLOW_FLIGHT.do(intent_hash(intent), run, timeout=_follower_wait())
+    except TimeoutError:
+        log_info("workflow", "singleflight_wait_timeout", session_id=session_id)
+        result, shared = run(), False
+    if shared and _degraded(result):
+        result = run()
+    return record_plan(result, session_id)
+
+
+def plan_batch(intents: List[TripIntent], max_workers: int = PLAN_BATCH_CONCURRENCY,
+               stats: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, Union[PlanningResult, DomainError], bool]]:
+    """Plan many finalized intents; yields (index, result | DomainError, cached) as each finishes.
+    Intents are grouped by intent_hash and the result cache is checked once per group,
+    so work grows with the number of unique uncached intents, at most max_workers at a time.
+    """
+    groups: Dict[str, List[int]] = {}
+    for i, intent in enumerate(intents):
+        groups.setdefault(intent_hash(intent), []).append(i)
+    pending: Dict[str, List[int]] = {}
+    hits = 0
+    for key, idxs in groups.items():
+        cached = cache_get(intents[idxs[0]])
+        if cached is None:
+            METRICS.cache_miss()
+            pending[key] = idxs
+            continue
+        METRICS.cache_hit()
+        hits += 1
+        for i in idxs:
+            yield i, record_plan(cached, intents[i].session_id), True
+    if stats is not None:
+        stats.update(unique=len(groups), cached=hits)
+    log_info("workflow", "batch", extra={"items": len(intents), "unique": len(groups), "cached": hits})
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(pending)), 1), thread_name_prefix="plan-batch") as pool:
+        futures = {}
+        for key, idxs in pending.items():
+            leader = intents[idxs[0]]
+            futures[pool.submit(contextvars.copy_context().run, continue_workflow_shared, leader, leader.session_id)] = idxs
+        for fut in as_completed(futures):
+            idxs = futures[fut]
+            try:
+                result: Union[PlanningResult, DomainError] = fut.result()
+            except DomainError as de:
+                result = de
+            except Exception as e:  # noqa: BLE001 - one broken group must not end the batch
+                log_error("workflow", str(e), session_id=intents[idxs[0]].session_id, code="WORKFLOW_FAIL")
+                result = DomainError("WORKFLOW_FAIL", "Planning failed", detail=type(e).__name__)
+            for i in idxs:
+                # the leader's plan was recorded by continue_workflow_shared
+                out = result if isinstance(result, DomainError) or i == idxs[0] else record_plan(result, intents[i].session_id)
+                yield i, out, False
+
+
+async def orchestrate_parallel_shared(intent: TripIntent, session_id: str) -> PlanningResult:
+    """Async counterpart of continue_workflow_shared for orchestrate_parallel (same follower rules)."""
+    async def run() -> PlanningResult:
+        cached = cache_get(intent)
+        if cached:
+            return cached
+        result = await orchestrate_parallel(intent, session_id)
+        cache_put(intent, result)
+        return result
+    try:
+        result, shared = await WORKFLOW_FLIGHT.do_async(intent_hash(intent), run, timeout=_follower_wait())
+    except TimeoutError:
+        log_info("workflow", "singleflight_wait_timeout", session_id=session_id)
+        result, shared = await run(), False
+    if shared and _degraded(result):
+        result = await run()
+    return record_plan(result, session_id)
+
+
 def workflow_run(session_id: str, raw_text: str, clarify: bool = True) -> PlanningResult:
     """Legacy helper kept for tests; performs auto clarification then downstream.
     Will be deprecated once external clarify flow used.
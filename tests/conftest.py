@@ -18,3 +18,33 @@ def clear_api_key():
     importlib.reload(cfg)
     importlib.reload(api_mod)
     yield
+
+
+@pytest.fixture
+def make_intent():
+    """Finalized 上海→杭州 intent factory; keyword arguments override fields."""
+    from datetime import date
+    from travel_agent.models import TripIntent
+    def make(sid, **kw):
+        base = dict(session_id=sid, raw_text="", origin="上海", destination="杭州",
+                    depart_date=date(2025, 12, 10), days=3, budget_total=3000)
+        base.update(kw)
+        intent = TripIntent(**base)
+        intent.finalize_dates()
+        return intent
+    return make
+
+
+@pytest.fixture
+def count_calls(monkeypatch):
+    """Wrap a stage_graph function so each call is recorded; returns the call list."""
+    import travel_agent.stage_graph as sg
+    def count(name):
+        calls = []
+        real = getattr(sg, name)
+        def wrapped(*a, **k):
+            calls.append(1)
+            return real(*a, **k)
+        monkeypatch.setattr(sg, name, wrapped)
+        return calls
+    return count
@@ -0,0 +1,35 @@
+import travel_agent.stage_graph as sg
+from travel_agent.checkpoint import CHECKPOINTS
+from travel_agent.errors import DomainError
+from travel_agent.graph_workflow import run_graph
+from travel_agent.workflow import continue_workflow
+
+
+def test_fallback_resumes_after_failed_itinerary(monkeypatch, make_intent, count_calls):
+    CHECKPOINTS.clear()
+    flights = count_calls("flight_search")
+    hotels = count_calls("hotel_search")
+    real_itinerary = sg.itinerary_generate
+    def flaky(intent, spots):
+        monkeypatch.setattr(sg, "itinerary_generate", real_itinerary)
+        raise DomainError("ITINERARY_GEN_FAIL", "timeout")
+    monkeypatch.setattr(sg, "itinerary_generate", flaky)
+    try:
+        run_graph(make_intent("ck1"))
+    except Exception:
+        pass
+    result = continue_workflow(make_intent("ck1"), "ck1")
+    assert result.itinerary.days
+    assert len(flights) == 1 and len(hotels) == 1
+    assert "flights" not in result.stage_timings_ms and "itinerary" in result.stage_timings_ms
+
+
+def test_changed_field_reruns_only_dependent_stages(make_intent, count_calls):
+    CHECKPOINTS.clear()
+    continue_workflow(make_intent("ck2"), "ck2")
+    flights = count_calls("flight_search")
+    hotels = count_calls("hotel_search")
+    result = continue_workflow(make_intent("ck2", days=4), "ck2")
+    assert flights == [] and hotels == [1]  # days feeds hotels, not flights
+    assert set(result.stage_timings_ms) == {"hotels", "itinerary", "budget"}
+    assert len(run_graph(make_intent("ck2", days=4)).stage_timings_ms) == 0  # fully restored
@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+import travel_agent.api as api_mod
+import travel_agent.llm_manager as mgr
+from travel_agent.circuit_breaker import CircuitBreaker, LLM_BREAKERS, CLOSED, OPEN, HALF_OPEN
+from travel_agent.errors import DomainError
+from travel_agent.llm_cache import LLM_CACHE
+
+
+def test_breaker_state_machine():
+    now = [0.0]
+    br = CircuitBreaker("m", window_seconds=60, min_calls=3, error_rate=0.5, slow_ms=1000, slow_rate=0.9,
+                        open_seconds=10, clock=lambda: now[0])
+    br.record(True, 10)
+    br.record(False, 10)
+    assert br.state == CLOSED
+    br.record(False, 10)
+    assert br.state == OPEN and not br.available()
+    now[0] = 11
+    assert br.available() and br.state == HALF_OPEN
+    br.record(True, 10)
+    assert br.state == CLOSED
+    assert br.snapshot()["health"] == 1.0
+
+
+def test_open_primary_is_skipped(monkeypatch):
+    primary, backup = mgr.llm_select_model(0), mgr.llm_select_model(1)
+    calls = []
+    def fake_chat_json(model, prompt, temperature=0.3):
+        calls.append(model)
+        if model == primary:
+            raise DomainError("LLM_NETWORK_FAIL", "down")
+        return {"model": model}
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    LLM_BREAKERS.reset()
+    LLM_CACHE.clear()
+    for i in range(5):
+        mgr.llm_safe_json(f"CB_{i}")
+    assert LLM_BREAKERS.get(primary).state == OPEN
+    calls.clear()
+    assert mgr.llm_safe_json("CB_after") == {"model": backup}
+    assert calls == [backup]
+    health = TestClient(api_mod.app).get("/api/mvp/llm_health").json()
+    assert health["models"][primary]["state"] == "open"
+    LLM_BREAKERS.reset()
+    LLM_CACHE.clear()
+
+
+def test_half_open_admits_one_probe_at_a_time():
+    now = [0.0]
+    br = CircuitBreaker("m", window_seconds=60, min_calls=1, error_rate=0.5, slow_ms=1000, slow_rate=0.9,
+                        open_seconds=10, half_open_probes=1, clock=lambda: now[0])
+    br.record(False, 10)
+    assert br.state == OPEN
+    now[0] = 11
+    assert br.acquire() and br.state == HALF_OPEN
+    # the backlog waits while the probe is in flight
+    assert not br.available() and not br.acquire()
+    br.record(False, 10)
+    assert br.state == OPEN and not br.acquire()
+    now[0] = 22
+    assert br.acquire()
+    br.release()  # no verdict: the slot goes back, still half-open
+    assert br.state == HALF_OPEN and br.acquire()
+    now[0] = 33  # a probe that never reports back frees its slot after open_seconds
+    assert br.acquire()
+    br.record(True, 10)
+    assert br.state == CLOSED and br.acquire() and br.acquire()
+
+
+def test_half_open_probe_blocks_concurrent_calls(monkeypatch):
+    primary, backup = mgr.llm_select_model(0), mgr.llm_select_model(1)
+    LLM_BREAKERS.reset()
+    LLM_CACHE.clear()
+    br = LLM_BREAKERS.get(primary)
+    br._state, br._opened_at = HALF_OPEN, 0.0
+    assert br.acquire()  # a probe is already in flight
+    calls = []
+    def fake_chat_json(model, prompt, temperature=0.3):
+        calls.append(model)
+        return {"model": model}
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    assert mgr.llm_safe_json("CB_probe") == {"model": backup}
+    assert calls == [backup]
+    LLM_BREAKERS.reset()
+    LLM_CACHE.clear()
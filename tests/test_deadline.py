@@ -0,0 +1,44 @@
+import time
+from datetime import date
+from fastapi.testclient import TestClient
+import travel_agent.api as api_mod
+import travel_agent.stage_graph as sg
+from travel_agent.cache_util import cache_get
+from travel_agent.checkpoint import CHECKPOINTS
+from travel_agent.deadline import deadline_scope
+from travel_agent.models import TripIntent
+from travel_agent.workflow import continue_workflow
+
+
+def _slow_itinerary(monkeypatch, secs):
+    real = sg.itinerary_generate
+    def slow(intent, spots):
+        time.sleep(secs)
+        return real(intent, spots)
+    monkeypatch.setattr(sg, "itinerary_generate", slow)
+
+
+def test_slow_itinerary_degrades_at_deadline(monkeypatch):
+    CHECKPOINTS.clear()
+    _slow_itinerary(monkeypatch, 1.0)
+    intent = TripIntent(session_id="dl1", raw_text="", origin="上海", destination="杭州",
+                        depart_date=date(2025, 12, 10), days=3, budget_total=3000)
+    t0 = time.time()
+    with deadline_scope(400):
+        result = continue_workflow(intent, "dl1")
+    assert time.time() - t0 < 0.6
+    assert "DEADLINE_ITINERARY_DEGRADED" in result.warnings
+    assert result.itinerary.summary == "占位行程 (LLM降级)"
+    assert result.flights and result.budget
+
+
+def test_deadline_header_returns_partial_plan_uncached(monkeypatch):
+    CHECKPOINTS.clear()
+    _slow_itinerary(monkeypatch, 1.0)
+    client = TestClient(api_mod.app)
+    r = client.post("/api/mvp/plan", json={"session_id": "dl2", "text": "从上海 预算5000 去厦门 2025-12-11 3天"},
+                    headers={"X-Request-Deadline-Ms": "400"})
+    body = r.json()
+    assert body["success"] is True
+    assert "DEADLINE_ITINERARY_DEGRADED" in body["data"]["warnings"]
+    assert cache_get(TripIntent(**body["data"]["intent"])) is None
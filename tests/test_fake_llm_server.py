@@ -0,0 +1,43 @@
+import importlib.util
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+import travel_agent.llm_adapter as adapter
+from travel_agent.errors import DomainError
+
+_spec = importlib.util.spec_from_file_location("fake_llm_server", Path(__file__).parents[1] / "scripts" / "fake_llm_server.py")
+fake = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake)
+
+
+def _use_fake(monkeypatch, **cfg):
+    monkeypatch.setattr(adapter, "OPENAI_API_KEY", "k")
+    monkeypatch.setattr(adapter, "DEEPSEEK_API_KEY", "k")
+    monkeypatch.setattr(adapter, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setitem(fake.CFG, "latency_ms", 0.0)
+    for k, v in cfg.items():
+        monkeypatch.setitem(fake.CFG, k, v)
+    fake.STATS.clear()
+    original = adapter.get_http_client.__defaults__[0]
+    adapter.close_http_clients()
+    adapter._CLIENTS[original] = TestClient(fake.app)
+    monkeypatch.setattr(adapter, "LLM_BASE_URL", "http://testserver")
+
+
+def test_adapter_json_and_stream_against_fake_server(monkeypatch):
+    _use_fake(monkeypatch)
+    data = adapter.chat_json("gpt-4o-mini", "GENERATE_ITINERARY x")
+    assert data["summary"] == "fake itinerary"
+    text = "".join(adapter.chat_stream("gpt-4o-mini", "GENERATE_ITINERARY x"))
+    assert '"day_index": 2' in text
+    assert fake.STATS["streams"] == 1
+    adapter.close_http_clients()
+
+
+def test_injected_429_is_retried_then_surfaces(monkeypatch):
+    _use_fake(monkeypatch, rate_429=1.0, retry_after=0.0)
+    monkeypatch.setattr(adapter, "LLM_RETRY_MAX", 1)
+    with pytest.raises(DomainError):
+        adapter.chat_json("gpt-4o-mini", "hello")
+    assert fake.STATS["status_429"] == 2
+    adapter.close_http_clients()
@@ -0,0 +1,38 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from travel_agent.flight import flight_search
+from travel_agent.flight_inventory import FlightInventory, build_flight_inventory, set_flight_inventory
+from travel_agent.models import TripIntent
+from travel_agent.stage_cache import FLIGHT_CACHE
+
+
+def _row(o, d, day, hour, price, number, stops=0):
+    dep = datetime(2025, 10, day, hour)
+    return {"origin": o, "destination": d, "depart_time": dep, "arrive_time": dep + timedelta(minutes=120 + 60 * stops),
+            "airline": "EastJet", "flight_number": number, "price": price, "stops": stops}
+
+
+def _intent(o, d, day):
+    return TripIntent(session_id="inv", raw_text="", origin=o, destination=d, depart_date=date(2025, 10, day), days=3)
+
+
+def test_search_reads_only_the_route_date_slice(tmp_path):
+    rows = [_row("上海", "成都", 5, 9, 900, "E1"), _row("上海", "成都", 5, 9, 700, "E1"),  # same flight twice
+            _row("上海", "成都", 5, 13, 1200, "E2", stops=1), _row("上海", "成都", 6, 9, 100, "E3"),
+            _row("北京", "成都", 5, 9, 50, "E4")]
+    assert build_flight_inventory(str(tmp_path), rows) == 5
+    inv = FlightInventory(str(tmp_path))
+    assert isinstance(inv.cols["price"], np.memmap)
+    start, end = inv.slice("上海", "成都", date(2025, 10, 5))
+    assert end - start == 3 and inv.slice("上海", "拉萨", date(2025, 10, 5)) == (0, 0)
+    FLIGHT_CACHE.clear()
+    set_flight_inventory(inv)
+    try:
+        flights = flight_search(_intent("上海", "成都", 5))
+        assert [(f.flight_number, f.price) for f in flights] == [("E1", 700.0), ("E2", 1200.0)]
+        assert all(f.source == "inventory" and f.depart_time.date() == date(2025, 10, 5) for f in flights)
+        # route not in the snapshot falls back to the mock supplier
+        assert flight_search(_intent("上海", "拉萨", 5))[0].source == "mock"
+    finally:
+        set_flight_inventory(None)
+        FLIGHT_CACHE.clear()
@@ -0,0 +1,88 @@
+import numpy as np
+from travel_agent.hotel import hotel_search
+from travel_agent.hotel_inventory import HotelInventory, build_hotel_inventory, set_hotel_inventory
+from travel_agent.models import TripIntent
+from travel_agent.stage_cache import HOTEL_CACHE
+
+CENTER = (30.25, 120.16)
+
+
+def _row(name, km_north, price, rating):
+    return {"destination": "杭州", "name": name, "lat": CENTER[0] + km_north / 110.574, "lon": CENTER[1],
+            "price": price, "rating": rating}
+
+
+def _inventory(tmp_path):
+    rows = [_row("near-cheap", 0.3, 300, 4.2), _row("near-lux", 0.8, 1800, 4.9), _row("mid", 2.5, 500, 4.6),
+            _row("far", 12.0, 200, 4.8), _row("far-bad", 15.0, 150, 3.1)]
+    assert build_hotel_inventory(str(tmp_path), rows, {"杭州": CENTER}, cell_km=1.0) == 5
+    return HotelInventory(str(tmp_path))
+
+
+def test_radius_query_visits_nearby_cells_and_applies_filters(tmp_path):
+    inv = _inventory(tmp_path)
+    assert isinstance(inv.cols["lat"], np.memmap) and inv.covers("杭州") and not inv.covers("拉萨")
+    names = lambda rows: sorted(inv.names[inv.cols["name"][r]] for r in rows)
+    rows, dist = inv.query("杭州", radius_km=1.0)
+    assert names(rows) == ["near-cheap", "near-lux"] and float(dist.max()) <= 1.0
+    assert names(inv.query("杭州", radius_km=3.0, price_max=1000)[0]) == ["mid", "near-cheap"]
+    assert names(inv.query("杭州", min_rating=4.7)[0]) == ["far", "near-lux"]
+    # radius around a point other than the center
+    near = (CENTER[0] + 12.0 / 110.574, CENTER[1])
+    assert names(inv.query("杭州", near=near, radius_km=4.0)[0]) == ["far", "far-bad"]
+
+
+def test_hotel_search_uses_inventory_and_falls_back_to_mock(tmp_path):
+    HOTEL_CACHE.clear()
+    set_hotel_inventory(_inventory(tmp_path))
+    try:
+        intent = TripIntent(session_id="hinv", raw_text="", destination="杭州", days=3)
+        hotels = hotel_search(intent, radius_km=3.0, min_rating=4.5)
+        assert {h.name for h in hotels} == {"near-lux", "mid"}
+        assert all(h.source == "inventory" and h.nights == 2 and h.distance_center_km <= 3.0 for h in hotels)
+        other = TripIntent(session_id="hinv", raw_text="", destination="拉萨", days=3)
+        mock = hotel_search(other, price_max=500)
+        assert mock and all(h.source == "mock" and h.price_per_night <= 500 for h in mock)
+    finally:
+        set_hotel_inventory(None)
+        HOTEL_CACHE.clear()
+
+
+def test_default_radius_widens_instead_of_returning_nothing(tmp_path, monkeypatch):
+    import travel_agent.hotel as hotel_mod
+    monkeypatch.setattr(hotel_mod, "HOTEL_SEARCH_RADIUS_KM", 0.1)
+    HOTEL_CACHE.clear()
+    set_hotel_inventory(_inventory(tmp_path))
+    try:
+        intent = TripIntent(session_id="hinv", raw_text="", destination="杭州", days=3)
+        assert [h.name for h in hotel_search(intent)] == ["near-cheap"]  # widened to 0.4 km
+        assert hotel_search(intent, radius_km=0.1) == []  # an explicit radius stays strict
+        assert {h.name for h in hotel_search(intent, min_rating=4.75)} == {"near-lux", "far"}  # whole city
+    finally:
+        set_hotel_inventory(None)
+        HOTEL_CACHE.clear()
+
+
+def test_zero_radius_is_a_filter_not_a_wildcard(tmp_path):
+    inv = _inventory(tmp_path)
+    assert len(inv.query("杭州", radius_km=0)[0]) == 0 and len(inv.query("杭州")[0]) == 5
+    HOTEL_CACHE.clear()
+    try:
+        for dest in ("杭州", "拉萨"):  # inventory and mock paths
+            set_hotel_inventory(inv if dest == "杭州" else None)
+            intent = TripIntent(session_id="hinv", raw_text="", destination=dest, days=3)
+            assert hotel_search(intent, radius_km=0) == [] and hotel_search(intent, radius_km=1e-6) == []
+    finally:
+        set_hotel_inventory(None)
+        HOTEL_CACHE.clear()
+
+
+def test_hotels_endpoint_validates_query():
+    from fastapi.testclient import TestClient
+    import travel_agent.api as api_mod
+    client = TestClient(api_mod.app)
+    for bad in ("nights=-3", "limit=0", "radius_km=0", "min_rating=6", "price_min=-1", "lat=91&lon=0"):
+        assert client.get(f"/api/mvp/hotels?destination=杭州&{bad}").status_code == 422
+    r = client.get("/api/mvp/hotels?destination=杭州&nights=2&limit=2&price_max=500").json()
+    assert r["success"] is True and len(r["data"]) == 2
+    assert all(h["nights"] == 2 and h["price_per_night"] <= 500 for h in r["data"])
@@ -0,0 +1,175 @@
+from datetime import date
+from fastapi.testclient import TestClient
+import travel_agent.api as api_mod
+from travel_agent.cache_util import cache_clear
+from travel_agent.jobs import InMemoryJobQueue
+from travel_agent.models import TripIntent
+from travel_agent.worker import JobWorkerPool
+
+client = TestClient(api_mod.app)
+
+
+def _intent(sid):
+    i = TripIntent(session_id=sid, raw_text="", origin="上海", destination="杭州",
+                   depart_date=date(2025, 12, 10), days=3, budget_total=3000)
+    i.finalize_dates()
+    return i
+
+
+def test_worker_runs_queued_job():
+    q = InMemoryJobQueue(ttl_seconds=60)
+    info = q.submit(_intent("job1"), "job1")
+    assert info.status == "queued" and q.depth() == 1
+    pool = JobWorkerPool(q, concurrency=1, poll_seconds=0.05).start()
+    try:
+        done = q.wait(info.job_id, 5.0)
+    finally:
+        pool.stop(timeout=1.0)
+    assert done.status == "done" and done.result.session_id == "job1"
+    assert done.result.itinerary.days and done.finished_at >= done.started_at
+
+
+def test_failed_job_reports_error(monkeypatch):
+    import travel_agent.worker as worker
+    def boom(intent, session_id):
+        raise worker.DomainError("WORKFLOW_FAIL", "boom")
+    monkeypatch.setattr(worker, "continue_workflow_shared", boom)
+    q = InMemoryJobQueue(ttl_seconds=60)
+    info = q.submit(_intent("job2"), "job2")
+    worker.run_job(q, q.claim(0.1))
+    failed = q.get(info.job_id)
+    assert failed.status == "failed" and failed.error.code == "WORKFLOW_FAIL"
+
+
+def test_job_api_long_poll():
+    r = client.post("/api/mvp/jobs", json={"session_id": "job3", "text": "从南京去厦门 2025-11-20 4天 预算6000"}).json()
+    assert r["success"] is True and r["data"]["status"] in ("queued", "running", "done")
+    job_id = r["data"]["job_id"]
+    polled = client.get(f"/api/mvp/jobs/{job_id}", params={"wait": 5}).json()
+    assert polled["success"] is True and polled["data"]["status"] == "done"
+    assert polled["data"]["result"]["itinerary"]["days"]
+    missing = client.get("/api/mvp/jobs/nope").json()
+    assert missing["error"]["code"] == "JOB_NOT_FOUND"
+    cache_clear()
+
+
+def test_long_polls_do_not_starve_sync_endpoints(monkeypatch):
+    import threading, time
+    q = InMemoryJobQueue(ttl_seconds=60)  # no workers: the job stays queued
+    monkeypatch.setattr(api_mod, "JOBS", q)
+    job_id = q.submit(_intent("job4"), "job4").job_id
+    with TestClient(api_mod.app) as c:
+        polls = [threading.Thread(target=lambda: c.get(f"/api/mvp/jobs/{job_id}", params={"wait": 1.5}))
+                 for _ in range(60)]  # more than the sync threadpool's 40 threads
+        for t in polls:
+            t.start()
+        time.sleep(0.2)
+        t0 = time.time()
+        assert c.get("/health").status_code == 200
+        assert time.time() - t0 < 0.5
+        for t in polls:
+            t.join()
+
+
+class _FakeRedis:
+    """Just the list / string commands RedisJobQueue uses."""
+
+    def __init__(self):
+        self.kv, self.lists = {}, {}
+
+    def set(self, k, v, ex=None):
+        self.kv[k] = v
+
+    def get(self, k):
+        return self.kv.get(k)
+
+    def lpush(self, k, v):
+        self.lists.setdefault(k, []).insert(0, v)
+
+    def rpush(self, k, v):
+        self.lists.setdefault(k, []).append(v)
+
+    def blmove(self, src, dst, timeout, src_side, dst_side):
+        items = self.lists.get(src) or []
+        if not items:
+            return None
+        v = items.pop() if src_side == "RIGHT" else items.pop(0)
+        self.lists.setdefault(dst, []).insert(0 if dst_side == "LEFT" else len(self.lists.get(dst, [])), v)
+        return v
+
+    def lrem(self, k, count, v):
+        items = self.lists.get(k) or []
+        if v in items:
+            items.remove(v)
+            return 1
+        return 0
+
+    def lrange(self, k, start, end):
+        return list(self.lists.get(k) or [])
+
+
+def _redis_queue():
+    from travel_agent.jobs import RedisJobQueue
+    q = RedisJobQueue.__new__(RedisJobQueue)
+    q.client, q.ttl, q.prefix, q.queue_key, q.processing_key, q.poll = _FakeRedis(), 60, "job:", "jobs:queue", "jobs:processing", 0.01
+    return q
+
+
+def test_lost_jobs_are_requeued_then_abandoned():
+    for q in (InMemoryJobQueue(ttl_seconds=60), _redis_queue()):
+        job_id = q.submit(_intent("job5"), "job5").job_id
+        assert q.claim(0.1)["attempts"] == 1  # worker dies here without finish()
+        assert q.requeue_stale(lease_seconds=60) == 0  # lease still valid
+        assert q.requeue_stale(lease_seconds=0) == 1
+        assert q.get(job_id).status == "queued"
+        assert q.claim(0.1)["attempts"] == 2
+        assert q.requeue_stale(lease_seconds=0, max_attempts=2) == 1
+        lost = q.get(job_id)
+        assert lost.status == "failed" and lost.error.code == "JOB_ABANDONED"
+        assert q.claim(0.1) is None
+
+
+def test_redis_finish_clears_processing_list():
+    q = _redis_queue()
+    job_id = q.submit(_intent("job6"), "job6").job_id
+    q.claim(0.1)
+    assert q.client.lrange("jobs:processing", 0, -1) == [job_id]
+    q.finish(job_id, result=None)
+    assert q.client.lrange("jobs:processing", 0, -1) == [] and q.requeue_stale(lease_seconds=0) == 0
+
+
+def test_memory_backend_without_workers_refused_at_startup(monkeypatch):
+    import pytest
+    monkeypatch.setattr(api_mod.cfg, "JOBS_INPROCESS_WORKERS", 0)
+    with pytest.raises(RuntimeError, match="JOBS_BACKEND=redis"):
+        with TestClient(api_mod.app):
+            pass
+
+
+def test_worker_survives_claim_errors():
+    q = InMemoryJobQueue(ttl_seconds=60)
+    real, fails = q.claim, [2]
+    def flaky(timeout):
+        if fails[0]:
+            fails[0] -= 1
+            raise ConnectionError("connection reset")
+        return real(timeout)
+    q.claim = flaky
+    info = q.submit(_intent("job7"), "job7")
+    pool = JobWorkerPool(q, concurrency=1, poll_seconds=0.05).start()
+    try:
+        done = q.wait(info.job_id, 5.0)
+    finally:
+        pool.stop(timeout=1.0)
+    assert fails[0] == 0 and done.status == "done"
+    cache_clear()
+
+
+def test_standalone_worker_refuses_memory_backend(monkeypatch):
+    import pytest, sys
+    import travel_agent.worker as worker
+    monkeypatch.setattr(worker, "JOBS", InMemoryJobQueue(ttl_seconds=60))
+    monkeypatch.setattr(sys, "argv", ["travel_agent.worker"])
+    with pytest.raises(SystemExit) as exc:
+        worker.main()
+    assert exc.value.code == 1
@@ -0,0 +1,102 @@
+import json
+import threading
+from datetime import date
+import travel_agent.llm_manager as mgr
+from travel_agent.llm_cache import LLM_CACHE
+from travel_agent.models import TripIntent
+
+
+def _intent(dest):
+    return TripIntent(session_id=f"b-{dest}", raw_text="", origin="上海", destination=dest,
+                      depart_date=date(2025, 12, 10), days=2)
+
+
+def _batch_answer(prompt):
+    briefs = json.loads(prompt.splitlines()[-1])
+    return {"results": [{"id": b["id"], "days": [{"day_index": 1, "main_spots": [b["destination"]], "meals": []}],
+                         "summary": b["destination"]} for b in briefs]}
+
+
+def test_concurrent_requests_share_one_batched_call(monkeypatch):
+    prompts = []
+    def fake_chat_json(model, prompt, temperature=0.3):
+        prompts.append(prompt)
+        return _batch_answer(prompt)
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    monkeypatch.setattr(mgr, "LLM_BATCH_ENABLE", True)
+    monkeypatch.setattr(mgr, "ITINERARY_BATCHER", mgr.ItineraryBatcher(window_ms=100, max_batch=8))
+    LLM_CACHE.clear()
+    out = {}
+    dests = ["杭州", "苏州", "南京"]
+    threads = [threading.Thread(target=lambda d=d: out.__setitem__(d, mgr.llm_itinerary_generate(_intent(d), [])))
+               for d in dests]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(prompts) == 1 and prompts[0].startswith("GENERATE_ITINERARY_BATCH")
+    assert {d: it.summary for d, it in out.items()} == {d: d for d in dests}
+    LLM_CACHE.clear()
+
+
+def test_unparseable_batch_falls_back_to_single_calls(monkeypatch):
+    prompts = []
+    def fake_chat_json(model, prompt, temperature=0.3):
+        prompts.append(prompt)
+        if "BATCH" in prompt:
+            return {"unexpected": True}
+        return {"days": [{"day_index": 1, "main_spots": ["x"], "meals": []}], "summary": "single"}
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    LLM_CACHE.clear()
+    res = mgr.llm_itinerary_generate_many([(_intent("杭州"), []), (_intent("苏州"), [])])
+    assert [r.summary for r in res] == ["single", "single"]
+    assert sum("BATCH" in p for p in prompts) == 1
+    LLM_CACHE.clear()
+
+
+def test_batch_flush_runs_under_earliest_deadline(monkeypatch):
+    from travel_agent.deadline import current_deadline, deadline_scope
+    seen = []
+    def fake_chat_json(model, prompt, temperature=0.3):
+        seen.append(current_deadline())
+        return _batch_answer(prompt)
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    monkeypatch.setattr(mgr, "LLM_BATCH_ENABLE", True)
+    monkeypatch.setattr(mgr, "ITINERARY_BATCHER", mgr.ItineraryBatcher(window_ms=100, max_batch=8))
+    LLM_CACHE.clear()
+    scopes = {}
+    def plan(dest, budget_ms):
+        with deadline_scope(budget_ms) as dl:
+            scopes[dest] = dl
+            mgr.llm_itinerary_generate(_intent(dest), [])
+    threads = [threading.Thread(target=plan, args=("杭州", 5000)), threading.Thread(target=plan, args=("苏州", 2000))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [scopes["苏州"]]  # flushed on the timer thread, capped by the tighter request
+    LLM_CACHE.clear()
+
+
+def test_full_async_batch_flushes_off_loop(monkeypatch):
+    import asyncio, time
+    def slow_chat_json(model, prompt, temperature=0.3):
+        time.sleep(0.3)
+        return _batch_answer(prompt)
+    monkeypatch.setattr(mgr, "chat_json", slow_chat_json)
+    monkeypatch.setattr(mgr, "LLM_BATCH_ENABLE", True)
+    monkeypatch.setattr(mgr, "ITINERARY_BATCHER", mgr.ItineraryBatcher(window_ms=1000, max_batch=2))
+    LLM_CACHE.clear()
+
+    async def main():
+        t0 = time.time()
+        async def tick():
+            await asyncio.sleep(0.05)
+            return time.time() - t0
+        return await asyncio.gather(mgr.llm_itinerary_generate_async(_intent("杭州"), []),
+                                    mgr.llm_itinerary_generate_async(_intent("苏州"), []), tick())
+
+    hz, sz, ticked = asyncio.run(main())
+    assert (hz.summary, sz.summary) == ("杭州", "苏州")
+    assert ticked < 0.2  # the loop kept running during the 0.3 s batch call
+    LLM_CACHE.clear()
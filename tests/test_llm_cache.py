@@ -0,0 +1,69 @@
+import json
+import time
+import httpx
+import travel_agent.llm_adapter as adapter
+from travel_agent.llm_cache import LLM_CACHE, InMemoryLLMCache, llm_cache_key
+from travel_agent.llm_manager import llm_safe_json
+from travel_agent.metrics import METRICS
+from travel_agent.prompt_audit import PROMPT_AUDIT
+
+
+class DummyResp:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {"choices": [{"message": {"content": json.dumps({"answer": 42})}}]}
+
+
+def test_identical_prompt_served_from_cache(monkeypatch):
+    monkeypatch.setattr(adapter, "OPENAI_API_KEY", "k")
+    calls = []
+    def fake_post(self, url, json=None, headers=None):  # noqa: A002
+        calls.append(json["messages"][0]["content"])
+        return DummyResp()
+    monkeypatch.setattr(httpx.Client, "post", fake_post)
+    LLM_CACHE.clear()
+    METRICS.reset()
+    PROMPT_AUDIT._records = []
+    assert llm_safe_json("CACHE_ME") == {"answer": 42}
+    assert llm_safe_json("CACHE_ME") == {"answer": 42}
+    assert len(calls) == 1
+    snap = METRICS.snapshot()
+    assert snap["llm_cache_misses"] == 1 and snap["llm_cache_hits"] == 1
+    assert [r["cache_hit"] for r in PROMPT_AUDIT.snapshot()] == [False, True]
+    LLM_CACHE.clear()
+
+
+def test_lru_eviction_and_ttl():
+    cache = InMemoryLLMCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")  # a becomes most recent
+    cache.put("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1"
+    expiring = InMemoryLLMCache(max_entries=2, ttl_seconds=0)
+    expiring.put("x", "1")
+    time.sleep(0.01)
+    assert expiring.get("x") is None
+    assert llm_cache_key("m", "p", 0.3) != llm_cache_key("m", "p", 0.7)
+
+
+def test_redis_outage_only_loses_the_cache(monkeypatch):
+    import redis
+    import travel_agent.llm_manager as mgr
+    from travel_agent.llm_cache import RedisLLMCache
+    class DownClient:
+        def get(self, key):
+            raise redis.ConnectionError("connection reset")
+
+        def set(self, key, value, ex=None):
+            raise redis.ConnectionError("connection reset")
+    cache = RedisLLMCache.__new__(RedisLLMCache)
+    cache.client, cache.prefix, cache._ttl = DownClient(), "llmc:", 60
+    monkeypatch.setattr(mgr, "LLM_CACHE", cache)
+    monkeypatch.setattr(mgr, "chat_json", lambda model, prompt, temperature=0.3: {"answer": 7})
+    METRICS.reset()
+    assert llm_safe_json("CACHE_DOWN") == {"answer": 7}
+    assert llm_safe_json("CACHE_DOWN") == {"answer": 7}
+    assert METRICS.snapshot()["llm_cache_misses"] == 2
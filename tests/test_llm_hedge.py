@@ -0,0 +1,59 @@
+import time
+import travel_agent.llm_manager as mgr
+from travel_agent.llm_cache import LLM_CACHE
+from travel_agent.metrics import METRICS_LLM
+
+
+def test_slow_primary_is_hedged_and_backup_wins(monkeypatch):
+    primary, backup = mgr.llm_select_model(0), mgr.llm_select_model(1)
+    def fake_chat_json(model, prompt, temperature=0.3):
+        if model == primary:
+            time.sleep(0.5)
+        return {"model": model}
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_ENABLE", True)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_DEFAULT_DELAY_MS", 50)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_MIN_DELAY_MS", 10)
+    LLM_CACHE.clear()
+    METRICS_LLM.reset()
+    t0 = time.time()
+    data = mgr.llm_safe_json("HEDGE_ME")
+    assert data == {"model": backup}
+    assert time.time() - t0 < 0.4
+    snap = METRICS_LLM.snapshot()
+    assert snap[primary]["hedges"] == 1
+    assert snap[backup]["wins"] == 1 and snap[backup]["win_rate"] == 1.0
+    LLM_CACHE.clear()
+
+
+def test_fast_primary_not_hedged(monkeypatch):
+    primary = mgr.llm_select_model(0)
+    monkeypatch.setattr(mgr, "chat_json", lambda model, prompt, temperature=0.3: {"model": model})
+    monkeypatch.setattr(mgr, "LLM_HEDGE_ENABLE", True)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_DEFAULT_DELAY_MS", 500)
+    LLM_CACHE.clear()
+    METRICS_LLM.reset()
+    assert mgr.llm_safe_json("NO_HEDGE") == {"model": primary}
+    assert METRICS_LLM.snapshot()[primary]["hedges"] == 0
+    LLM_CACHE.clear()
+
+
+def test_hedged_calls_run_under_the_request_deadline(monkeypatch):
+    from travel_agent.deadline import current_deadline, deadline_scope
+    from travel_agent.errors import DomainError
+    def fake_chat_json(model, prompt, temperature=0.3):
+        dl = current_deadline()  # like the adapter: wait at most the remaining budget
+        time.sleep(min(dl.remaining_s(), 2.0) if dl is not None else 2.0)
+        raise DomainError("LLM_DEADLINE_EXCEEDED", "request deadline reached")
+    monkeypatch.setattr(mgr, "chat_json", fake_chat_json)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_ENABLE", True)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_DEFAULT_DELAY_MS", 50)
+    monkeypatch.setattr(mgr, "LLM_HEDGE_MIN_DELAY_MS", 10)
+    LLM_CACHE.clear()
+    METRICS_LLM.reset()
+    t0 = time.time()
+    with deadline_scope(200):
+        data = mgr.llm_safe_json("HEDGE_DEADLINE")
+    assert time.time() - t0 < 0.4
+    assert data == {"parsed": True, "fallback": True}
+    LLM_CACHE.clear()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import httpx
+import travel_agent.llm_adapter as adapter
+
+
+class DummyResp:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {"choices": [{"message": {"content": json.dumps({"ok": True})}}]}
+
+
+def test_sync_client_reused_and_closed(monkeypatch):
+    monkeypatch.setattr(adapter, "OPENAI_API_KEY", "k")
+    seen = []
+    def fake_post(self, url, json=None, headers=None):  # noqa: A002
+        seen.append(self)
+        return DummyResp()
+    monkeypatch.setattr(httpx.Client, "post", fake_post)
+    adapter.close_http_clients()
+    assert adapter.chat_json("gpt-4o", "p1") == {"ok": True}
+    assert adapter.chat_json("gpt-4o", "p2") == {"ok": True}
+    assert seen[0] is seen[1]
+    adapter.close_http_clients()
+    assert seen[0].is_closed
+    assert adapter.get_http_client() is not seen[0]
+    adapter.close_http_clients()
+
+
+def test_async_client_reused_within_loop(monkeypatch):
+    monkeypatch.setattr(adapter, "OPENAI_API_KEY", "k")
+    seen = []
+    async def fake_post(self, url, json=None, headers=None):  # noqa: A002
+        seen.append(self)
+        return DummyResp()
+    monkeypatch.setattr(httpx.AsyncClient, "post", fake_post)
+
+    async def run():
+        a = await adapter.achat_json("gpt-4o", "p1")
+        b = await adapter.achat_json("gpt-4o", "p2")
+        await adapter.aclose_http_clients()
+        return a, b
+
+    a, b = asyncio.run(run())
+    assert a == b == {"ok": True}
+    assert seen[0] is seen[1] and seen[0].is_closed
+
+
+def test_async_clients_kept_per_loop():
+    import gc, threading
+    async def get():
+        return adapter.get_async_http_client()
+
+    got, ready, other_done = [], threading.Event(), threading.Event()
+    async def long_lived():
+        got.append(adapter.get_async_http_client())
+        ready.set()
+        await asyncio.to_thread(other_done.wait, 5)
+        got.append(adapter.get_async_http_client())
+        await adapter.aclose_http_clients()
+
+    t = threading.Thread(target=asyncio.run, args=(long_lived(),))
+    t.start()
+    ready.wait(5)
+    other = asyncio.run(get())  # a second loop must not evict the first loop's pool
+    other_done.set()
+    t.join()
+    assert got[0] is got[1] and got[0] is not other
+    del other
+    gc.collect()
+    assert len(adapter._ASYNC_CLIENTS) == 0  # finished loops drop their clients
@@ -0,0 +1,57 @@
+import json
+from datetime import date
+import httpx
+from fastapi.testclient import TestClient
+import travel_agent.llm_adapter as adapter
+import travel_agent.api as api_mod
+from travel_agent.json_stream import JsonArrayItemParser
+from travel_agent.llm_cache import LLM_CACHE
+from travel_agent.llm_manager import llm_itinerary_stream
+from travel_agent.models import TripIntent
+
+DOC = json.dumps({
+    "days": [
+        {"day_index": 1, "main_spots": ["西湖"], "meals": ["早餐"], "notes": "含 } 与 \" 字符"},
+        {"day_index": 2, "main_spots": ["灵隐寺"], "meals": ["午餐"]},
+    ],
+    "summary": "杭州两日",
+}, ensure_ascii=False)
+
+
+def test_parser_yields_each_day_when_closed():
+    parser = JsonArrayItemParser("days")
+    got = []
+    for i in range(0, len(DOC), 7):
+        got.append([d["day_index"] for d in parser.feed(DOC[i:i + 7])])
+    flat = [x for chunk in got for x in chunk]
+    assert flat == [1, 2]
+    # first day is available well before the document ends
+    assert next(i for i, c in enumerate(got) if c) < len(got) - 3
+    assert parser.document()["summary"] == "杭州两日"
+
+
+def test_itinerary_stream_over_sse(monkeypatch):
+    monkeypatch.setattr(adapter, "OPENAI_API_KEY", "k")
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        lines = [f"data: {json.dumps({'choices': [{'delta': {'content': DOC[i:i + 11]}}]})}\n\n" for i in range(0, len(DOC), 11)]
+        return httpx.Response(200, text="".join(lines) + "data: [DONE]\n\n")
+    adapter.close_http_clients()
+    adapter._CLIENTS[adapter.LLM_BASE_URL] = httpx.Client(transport=httpx.MockTransport(handler))
+    LLM_CACHE.clear()
+    intent = TripIntent(session_id="st1", raw_text="", destination="杭州", depart_date=date(2025, 12, 10), days=2)
+    stream = llm_itinerary_stream(intent, [])
+    assert [d.day_index for d in stream] == [1, 2]
+    assert stream.itinerary().summary == "杭州两日"
+    adapter.close_http_clients()
+    LLM_CACHE.clear()
+
+
+def test_plan_stream_endpoint_ndjson():
+    client = TestClient(api_mod.app)
+    r = client.post("/api/mvp/plan_stream", json={"session_id": "st2", "text": "从上海 预算4000 去苏州 2025-12-10 2天"})
+    assert r.status_code == 200
+    events = [json.loads(line) for line in r.text.splitlines() if line]
+    assert events[0]["event"] == "day"
+    assert events[-1]["event"] == "result"
+    assert events[-1]["data"]["itinerary"]["days"]
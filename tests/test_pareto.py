@@ -0,0 +1,53 @@
+import random
+from datetime import date, datetime, timedelta
+from travel_agent.flight import flight_search
+from travel_agent.flight_inventory import FlightInventory, build_flight_inventory, set_flight_inventory
+from travel_agent.models import TripIntent
+from travel_agent.ranking import pareto_front, diverse_subset
+from travel_agent.stage_cache import FLIGHT_CACHE
+
+
+def _brute_force(p, d, s):
+    pts = list(zip(p, d, s))
+    dominated = lambda a, b: all(x <= y for x, y in zip(b, a)) and b != a
+    return sorted(i for i, a in enumerate(pts) if not any(dominated(a, b) for b in pts) and pts.index(a) == i)
+
+
+def test_sweep_matches_pairwise_check():
+    rnd = random.Random(7)
+    for _ in range(50):
+        n = rnd.randint(1, 60)
+        p = [rnd.randint(500, 900) for _ in range(n)]
+        d = [rnd.randint(90, 200) for _ in range(n)]
+        s = [rnd.randint(0, 2) for _ in range(n)]
+        front = pareto_front(p, d, s)
+        assert sorted(front) == _brute_force(p, d, s)
+        assert [p[i] for i in front] == sorted(p[i] for i in front)
+
+
+def test_diversity_cap_keeps_extremes():
+    cols = {"price": [100, 200, 300, 400, 500], "duration": [500, 400, 300, 200, 100], "stops": [0, 0, 0, 0, 0]}
+    assert diverse_subset(cols, [0, 1, 2, 3, 4], 3) == [0, 2, 4]
+    assert diverse_subset(cols, [0, 4], 3) == [0, 4]
+
+
+def test_flight_search_pareto_option(tmp_path):
+    def row(number, hour, price, minutes, stops=0):
+        dep = datetime(2025, 11, 2, hour)
+        return {"origin": "上海", "destination": "桂林", "depart_time": dep, "arrive_time": dep + timedelta(minutes=minutes),
+                "airline": "EastJet", "flight_number": number, "price": price, "stops": stops}
+    rows = [row("P1", 8, 500, 300, 1), row("P2", 9, 900, 120), row("P3", 10, 700, 180), row("P4", 11, 950, 200),
+            row("P5", 12, 1000, 125), row("P3", 10, 800, 180)]  # P4, P5 and the pricier P3 are dominated
+    build_flight_inventory(str(tmp_path), rows)
+    FLIGHT_CACHE.clear()
+    set_flight_inventory(FlightInventory(str(tmp_path)))
+    try:
+        intent = TripIntent(session_id="pareto", raw_text="", origin="上海", destination="桂林", depart_date=date(2025, 11, 2), days=3)
+        front = flight_search(intent, pareto=True)
+        assert sorted((f.flight_number, f.price) for f in front) == [("P1", 500.0), ("P2", 900.0), ("P3", 700.0)]
+        assert [f.score for f in front] == sorted((f.score for f in front), reverse=True)
+        assert len(flight_search(intent, max_results=2, pareto=True)) == 2
+        assert len(flight_search(intent)) == 5  # weighted top-k unchanged
+    finally:
+        set_flight_inventory(None)
+        FLIGHT_CACHE.clear()
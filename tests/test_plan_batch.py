@@ -0,0 +1,84 @@
+import json
+from fastapi.testclient import TestClient
+import travel_agent.api as api_mod
+import travel_agent.workflow as wf
+from travel_agent.cache_util import cache_clear
+
+client = TestClient(api_mod.app)
+
+A = "从广州 去桂林 2025-10-08 3天 预算4000"
+B = "从广州 去昆明 2025-10-08 5天 预算8000"
+
+
+def _count_runs(monkeypatch):
+    calls = []
+    real = wf.continue_workflow
+    def counted(intent, session_id):
+        calls.append(session_id)
+        return real(intent, session_id)
+    monkeypatch.setattr(wf, "continue_workflow", counted)
+    return calls
+
+
+def test_batch_plans_each_unique_intent_once(monkeypatch):
+    cache_clear()
+    calls = _count_runs(monkeypatch)
+    body = {"items": [{"session_id": "b1", "text": A}, {"session_id": "b2", "text": A},
+                      {"session_id": "b3", "text": B}, {"session_id": "b4", "text": "随便走走"}]}
+    data = client.post("/api/mvp/plan_batch", json=body).json()
+    assert data["success"] is True and data["unique"] == 2 and data["cached"] == 0
+    assert len(calls) == 2
+    items = data["items"]
+    assert [it["index"] for it in items] == [0, 1, 2, 3]
+    assert [it["data"]["session_id"] for it in items[:3]] == ["b1", "b2", "b3"]
+    assert items[3]["mode"] == "clarify" and items[3]["questions"]
+    again = client.post("/api/mvp/plan_batch", json=body).json()
+    assert again["cached"] == 2 and len(calls) == 2
+    assert all(it["cached"] for it in again["items"][:3])
+    cache_clear()
+
+
+def test_batch_streams_ndjson():
+    cache_clear()
+    body = {"stream": True, "items": [{"session_id": f"s{i}", "text": A} for i in range(3)]}
+    r = client.post("/api/mvp/plan_batch", json=body)
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(l) for l in r.text.splitlines() if l.strip()]
+    assert [l["event"] for l in lines] == ["item", "item", "item", "summary"]
+    assert sorted(l["data"]["index"] for l in lines[:3]) == [0, 1, 2]
+    assert lines[-1]["data"] == {"items": 3, "unique": 1, "cached": 0}
+    cache_clear()
+
+
+def test_batch_size_limit(monkeypatch):
+    monkeypatch.setattr(api_mod.cfg, "PLAN_BATCH_MAX_ITEMS", 1)
+    data = client.post("/api/mvp/plan_batch", json={"items": [{"session_id": "x", "text": A}] * 2}).json()
+    assert data["success"] is False and data["error"]["code"] == "BATCH_TOO_LARGE"
+
+
+def test_unexpected_error_fails_only_its_group(monkeypatch):
+    cache_clear()
+    real = wf.continue_workflow
+    def flaky(intent, session_id):
+        if intent.destination == "昆明":
+            raise RuntimeError("supplier bug")
+        return real(intent, session_id)
+    monkeypatch.setattr(wf, "continue_workflow", flaky)
+    body = {"stream": True, "items": [{"session_id": "e1", "text": A}, {"session_id": "e2", "text": B},
+                                      {"session_id": "e3", "text": B}]}
+    lines = [json.loads(l) for l in client.post("/api/mvp/plan_batch", json=body).text.splitlines() if l.strip()]
+    assert lines[-1]["event"] == "summary"
+    by_index = {l["data"]["index"]: l["data"] for l in lines[:-1]}
+    assert by_index[0]["success"] is True
+    assert by_index[1]["error"]["code"] == by_index[2]["error"]["code"] == "WORKFLOW_FAIL"
+    cache_clear()
+
+
+def test_items_count_against_session_rate_limit():
+    from travel_agent.config import RATE_LIMIT_REQUESTS_PER_MIN
+    cache_clear()
+    body = {"items": [{"session_id": "rl_batch", "text": A}] * (RATE_LIMIT_REQUESTS_PER_MIN + 2)}
+    items = client.post("/api/mvp/plan_batch", json=body).json()["items"]
+    limited = [it for it in items if it["error"] and it["error"]["code"] == "RATE_LIMIT_EXCEEDED"]
+    assert len(limited) == 2 and sum(it["success"] for it in items) == RATE_LIMIT_REQUESTS_PER_MIN
+    cache_clear()
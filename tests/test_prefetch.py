@@ -0,0 +1,66 @@
+from travel_agent.checkpoint import CHECKPOINTS
+from travel_agent.prefetch import Prefetcher
+from travel_agent.workflow import continue_workflow
+
+
+def test_prefetched_stages_are_not_searched_again(make_intent, count_calls):
+    CHECKPOINTS.clear()
+    flights = count_calls("flight_search")
+    hotels = count_calls("hotel_search")
+    pf = Prefetcher(ttl_seconds=60, max_workers=4)
+    intent = make_intent("pf1", budget_total=None)
+    assert sorted(pf.start(intent, "pf1")) == ["flights", "hotels", "spots"]
+    assert pf.start(intent, "pf1") == []  # idempotent while inputs are unchanged
+    intent.budget_total = 3000  # the clarify answer
+    seed = pf.take("pf1", intent)
+    assert sorted(seed) == ["flights", "hotels", "spots"]
+    result = continue_workflow(intent, "pf1", seed=seed)
+    assert len(flights) == 1 and len(hotels) == 1
+    assert result.budget is not None and sorted(result.stage_timings_ms) == ["budget", "itinerary"]
+    assert pf.pending() == 0
+
+
+def test_answer_changing_inputs_discards_stale_prefetch(make_intent, count_calls):
+    flights = count_calls("flight_search")
+    pf = Prefetcher(ttl_seconds=60, max_workers=4)
+    intent = make_intent("pf2", budget_total=None)
+    pf.start(intent, "pf2")
+    intent.origin = "北京"
+    intent.budget_total = 3000
+    seed = pf.take("pf2", intent)
+    assert "flights" not in seed and "hotels" in seed
+    assert len(flights) == 1
+
+
+def test_expired_prefetch_is_not_used(make_intent):
+    pf = Prefetcher(ttl_seconds=0, max_workers=2)
+    intent = make_intent("pf3", budget_total=None)
+    pf.start(intent, "pf3")
+    assert pf.take("pf3", intent) == {}
+
+
+def test_take_waits_only_within_request_deadline(monkeypatch, make_intent):
+    import time
+    import travel_agent.stage_graph as sg
+    from travel_agent.deadline import deadline_scope
+    real = sg.hotel_search
+    monkeypatch.setattr(sg, "hotel_search", lambda intent: time.sleep(1.0) or real(intent))
+    pf = Prefetcher(ttl_seconds=60, max_workers=4)
+    intent = make_intent("pf4", budget_total=None)
+    pf.start(intent, "pf4")
+    intent.budget_total = 3000
+    t0 = time.time()
+    with deadline_scope(500):
+        seed = pf.take("pf4", intent)
+    assert time.time() - t0 < 0.4
+    assert "hotels" not in seed and {"flights", "spots"} <= set(seed)
+
+
+def test_llm_stage_prefetched_only_when_opted_in(make_intent, count_calls):
+    itineraries = count_calls("itinerary_generate")
+    intent = make_intent("pf5", budget_total=None)
+    assert "itinerary" not in Prefetcher(ttl_seconds=60, max_workers=4).start(intent, "pf5")
+    pf = Prefetcher(ttl_seconds=60, max_workers=4, llm=True)
+    assert sorted(pf.start(intent, "pf6")) == ["flights", "hotels", "itinerary", "spots"]
+    intent.budget_total = 3000
+    assert "itinerary" in pf.take("pf6", intent) and len(itineraries) == 1
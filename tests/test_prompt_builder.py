@@ -0,0 +1,39 @@
+from datetime import date
+import travel_agent.llm_manager as mgr
+from travel_agent.llm_cache import LLM_CACHE
+from travel_agent.models import TripIntent
+from travel_agent.prompt_audit import PROMPT_AUDIT
+from travel_agent.prompt_builder import build_itinerary_prompt, estimate_tokens
+
+
+def _intent(**kw):
+    return TripIntent(session_id="pb1", raw_text="", destination="杭州", depart_date=date(2025, 12, 10), days=3, **kw)
+
+
+def test_token_estimate_counts_cjk_per_char():
+    assert estimate_tokens("西湖灵隐") == 4
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_prompt_trims_spots_then_preferences_to_budget():
+    spots = [f"景点{i:03d}" for i in range(200)]
+    intent = _intent(preferences=["美食", "博物馆"])
+    full = build_itinerary_prompt(intent, spots, max_tokens=100000)
+    assert not full.trimmed and len(full.spots) == 200
+    small = build_itinerary_prompt(intent, spots, max_tokens=120)
+    assert small.trimmed and small.tokens <= 120
+    assert small.spots == spots[:len(small.spots)]  # ranked head kept
+    assert small.preferences == ["博物馆", "美食"]
+    tiny = build_itinerary_prompt(intent, spots, max_tokens=10)
+    assert tiny.spots == [] and tiny.preferences == []
+    assert tiny.text.startswith("GENERATE_ITINERARY")
+
+
+def test_itinerary_prompt_tokens_audited():
+    LLM_CACHE.clear()
+    PROMPT_AUDIT._records = []
+    mgr.llm_itinerary_generate(_intent(), ["西湖", "灵隐寺"])
+    rec = PROMPT_AUDIT.snapshot()[-1]
+    assert rec["prompt_tag"] == "itinerary"
+    assert rec["prompt_tokens"] == estimate_tokens(build_itinerary_prompt(_intent(), ["西湖", "灵隐寺"]).text)
+    LLM_CACHE.clear()
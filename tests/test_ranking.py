@@ -0,0 +1,96 @@
+import random
+import travel_agent.ranking as ranking
+import pytest
+from travel_agent.ranking import rank_top_k, score_rows, _check_weights
+
+
+def _cols(n, seed=7):
+    rnd = random.Random(seed)
+    return {"price": [rnd.uniform(500, 5000) for _ in range(n)],
+            "duration": [rnd.randint(60, 900) for _ in range(n)],
+            "stops": [rnd.randint(0, 2) for _ in range(n)]}
+
+
+def test_top_k_matches_full_sort_and_dedups():
+    cols = _cols(200)
+    scores = score_rows("flight", cols)
+    expected = sorted(range(200), key=lambda i: -scores[i])[:10]
+    idx, sc = rank_top_k("flight", cols, 10)
+    assert idx == expected and sc == [scores[i] for i in expected]
+    assert all(0.0 < x <= 1.0 for x in scores)  # weights sum to 1, each term in [NORM_FLOOR, 1]
+    groups = [i // 2 for i in range(200)]  # rows 2j and 2j+1 are the same option
+    idx, _ = rank_top_k("flight", cols, 10, groups)
+    assert len({groups[i] for i in idx}) == 10
+
+
+def test_large_input_ranked_in_process_pool(monkeypatch):
+    cols = _cols(300)
+    inline = rank_top_k("flight", cols, 5)
+    monkeypatch.setattr(ranking, "RANK_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(ranking, "RANK_OFFLOAD_MIN_ITEMS", 100)
+    calls = []
+    real = ranking._rank_worker
+    monkeypatch.setattr(ranking, "_pool", lambda: type("P", (), {"submit": staticmethod(
+        lambda fn, *a: calls.append(a) or _Done(real(*a)))})())
+    assert rank_top_k("flight", cols, 5) == inline
+    kind, blobs, groups, k, weights = calls[0]
+    assert all(isinstance(b, bytes) for b in blobs.values()) and groups is None  # no pickled models
+    assert rank_top_k("flight", _cols(50), 5) and len(calls) == 1  # below threshold: in-process
+
+
+def test_real_spawn_pool_matches_inline(monkeypatch):
+    cols = _cols(300, seed=11)
+    groups = [i % 120 for i in range(300)]
+    monkeypatch.setitem(ranking.WEIGHTS, "flight", [0.2, 0.1, 0.7])  # must reach the worker, not its config defaults
+    inline = rank_top_k("flight", cols, 8), rank_top_k("flight", cols, 8, groups)
+    monkeypatch.setattr(ranking, "RANK_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(ranking, "RANK_OFFLOAD_MIN_ITEMS", 100)
+    ranking.shutdown_rank_pool()
+    try:
+        pooled = rank_top_k("flight", cols, 8), rank_top_k("flight", cols, 8, groups)
+        assert ranking._POOL is not None  # really went through the spawn pool
+    finally:
+        ranking.shutdown_rank_pool()
+    assert pooled == inline
+
+
+class _Done:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    cols = _cols(5000, seed=3)
+    groups = [i % 1200 for i in range(5000)]
+    fast = rank_top_k("flight", cols, 20), rank_top_k("flight", cols, 20, groups)
+    monkeypatch.setattr(ranking, "np", None)
+    slow = rank_top_k("flight", cols, 20), rank_top_k("flight", cols, 20, groups)
+    assert [r[0] for r in fast] == [r[0] for r in slow]
+
+
+def test_weights_are_configurable(monkeypatch):
+    cols = {"price": [100.0, 900.0], "rating": [3.0, 4.9], "distance": [5.0, 0.2]}
+    assert rank_top_k("hotel", cols, 1)[0] == [1]  # default: rating dominates
+    monkeypatch.setitem(ranking.WEIGHTS, "hotel", [1.0, 0.0, 0.0])
+    assert rank_top_k("hotel", cols, 1)[0] == [0]  # price only
+
+
+def test_scores_are_normalized_so_price_counts(monkeypatch):
+    # real fares: unnormalized 1/(price+1) terms let one stop outweigh a 2500 fare gap
+    cols = {"price": [3000.0, 5500.0], "duration": [300.0, 120.0], "stops": [1.0, 0.0]}
+    monkeypatch.setitem(ranking.WEIGHTS, "flight", [1.0, 0.0, 0.0])
+    assert rank_top_k("flight", cols, 1)[0] == [0]
+    monkeypatch.setitem(ranking.WEIGHTS, "flight", [0.8, 0.1, 0.1])
+    idx, sc = rank_top_k("flight", cols, 1)
+    assert idx == [0] and sc == [pytest.approx(0.8 + 0.2 * ranking.NORM_FLOOR)]
+    assert score_rows("flight", {"price": [42.0], "duration": [60.0], "stops": [0.0]}) == [pytest.approx(1.0)]
+
+
+def test_weight_lists_are_validated():
+    _check_weights("flight", [0.5, 0.3, 0.2])
+    for bad in ([0.5, 0.5], [0.1, 0.2, 0.3, 0.4], [1.0, -0.5, 0.5]):
+        with pytest.raises(ValueError, match="RANK_FLIGHT_WEIGHTS"):
+            _check_weights("flight", bad)
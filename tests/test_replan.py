@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+import travel_agent.api as api_mod
+from travel_agent.cache_util import cache_clear
+from travel_agent.checkpoint import CHECKPOINTS
+from travel_agent.replan import affected_stages
+
+client = TestClient(api_mod.app)
+
+
+def test_affected_stages_follow_dependencies():
+    assert affected_stages(["budget_total"]) == ["budget"]
+    assert affected_stages(["depart_date"]) == ["flights", "hotels", "itinerary", "budget"]
+    assert affected_stages(["days"]) == ["hotels", "itinerary", "budget"]
+    assert affected_stages([]) == []
+
+
+def test_budget_change_only_reruns_budget(count_calls):
+    cache_clear()
+    CHECKPOINTS.clear()
+    first = client.post("/api/mvp/plan", json={"session_id": "rp1", "text": "从上海 去青岛 2025-08-01 3天 预算3000"}).json()
+    assert first["success"] is True
+    flights, hotels = count_calls("flight_search"), count_calls("hotel_search")
+    itinerary = count_calls("itinerary_generate")
+    r = client.post("/api/mvp/replan", json={"session_id": "rp1", "changes": {"budget_total": 8000}}).json()
+    assert r["success"] is True
+    assert r["data"]["intent"]["budget_total"] == 8000 and r["data"]["budget"]["total"] == 8000
+    assert r["data"]["itinerary"] == first["data"]["itinerary"]
+    assert not flights and not hotels and not itinerary
+    assert "budget" in r["data"]["stage_timings_ms"] and "itinerary" not in r["data"]["stage_timings_ms"]
+    # a date change re-runs flights, hotels and the itinerary but keeps spots
+    r2 = client.post("/api/mvp/replan", json={"session_id": "rp1", "changes": {"depart_date": "2025-08-05"}}).json()
+    assert r2["success"] is True and r2["data"]["flights"][0]["depart_time"].startswith("2025-08-05")
+    assert len(flights) == 1 and len(hotels) == 1 and len(itinerary) == 1
+    assert "spots" not in r2["data"]["stage_timings_ms"]
+    cache_clear()
+
+
+def test_replan_errors():
+    r = client.post("/api/mvp/replan", json={"session_id": "rp_none", "changes": {"budget_total": 1}}).json()
+    assert r["error"]["code"] == "REPLAN_NO_PREVIOUS"
+
+
+def test_replan_after_cache_hit_and_plan_v3():
+    cache_clear()
+    CHECKPOINTS.clear()
+    text = "从上海 去大连 2025-08-02 3天 预算4000"
+    assert client.post("/api/mvp/plan", json={"session_id": "rp_a1", "text": text}).json()["success"] is True
+    hit = client.post("/api/mvp/plan", json={"session_id": "rp_a2", "text": text}).json()
+    assert hit["data"]["session_id"] == "rp_a2"  # served from the result cache, rebound to the caller
+    assert client.post("/api/mvp/plan_v3", json={"session_id": "rp_a3", "text": text.replace("大连", "烟台")}).json()["success"]
+    for sid in ("rp_a2", "rp_a3"):
+        r = client.post("/api/mvp/replan", json={"session_id": sid, "changes": {"budget_total": 9000}}).json()
+        assert r["success"] is True and r["data"]["session_id"] == sid and r["data"]["budget"]["total"] == 9000
+    cache_clear()
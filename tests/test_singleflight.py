@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from datetime import date
+from travel_agent.singleflight import SingleFlight
+from travel_agent.models import TripIntent
+from travel_agent.cache_util import cache_clear
+import travel_agent.workflow as wf
+
+
+def test_sync_followers_share_leader_result():
+    sf = SingleFlight("test")
+    calls = []
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return "done"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sf.do("k", work))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(r == "done" for r, _ in results)
+
+
+def test_async_followers_share_leader_result():
+    sf = SingleFlight("test")
+    calls = []
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 7
+    async def run():
+        return await asyncio.gather(*(sf.do_async("k", work) for _ in range(4)))
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == [7, 7, 7, 7]
+
+
+def test_workflow_coalesced_per_intent(monkeypatch):
+    cache_clear()
+    calls = []
+    real = wf.continue_workflow
+    def slow(intent, session_id):
+        calls.append(session_id)
+        time.sleep(0.1)
+        return real(intent, session_id)
+    monkeypatch.setattr(wf, "continue_workflow", slow)
+    def intent(sid):
+        i = TripIntent(session_id=sid, raw_text="", origin="北京", destination="成都",
+                       depart_date=date(2025, 12, 1), days=3, budget_total=5000)
+        i.finalize_dates()
+        return i
+    out = {}
+    threads = [threading.Thread(target=lambda s=s: out.__setitem__(s, wf.continue_workflow_shared(intent(s), s)))
+               for s in ("sf1", "sf2", "sf3")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert {s: r.session_id for s, r in out.items()} == {"sf1": "sf1", "sf2": "sf2", "sf3": "sf3"}
+    cache_clear()
+
+
+def _slow_leader(monkeypatch, leader_sid, secs):
+    real = wf.continue_workflow
+    def slow(intent, session_id):
+        if session_id == leader_sid:
+            time.sleep(secs)
+        return real(intent, session_id)
+    monkeypatch.setattr(wf, "continue_workflow", slow)
+
+
+def _dl_intent(sid, city):
+    i = TripIntent(session_id=sid, raw_text="", origin="北京", destination=city,
+                   depart_date=date(2025, 12, 2), days=3, budget_total=5000)
+    i.finalize_dates()
+    return i
+
+
+def test_follower_keeps_its_own_deadline(monkeypatch):
+    from travel_agent.deadline import deadline_scope
+    cache_clear()
+    _slow_leader(monkeypatch, "sfd1", 1.5)
+    leader = threading.Thread(target=lambda: wf.continue_workflow_shared(_dl_intent("sfd1", "昆明"), "sfd1"))
+    leader.start()
+    time.sleep(0.05)
+    t0 = time.time()
+    with deadline_scope(600):
+        result = wf.continue_workflow_shared(_dl_intent("sfd2", "昆明"), "sfd2")
+    assert time.time() - t0 < 0.9
+    assert result.session_id == "sfd2" and "DEADLINE_ITINERARY_DEGRADED" in result.warnings
+    leader.join()
+    cache_clear()
+
+
+def test_degraded_leader_result_not_shared(monkeypatch):
+    from travel_agent.deadline import deadline_scope
+    cache_clear()
+    _slow_leader(monkeypatch, "sfd3", 0.5)
+    out = {}
+    def lead():
+        with deadline_scope(400):
+            out["leader"] = wf.continue_workflow_shared(_dl_intent("sfd3", "贵阳"), "sfd3")
+    leader = threading.Thread(target=lead)
+    leader.start()
+    time.sleep(0.05)
+    follower = wf.continue_workflow_shared(_dl_intent("sfd4", "贵阳"), "sfd4")
+    leader.join()
+    assert "DEADLINE_ITINERARY_DEGRADED" in out["leader"].warnings
+    assert not follower.warnings and follower.session_id == "sfd4"
+    cache_clear()
@@ -0,0 +1,41 @@
+from travel_agent.spot_catalog import SpotCatalog, spot_catalog, set_spot_catalog
+from travel_agent.spots import spot_fetch_basic, DEFAULT_SPOTS
+from travel_agent.stage_cache import SPOT_CACHE
+
+
+def _catalog(tmp_path):
+    p = tmp_path / "spots.tsv"
+    p.write_text("# test\n@aliases\t{\"海边\":[\"海滨\"]}\n"
+                 "鹭岛\t{\"center\":[24.4,118.1],\"spots\":[[\"古城\",[\"历史\"],90,24.4,118.1],"
+                 "[\"海湾\",[\"海滨\",\"自然\"],60,24.4,118.2],[\"夜市\",[\"美食\",\"夜景\"],70,24.5,118.1],"
+                 "[\"沙滩\",[\"海滨\"],40,24.3,118.2]]}\n", encoding="utf-8")
+    return SpotCatalog(str(p))
+
+
+def test_top_ranks_matches_then_popularity_and_pads(tmp_path):
+    cat = _catalog(tmp_path)
+    assert cat.covers("鹭岛市") and not cat.covers("拉萨")
+    assert cat._index == {}  # destination JSON parsed on first lookup only
+    names = lambda spots: [s.name for s in spots]
+    assert names(cat.top("鹭岛", limit=2)) == ["古城", "夜市"]
+    assert names(cat.top("鹭岛", ["海边", "自然"], limit=3)) == ["海湾", "沙滩", "古城"]
+    assert names(cat.top("鹭岛", ["美食"], limit=10)) == ["夜市", "古城", "海湾", "沙滩"]
+    assert set(cat._index) == {"鹭岛"} and cat.top("拉萨") is None
+
+
+def test_spot_fetch_uses_catalog_with_generic_fallback(tmp_path):
+    orig = spot_catalog()
+    SPOT_CACHE.clear()
+    set_spot_catalog(_catalog(tmp_path))
+    try:
+        assert spot_fetch_basic("鹭岛", ["美食"], limit=2) == ["夜市", "古城"]
+        assert spot_fetch_basic("拉萨", ["美食"]) == DEFAULT_SPOTS + ["美食推荐地"]
+    finally:
+        set_spot_catalog(orig)
+        SPOT_CACHE.clear()
+
+
+def test_bundled_catalog_covers_common_destinations():
+    cat = spot_catalog()
+    assert cat is not None and {"杭州", "北京", "厦门"} <= set(cat.destinations())
+    assert "鼓浪屿" in [s.name for s in cat.top("厦门", ["海边"], limit=3)]
@@ -0,0 +1,57 @@
+from datetime import date
+import travel_agent.flight as flight
+import travel_agent.hotel as hotel
+from travel_agent.metrics import METRICS_STAGE_CACHE
+from travel_agent.models import TripIntent
+from travel_agent.stage_cache import FLIGHT_CACHE, HOTEL_CACHE, SPOT_CACHE
+from travel_agent.spots import spot_fetch_basic
+
+
+def _intent(**kw):
+    base = dict(session_id="sc", raw_text="", origin="上海", destination="厦门",
+                depart_date=date(2025, 9, 1), days=4, budget_total=5000)
+    base.update(kw)
+    i = TripIntent(**base)
+    i.finalize_dates()
+    return i
+
+
+def _clear():
+    for c in (FLIGHT_CACHE, HOTEL_CACHE, SPOT_CACHE):
+        c.clear()
+    METRICS_STAGE_CACHE.reset()
+
+
+def test_searches_shared_across_budgets_and_preferences(monkeypatch):
+    _clear()
+    supplier = []
+    real = flight._mock_flights
+    monkeypatch.setattr(flight, "_mock_flights", lambda *a: supplier.append(1) or real(*a))
+    first = flight.flight_search(_intent(budget_total=5000))
+    second = flight.flight_search(_intent(budget_total=9000, preferences=["美食"]))
+    assert len(supplier) == 1
+    assert [f.id for f in first] == [f.id for f in second] and first[0] is not second[0]
+    hotel.hotel_search(_intent())
+    hotel.hotel_search(_intent(days=6))  # different nights -> new supplier search
+    snap = METRICS_STAGE_CACHE.snapshot()
+    assert snap["flights"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert snap["hotels"]["misses"] == 2 and snap["hotels"]["hits"] == 0
+    _clear()
+
+
+def test_spot_cache_ignores_category_order():
+    _clear()
+    a = spot_fetch_basic("厦门", ["美食", "海滨"])
+    b = spot_fetch_basic("厦门", ["海滨", "美食"])
+    assert a == b
+    assert METRICS_STAGE_CACHE.snapshot()["spots"]["hits"] == 1
+    _clear()
+
+
+def test_disabled_cache_always_searches(monkeypatch):
+    import travel_agent.stage_cache as sc
+    _clear()
+    monkeypatch.setattr(sc, "STAGE_CACHE_ENABLE", False)
+    flight.flight_search(_intent())
+    flight.flight_search(_intent())
+    assert METRICS_STAGE_CACHE.snapshot() == {}
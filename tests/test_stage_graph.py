@@ -0,0 +1,53 @@
+import asyncio
+import time
+from datetime import date
+from travel_agent.models import TripIntent
+from travel_agent.stage_graph import Stage, run_stages, arun_stages
+from travel_agent.workflow import continue_workflow
+
+INTENT = TripIntent(session_id="sg1", raw_text="", origin="上海", destination="杭州",
+                    depart_date=date(2025, 12, 10), days=3, budget_total=3000)
+
+
+def _stages(log):
+    def step(name, secs):
+        def run(intent, inputs):
+            log.append(("start", name, sorted(inputs)))
+            time.sleep(secs)
+            log.append(("end", name))
+            return name
+        return run
+    return (
+        Stage("flights", (), step("flights", 0.1)),
+        Stage("hotels", (), step("hotels", 0.1)),
+        Stage("spots", (), step("spots", 0.1)),
+        Stage("itinerary", ("spots",), step("itinerary", 0.2)),
+        Stage("budget", ("flights", "hotels"), step("budget", 0.1)),
+    )
+
+
+def test_stages_start_when_inputs_ready():
+    log = []
+    t0 = time.time()
+    outputs, timings = run_stages(INTENT, "sg1", _stages(log))
+    elapsed = time.time() - t0
+    assert set(outputs) == set(timings) == {"flights", "hotels", "spots", "itinerary", "budget"}
+    assert elapsed < 0.45  # max(search) + itinerary, not the 0.6s sum
+    assert ("start", "budget", ["flights", "hotels"]) in log
+    assert log.index(("start", "budget", ["flights", "hotels"])) < log.index(("end", "itinerary"))
+
+
+def test_async_stages_overlap():
+    async def slow(intent, inputs):
+        await asyncio.sleep(0.1)
+        return "x"
+    stages = (Stage("a", (), None, slow), Stage("b", (), None, slow), Stage("c", ("a", "b"), None, slow))
+    t0 = time.time()
+    outputs, _ = asyncio.run(arun_stages(INTENT, "sg1", stages))
+    assert outputs == {"a": "x", "b": "x", "c": "x"}
+    assert time.time() - t0 < 0.3
+
+
+def test_continue_workflow_reports_stage_timings():
+    result = continue_workflow(INTENT, "sg1")
+    assert set(result.stage_timings_ms) == {"flights", "hotels", "spots", "itinerary", "budget"}
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from datetime import date
+import travel_agent.llm_manager as mgr
+from travel_agent.llm_cache import LLM_CACHE
+from travel_agent.models import TripIntent
+from travel_agent.workflow import continue_workflow_async
+
+
+def _intent(dest):
+    return TripIntent(session_id=f"as-{dest}", raw_text="", origin="上海", destination=dest,
+                      depart_date=date(2025, 12, 10), days=2, budget_total=5000)
+
+
+def test_concurrent_async_workflows_do_not_block_loop(monkeypatch):
+    async def slow_achat_json(model, prompt, temperature=0.3):
+        await asyncio.sleep(0.2)
+        return {"days": [{"day_index": 1, "main_spots": ["x"], "meals": []}], "summary": "async"}
+    monkeypatch.setattr(mgr, "achat_json", slow_achat_json)
+    monkeypatch.setattr(mgr, "chat_json", lambda *a, **k: (_ for _ in ()).throw(AssertionError("sync call")))
+    LLM_CACHE.clear()
+
+    async def main():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        t = asyncio.create_task(ticker())
+        t0 = time.time()
+        results = await asyncio.gather(*(continue_workflow_async(_intent(d), f"as-{d}") for d in ["杭州", "苏州", "南京"]))
+        elapsed = time.time() - t0
+        t.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(main())
+    assert [r.itinerary.summary for r in results] == ["async"] * 3
+    assert elapsed < 0.5  # three 200ms LLM calls overlap
+    assert ticks >= 10
+    LLM_CACHE.clear()